@@ -0,0 +1,85 @@
+"""
+Measures what request blocking saves on heavy chapter pages: the old path
+loads every sub-resource and waits for the network to go idle, the new one
+aborts images, fonts, media and tracker requests and reads the chapter as
+soon as its paragraphs are in the DOM.
+
+Run from the repository root:
+    python -m benchmarks.bench_blocking --chapters 30 --assets 24
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.fixture_server import TRACKER_HOST, FixtureServer
+from scraper.browser_utils import DEFAULT_REQUEST_FILTER, BrowserPool, RequestFilter
+from scraper.paragraph_scraper import extract_chapter, scrape_paragraph_chapter
+
+
+async def scrape_networkidle(url: str, pool: BrowserPool) -> dict:
+    """The chapter scrape as it was before blocking: wait for network idle."""
+    async with pool.page() as page:
+        await page.goto(url, timeout=15000)
+        await page.wait_for_load_state("networkidle", timeout=10000)
+        _, blocks = await extract_chapter(page, url)
+        return {"content": "\n".join(block["text"] for block in blocks if block.get("text"))}
+
+
+async def run(server: FixtureServer, urls: list, concurrency: int,
+              request_filter: RequestFilter | None, scrape) -> tuple:
+    """
+    Scrapes every URL and reports wall time, bytes and requests served and
+    requests blocked in the browser.
+    """
+    handler = server.handler
+    handler.bytes_sent = handler.served = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with BrowserPool(pages_per_browser=concurrency, request_filter=request_filter) as pool:
+        async def one(url: str) -> dict:
+            async with semaphore:
+                return await scrape(url, pool)
+
+        start = time.perf_counter()
+        chapters = await asyncio.gather(*(one(url) for url in urls))
+        elapsed = time.perf_counter() - start
+        blocked = sum(pool.blocked.values())
+
+    empty = sum(1 for chapter in chapters if not chapter["content"])
+    if empty:
+        print(f"[WARN] {empty} chapter(s) came back empty")
+    return elapsed, handler.bytes_sent, handler.served, blocked
+
+
+async def main(chapters: int, assets: int, asset_latency: float, concurrency: int) -> None:
+    """
+    Runs both paths against the same heavy fixture pages and prints a comparison.
+    """
+    blocking = DEFAULT_REQUEST_FILTER.extend(block=[TRACKER_HOST])
+    with FixtureServer(asset_latency=asset_latency) as server:
+        urls = [server.url(f"/chapter-{n}.html?assets={assets}")
+                for n in range(1, chapters + 1)]
+        rows = [
+            ("load all + idle", await run(server, urls, concurrency, None, scrape_networkidle)),
+            ("blocked + ready", await run(server, urls, concurrency, blocking,
+                                          scrape_paragraph_chapter)),
+        ]
+
+    print()
+    print(f"{'path':<18}{'total (s)':>10}{'ms/chapter':>12}{'KiB served':>12}"
+          f"{'requests':>10}{'blocked':>9}")
+    for name, (elapsed, sent, served, blocked) in rows:
+        print(f"{name:<18}{elapsed:>10.2f}{elapsed / chapters * 1000:>12.1f}"
+              f"{sent / 1024:>12.0f}{served:>10}{blocked:>9}")
+    print(f"speedup: {rows[0][1][0] / rows[1][1][0]:.1f}x, "
+          f"bandwidth: {rows[1][1][1] / max(1, rows[0][1][1]):.1%} of unblocked")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark request blocking on heavy pages.")
+    parser.add_argument("--chapters", type=int, default=30)
+    parser.add_argument("--assets", type=int, default=24, help="images per chapter page")
+    parser.add_argument("--asset-latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.chapters, args.assets, args.asset_latency, args.concurrency))
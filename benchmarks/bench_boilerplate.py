@@ -0,0 +1,113 @@
+"""
+Measures what boilerplate stripping saves on a synthetic novel whose
+chapters all carry the same site header, footer and ad paragraphs.
+
+Each variant saves the chapters through the scraper's `save_chapter` into a
+fresh chapter store, then builds the EPUB. "kept" disables stripping,
+"stripped" uses the default threshold, and "converter only" saves with
+stripping disabled but lets the converter strip when building the EPUB.
+
+Run from the repository root:
+    python -m benchmarks.bench_boilerplate --chapters 2000
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fixture_server import render_chapter
+from converter.epub_converter import generate_epub
+from scraper.boilerplate import DEFAULT_THRESHOLD, BoilerplateIndex
+from scraper.chapter_store import DEFAULT_STORE, open_store
+from scraper.manifest import ChapterManifest
+from scraper.orchestrator import save_chapter
+
+DEFAULT_CHAPTERS = 2000
+DEFAULT_PARAGRAPHS = 40
+
+HEADER = [
+    "<p>Read the latest chapters at <a href=\"https://novel.example\">novel.example</a></p>",
+    "<p>Previous Chapter | Table of Contents | Next Chapter</p>",
+]
+FOOTER = [
+    "<p>If you find any errors ( broken links, non-standard content, etc.. ), "
+    "please let us know so we can fix it as soon as possible.</p>",
+    "<p>Tip: You can use left, right, A and D keyboard keys to browse between chapters.</p>",
+    "<p>Previous Chapter | Table of Contents | Next Chapter</p>",
+]
+ADVERT = "<p>  ADVERTISEMENT — support the translators on our   Patreon!</p>"
+
+# (save threshold, build threshold) of each variant
+VARIANTS = {
+    "kept": (0, 0),
+    "converter only": (0, DEFAULT_THRESHOLD),
+    "stripped": (DEFAULT_THRESHOLD, DEFAULT_THRESHOLD),
+}
+
+
+def chapter_content(number: int, paragraphs: int) -> str:
+    """Fixture chapter text wrapped in site boilerplate, with an ad in two of three chapters."""
+    html = render_chapter(number, paragraphs)
+    body = html[html.index("<p>"):html.rindex("</p>") + 4].split("\n")
+    if number % 3:
+        body.insert(len(body) // 2, ADVERT)
+    return "\n".join(HEADER + body + FOOTER)
+
+
+def store_bytes(novel_dir: Path) -> int:
+    """Size of everything the scraper wrote for the novel."""
+    return sum(path.stat().st_size for path in novel_dir.rglob("*") if path.is_file())
+
+
+def run_variant(novel_dir: Path, chapters: int, paragraphs: int,
+                save_threshold: float, build_threshold: float) -> dict:
+    """Saves and converts the fixture novel once, returning sizes and timings."""
+    novel_dir.mkdir(parents=True)
+    with open(novel_dir / "metadata.json", "w", encoding="utf-8") as f:
+        json.dump({"title": "Benchmark Novel", "source": "https://example.com/novel",
+                   "chapters": chapters}, f)
+
+    start = time.perf_counter()
+    manifest = ChapterManifest.load(novel_dir, [])
+    index = BoilerplateIndex.load(novel_dir, save_threshold)
+    with open_store(novel_dir, DEFAULT_STORE) as store:
+        for number in range(1, chapters + 1):
+            chapter = {"title": f"Chapter {number}: The Fixture",
+                       "content": chapter_content(number, paragraphs)}
+            save_chapter(store, number, f"https://example.com/chapter-{number}", chapter,
+                         manifest, index)
+    save_seconds = time.perf_counter() - start
+    stored = store_bytes(novel_dir)
+
+    start = time.perf_counter()
+    epub_path = generate_epub(novel_dir, boilerplate_threshold=build_threshold)
+    return {"save_seconds": save_seconds, "store_mib": stored / 1024 / 1024,
+            "convert_seconds": time.perf_counter() - start,
+            "epub_mib": epub_path.stat().st_size / 1024 / 1024}
+
+
+def main(chapters: int, paragraphs: int) -> None:
+    """
+    Runs every variant on its own copy of the fixture novel.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (save_threshold, build_threshold) in VARIANTS.items():
+            print(f"[INFO] {name}: saving and converting {chapters} chapters...")
+            results[name] = run_variant(Path(tmp) / name.replace(" ", "-"), chapters,
+                                        paragraphs, save_threshold, build_threshold)
+
+    print()
+    print(f"{'variant':<16}{'save s':>9}{'store MiB':>11}{'convert s':>11}{'EPUB MiB':>10}")
+    for name, result in results.items():
+        print(f"{name:<16}{result['save_seconds']:>9.2f}{result['store_mib']:>11.2f}"
+              f"{result['convert_seconds']:>11.2f}{result['epub_mib']:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark boilerplate stripping.")
+    parser.add_argument("--chapters", type=int, default=DEFAULT_CHAPTERS)
+    parser.add_argument("--paragraphs", type=int, default=DEFAULT_PARAGRAPHS)
+    args = parser.parse_args()
+    main(args.chapters, args.paragraphs)
@@ -0,0 +1,66 @@
+"""
+Compares per-chapter wall time of the launch-per-chapter path against the
+shared BrowserPool, using the local fixture server.
+
+Run from the repository root:
+    python -m benchmarks.bench_browser_pool --chapters 30 --concurrency 3
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.fixture_server import FixtureServer
+from scraper.browser_utils import BrowserPool
+from scraper.paragraph_scraper import scrape_paragraph_chapter
+
+
+async def run_scrapes(urls: list, concurrency: int, pool: BrowserPool | None) -> float:
+    """
+    Scrapes every URL with at most `concurrency` chapters in flight.
+
+    Returns:
+        float: Total wall time in seconds.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def scrape(url: str) -> dict:
+        async with semaphore:
+            return await scrape_paragraph_chapter(url, pool)
+
+    start = time.perf_counter()
+    chapters = await asyncio.gather(*(scrape(url) for url in urls))
+    elapsed = time.perf_counter() - start
+
+    empty = sum(1 for chapter in chapters if not chapter["content"])
+    if empty:
+        print(f"[WARN] {empty} chapter(s) came back empty")
+    return elapsed
+
+
+async def main(chapters: int, concurrency: int, browsers: int) -> None:
+    """
+    Runs both paths against the same fixture pages and prints a comparison.
+    """
+    with FixtureServer() as server:
+        urls = [server.url(f"/chapter-{n}.html") for n in range(1, chapters + 1)]
+
+        per_call = await run_scrapes(urls, concurrency, pool=None)
+
+        pages_per_browser = max(1, concurrency // browsers)
+        async with BrowserPool(browsers=browsers, pages_per_browser=pages_per_browser) as pool:
+            pooled = await run_scrapes(urls, concurrency, pool=pool)
+
+    print()
+    print(f"{'path':<20}{'total (s)':>12}{'per chapter (ms)':>20}")
+    for name, elapsed in [("launch-per-call", per_call), ("browser pool", pooled)]:
+        print(f"{name:<20}{elapsed:>12.2f}{elapsed / chapters * 1000:>20.1f}")
+    print(f"speedup: {per_call / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the shared browser pool.")
+    parser.add_argument("--chapters", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--browsers", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.chapters, args.concurrency, args.browsers))
@@ -0,0 +1,74 @@
+"""
+Measures the on-disk response cache by scraping the same fixture chapters
+with no cache, a cold cache, a warm cache and an expired cache that has to
+revalidate every page.
+
+Run from the repository root:
+    python -m benchmarks.bench_cache --chapters 500 --latency 0.05
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from benchmarks.fixture_server import FixtureServer
+from scraper.browser_utils import BrowserPool
+from scraper.http_scraper import scrape_http_chapter
+from scraper.response_cache import ResponseCache
+
+CONCURRENCY = 8
+
+
+async def scrape(urls: list, cache: Optional[ResponseCache]) -> float:
+    """
+    Scrapes every URL through the "http" scraper and returns the elapsed seconds.
+    """
+    slots = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(url: str) -> None:
+        async with slots:
+            await scrape_http_chapter(url, pool)
+
+    start = time.perf_counter()
+    async with BrowserPool(cache=cache) as pool:
+        await asyncio.gather(*(one(url) for url in urls))
+    return time.perf_counter() - start
+
+
+async def main(chapters: int, latency: float) -> None:
+    """
+    Runs each cache scenario against the same fixture host.
+    """
+    rows = []
+    with FixtureServer(latency=latency) as server, tempfile.TemporaryDirectory() as tmp:
+        urls = [server.url(f"/chapter-{n}.html") for n in range(1, chapters + 1)]
+        cache_dir = Path(tmp)
+        # Each cache is opened after the previous run so it sees its entries
+        scenarios = [
+            ("no cache", lambda: None),
+            ("cold", lambda: ResponseCache(cache_dir)),
+            ("warm", lambda: ResponseCache(cache_dir)),
+            ("revalidate", lambda: ResponseCache(cache_dir, ttl=0)),
+        ]
+        for name, open_cache in scenarios:
+            cache = open_cache()
+            served = server.handler.served
+            elapsed = await scrape(urls, cache)
+            rows.append((name, elapsed, server.handler.served - served,
+                         cache.report()["bytes"] if cache else 0))
+
+    print()
+    print(f"{'scenario':<12}{'seconds':>10}{'chapters/s':>12}{'requests':>10}{'cache MiB':>11}")
+    for name, elapsed, requests, size in rows:
+        print(f"{name:<12}{elapsed:>10.2f}{chapters / elapsed:>12.1f}{requests:>10}"
+              f"{size / 1024 / 1024:>11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the on-disk response cache.")
+    parser.add_argument("--chapters", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main(args.chapters, args.latency))
@@ -0,0 +1,229 @@
+"""
+Measures chapter URL canonicalization and ordering on a synthetic ToC of
+about 10,000 links, against the previous approach: dropping exact duplicate
+URLs and sorting by the number after "chapter" (or the first number) in
+each URL.
+
+The ToC spells the same chapter several ways (http and https, "www.", a
+trailing slash, a fragment, tracking parameters), lists the newest chapters
+again in a "latest chapters" widget on every page, repeats the last chapter
+of each page at the top of the next one, puts the novel's ID before the
+chapter number in every URL, has unnumbered side stories and half chapters,
+and links some chapters a second time on a mirror host. Mirrors only show up
+as duplicates once their content is fetched, so the chapters the new order
+keeps are then saved through `save_chapter`, which skips copies.
+
+A second, smaller ToC numbers its chapters per volume ("Vol 2 Chapter 1")
+behind opaque URLs. Its chapter numbers repeat, so they must not reorder
+the ToC.
+
+"misplaced" is how many of the kept links would have to move to put them in
+reading order.
+
+Run from the repository root:
+    python -m benchmarks.bench_dedup --links 10000
+"""
+import argparse
+import bisect
+import contextlib
+import io
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from scraper.chapter_store import open_store
+from scraper.manifest import ChapterManifest
+from scraper.orchestrator import save_chapter
+from scraper.toc_extractor import order_chapter_urls
+
+DEFAULT_LINKS = 10000
+DEFAULT_PER_PAGE = 100
+VOLUMES = 10
+CHAPTERS_PER_VOLUME = 100
+WIDGET_SIZE = 5
+NOVEL_ID = 4721
+SIDE_STORY_EVERY = 250
+HALF_CHAPTER_EVERY = 100
+MIRROR_EVERY = 50
+SLUGS = ("a-new-dawn", "the-3-sisters", "return-of-the-king", "day-2-of-the-siege",
+         "homecoming", "10-years-later", "the-letter")
+
+
+def extract_numeric_hint(url: str) -> int:
+    """The previous sort key: the number after "chapter", else the first number."""
+    match = re.search(r'chapter[-_ /]?(\d+)', url.lower())
+    if not match:
+        match = re.search(r'(\d+)', url)
+    return int(match.group(1)) if match else 0
+
+
+def legacy_order(pages: List[Tuple[int, List[str]]]) -> List[str]:
+    """The previous `order_chapter_urls`."""
+    ordered = [url for _, links in sorted(pages, key=lambda item: item[0]) for url in links]
+    return sorted(dict.fromkeys(ordered), key=extract_numeric_hint)
+
+
+def spell(path: str, rng: random.Random) -> str:
+    """One of the ways the fixture site writes the URL of `path`."""
+    scheme = rng.choice(("http", "https"))
+    host = rng.choice(("novel.example", "www.novel.example"))
+    url = f"{scheme}://{host}{path}{rng.choice(('', '/'))}"
+    return url + rng.choice(("", "", "#comments", "?utm_source=toc",
+                             "?utm_medium=widget&fbclid=x1"))
+
+
+def build_toc(links: int, per_page: int, seed: int
+              ) -> Tuple[List[Tuple[int, List[str]]], Dict[str, str], Dict[str, tuple]]:
+    """
+    The fixture ToC.
+
+    Returns:
+        tuple: (page number, links) per page, the text of every link, and
+            each link's place in reading order, shared by all its spellings
+            and its mirror.
+    """
+    rng = random.Random(seed)
+    entries = []  # (path, text, reading place) in ToC order, before spelling
+    number = 0
+    # Every page also carries the widget and the previous page's last chapter
+    while len(entries) < links * per_page // (per_page + WIDGET_SIZE + 1):
+        number += 1
+        slug = SLUGS[number % len(SLUGS)]
+        entries.append((f"/novel/{NOVEL_ID}/chapter-{number}-{slug}",
+                        f"Chapter {number}: {slug.replace('-', ' ').title()}", (number, 0)))
+        if number % MIRROR_EVERY == 0:
+            entries.append((f"/read/{NOVEL_ID}/{number}", f"Chapter {number} (mirror)",
+                            (number, 0)))
+        if number % HALF_CHAPTER_EVERY == 0:
+            entries.append((f"/novel/{NOVEL_ID}/chapter-{number}-5-interlude",
+                            f"Chapter {number}.5: Interlude", (number, 1)))
+        if number % SIDE_STORY_EVERY == 0:
+            entries.append((f"/novel/{NOVEL_ID}/side-story-{number // SIDE_STORY_EVERY}",
+                            "Side Story: Festival Night", (number, 2)))
+
+    texts = {}
+    places = {}
+
+    def link(path: str, text: str, place: tuple) -> str:
+        url = spell(path, rng)
+        if path.startswith("/read/"):
+            url = f"https://mirror.example{path}"
+        texts.setdefault(url, text)
+        places[url] = place
+        return url
+
+    pages = []
+    newest = entries[-WIDGET_SIZE:]
+    for number, start in enumerate(range(0, len(entries), per_page)):
+        page = [link(*entry) for entry in newest]
+        if start:
+            page.append(link(*entries[start - 1]))
+        page += [link(*entry) for entry in entries[start:start + per_page]]
+        pages.append((number, page))
+    return pages, texts, places
+
+
+def build_volume_toc(seed: int
+                     ) -> Tuple[List[Tuple[int, List[str]]], Dict[str, str], Dict[str, tuple]]:
+    """
+    A ToC in reading order whose chapter numbers restart with every volume
+    and whose URLs carry a random post ID instead; same shape as `build_toc`.
+    """
+    rng = random.Random(seed)
+    post_ids = rng.sample(range(10000, 99999), VOLUMES * CHAPTERS_PER_VOLUME)
+    texts = {}
+    places = {}
+    links = []
+    for volume in range(1, VOLUMES + 1):
+        for number in range(1, CHAPTERS_PER_VOLUME + 1):
+            url = f"https://novel.example/p/{post_ids[len(links)]}"
+            texts[url] = f"Vol {volume} Chapter {number}"
+            places[url] = (volume, number)
+            links.append(url)
+    return [(0, links)], texts, places
+
+
+def misplaced(order: List[str], places: Dict[str, tuple]) -> int:
+    """Links that are not in the longest run of the order that reads correctly."""
+    run = []
+    for url in order:
+        position = bisect.bisect_right(run, places[url])
+        if position == len(run):
+            run.append(places[url])
+        else:
+            run[position] = places[url]
+    return len(order) - len(run)
+
+
+def save_all(order: List[str], places: Dict[str, tuple], novel_dir: Path) -> Dict[str, int]:
+    """Saves every kept link with content determined by its reading place."""
+    manifest = ChapterManifest.load(novel_dir, [])
+    with open_store(novel_dir, "log") as store, contextlib.redirect_stdout(io.StringIO()):
+        for index, url in enumerate(order, start=1):
+            number, part = places[url]
+            paragraphs = "\n".join(f"<p>Paragraph {line} of part {part} of chapter {number}.</p>"
+                                   for line in range(1, 6))
+            save_chapter(store, index, url, {"title": None, "content": paragraphs}, manifest)
+        stored = sum(1 for _ in store.iter_chapters())
+    copies = sum("duplicate_of" in entry for entry in manifest.entries.values())
+    return {"stored": stored, "copies": copies}
+
+
+def compare(pages: List[Tuple[int, List[str]]], texts: Dict[str, str],
+            places: Dict[str, tuple]) -> Dict[str, dict]:
+    """Orders a ToC both ways, returning the order and time of each."""
+    results = {}
+    for name, order in (("legacy", lambda: legacy_order(pages)),
+                        ("canonical", lambda: order_chapter_urls(pages, texts))):
+        start = time.perf_counter()
+        ordered = order()
+        results[name] = {"seconds": time.perf_counter() - start, "order": ordered}
+    return results
+
+
+def print_table(title: str, results: Dict[str, dict], places: Dict[str, tuple],
+                links: int) -> None:
+    """One row per ordering of a ToC with `links` links."""
+    chapters = len(set(places.values()))
+    print()
+    print(f"{title}: {links} links, {chapters} distinct chapters")
+    print(f"{'order':<12}{'kept':>8}{'extra':>8}{'misplaced':>11}{'ms':>9}")
+    for name, result in results.items():
+        kept = len(result["order"])
+        print(f"{name:<12}{kept:>8}{kept - chapters:>8}"
+              f"{misplaced(result['order'], places):>11}{result['seconds'] * 1000:>9.1f}")
+
+
+def main(links: int, per_page: int, seed: int) -> None:
+    """
+    Orders both fixture ToCs both ways, then saves the new order of the first.
+    """
+    pages, texts, places = build_toc(links, per_page, seed)
+    results = compare(pages, texts, places)
+    volume_pages, volume_texts, volume_places = build_volume_toc(seed)
+    volume_results = compare(volume_pages, volume_texts, volume_places)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        saved = save_all(results["canonical"]["order"], places, Path(tmp))
+        save_seconds = time.perf_counter() - start
+
+    print_table("Mixed ToC", results, places, sum(len(page) for _, page in pages))
+    print(f"saved {len(results['canonical']['order'])} fetched chapters in {save_seconds:.2f}s: "
+          f"{saved['stored']} stored, {saved['copies']} skipped as copies")
+    print_table("Per-volume numbering", volume_results, volume_places,
+                len(volume_pages[0][1]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ToC deduplication and ordering.")
+    parser.add_argument("--links", type=int, default=DEFAULT_LINKS,
+                        help="approximate number of links in the ToC")
+    parser.add_argument("--per-page", type=int, default=DEFAULT_PER_PAGE,
+                        help="chapter list entries per ToC page")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    main(args.links, args.per_page, args.seed)
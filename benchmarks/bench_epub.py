@@ -0,0 +1,94 @@
+"""
+Measures peak RSS and wall time of each EPUB backend on a synthetic novel.
+Every backend runs in a fresh interpreter so peak memory is not shared.
+
+Run from the repository root:
+    python -m benchmarks.bench_epub --chapters 5000
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fixture_server import render_chapter
+from converter.epub_converter import EPUB_BACKENDS, generate_epub
+
+DEFAULT_CHAPTERS = 5000
+DEFAULT_PARAGRAPHS = 40
+
+
+def build_fixture(novel_dir: Path, chapters: int, paragraphs: int) -> None:
+    """
+    Writes metadata.json and `chapters` chapter files shaped like scraper output.
+    """
+    chapters_dir = novel_dir / "chapters"
+    chapters_dir.mkdir(parents=True)
+    with open(novel_dir / "metadata.json", "w", encoding="utf-8") as f:
+        json.dump({"title": "Benchmark Novel", "source": "https://example.com/novel",
+                   "chapters": chapters}, f)
+
+    for number in range(1, chapters + 1):
+        html = render_chapter(number, paragraphs)
+        content = html[html.index("<p>"):html.rindex("</p>") + 4]
+        with open(chapters_dir / f"{number:03}.json", "w", encoding="utf-8") as f:
+            json.dump({"number": number, "title": f"Chapter {number}: The Fixture",
+                       "content": content}, f, indent=2)
+
+
+def run_backend(novel_dir: Path, backend: str) -> None:
+    """
+    Child process entry point: builds the EPUB and prints its measurements as JSON.
+    """
+    start = time.perf_counter()
+    output_path = generate_epub(novel_dir, backend=backend)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_mib": peak_kib / 1024,
+                      "size_mib": output_path.stat().st_size / 1024 / 1024}))
+
+
+def measure(novel_dir: Path, backend: str) -> dict:
+    """Runs one backend in a subprocess and returns its measurements."""
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_epub", "--run-backend", backend,
+         "--novel-dir", str(novel_dir)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(chapters: int, paragraphs: int, backends: list) -> None:
+    """
+    Builds the fixture once and measures every backend on it.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        novel_dir = Path(tmp) / "novel"
+        print(f"[INFO] Writing {chapters} fixture chapters...")
+        build_fixture(novel_dir, chapters, paragraphs)
+        results = {backend: measure(novel_dir, backend) for backend in backends}
+
+    print()
+    print(f"{'backend':<12}{'seconds':>10}{'peak RSS MiB':>14}{'EPUB MiB':>10}")
+    for backend, result in results.items():
+        print(f"{backend:<12}{result['seconds']:>10.2f}{result['peak_mib']:>14.1f}"
+              f"{result['size_mib']:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark EPUB generation backends.")
+    parser.add_argument("--chapters", type=int, default=DEFAULT_CHAPTERS)
+    parser.add_argument("--paragraphs", type=int, default=DEFAULT_PARAGRAPHS)
+    parser.add_argument("--backends", nargs="+", default=list(EPUB_BACKENDS),
+                        choices=list(EPUB_BACKENDS))
+    parser.add_argument("--run-backend", choices=list(EPUB_BACKENDS), help=argparse.SUPPRESS)
+    parser.add_argument("--novel-dir", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run_backend:
+        run_backend(args.novel_dir, args.run_backend)
+    else:
+        main(args.chapters, args.paragraphs, args.backends)
@@ -0,0 +1,91 @@
+"""
+Compares per-chapter extraction latency of the old per-element loop, the
+single generic in-page evaluation, and the same evaluation narrowed by a
+learned site profile, as used by `scrape_paragraph_chapter`.
+
+Run from the repository root:
+    python -m benchmarks.bench_extraction --paragraphs 3000 --rounds 5
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+from benchmarks.fixture_server import FixtureServer
+from scraper.browser_utils import BrowserPool
+from scraper.extract_chapter_title import TITLE_REGEX, TITLE_SELECTORS
+from scraper.paragraph_scraper import extract_chapter
+from scraper.site_profiles import ProfileStore
+
+
+async def extract_per_element(page) -> tuple:
+    """
+    The previous extraction: one awaited call per candidate element and per <p>.
+    """
+    title = None
+    for selector in TITLE_SELECTORS:
+        for el in await page.query_selector_all(selector):
+            text = (await el.text_content() or "").strip()
+            if title is None and TITLE_REGEX.search(text):
+                title = text
+
+    paragraphs = page.locator("p")
+    count = await paragraphs.count()
+    results = []
+    for i in range(count):
+        cleaned = (await paragraphs.nth(i).inner_text()).strip()
+        if cleaned:
+            results.append(f"<p>{cleaned}</p>")
+    return title, results
+
+
+async def extract_batched(page, profiles: ProfileStore | None = None) -> tuple:
+    """
+    The current extraction: a single `page.evaluate` round-trip, generic or
+    narrowed by the site profile in `profiles`.
+    """
+    title, blocks = await extract_chapter(page, page.url, profiles)
+    results = [f"<p>{block['text'].strip()}</p>" for block in blocks
+               if block.get("text", "").strip()]
+    return title, results
+
+
+async def main(paragraphs: int, rounds: int) -> None:
+    """
+    Loads one large fixture chapter and times both extractors on it.
+    """
+    timings = {"per-element": [], "batched": [], "profiled": []}
+
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as tmp:
+        url = server.url(f"/chapter-1.html?paragraphs={paragraphs}")
+        profiles = ProfileStore(Path(tmp) / "site_profiles.json")
+        async with BrowserPool(pages_per_browser=1) as pool:
+            async with pool.page() as page:
+                await page.goto(url)
+                # Learn the fixture site's profile once, as the first chapter would
+                await extract_batched(page, profiles)
+                extractors = [("per-element", extract_per_element), ("batched", extract_batched),
+                              ("profiled", partial(extract_batched, profiles=profiles))]
+                for _ in range(rounds):
+                    for name, extractor in extractors:
+                        start = time.perf_counter()
+                        title, results = await extractor(page)
+                        timings[name].append(time.perf_counter() - start)
+                        assert title and len(results) == paragraphs
+
+    print()
+    print(f"{'extractor':<14}{'best (ms)':>12}{'mean (ms)':>12}")
+    for name, samples in timings.items():
+        print(f"{name:<14}{min(samples) * 1000:>12.1f}{sum(samples) / len(samples) * 1000:>12.1f}")
+    for name in ("batched", "profiled"):
+        print(f"{name} speedup: {min(timings['per-element']) / min(timings[name]):.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark chapter extraction round-trips.")
+    parser.add_argument("--paragraphs", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.paragraphs, args.rounds))
@@ -0,0 +1,68 @@
+"""
+Measures chapters per second of the browserless "http" scraper against the
+Playwright paragraph scraper on the local fixture server.
+
+Run from the repository root:
+    python -m benchmarks.bench_http_scraper --chapters 200 --concurrency 10
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.fixture_server import FixtureServer
+from scraper.browser_utils import BrowserPool
+from scraper.orchestrator import SCRAPER_MAP
+
+
+async def run_method(method: str, urls: list, concurrency: int) -> float:
+    """
+    Scrapes every URL with the given `SCRAPER_MAP` method through a shared pool.
+
+    Returns:
+        float: Chapters per second.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with BrowserPool(pages_per_browser=concurrency) as pool:
+        async def scrape(url: str) -> dict:
+            async with semaphore:
+                return await SCRAPER_MAP[method](url, pool)
+
+        start = time.perf_counter()
+        chapters = await asyncio.gather(*(scrape(url) for url in urls))
+        elapsed = time.perf_counter() - start
+
+    empty = sum(1 for chapter in chapters if not chapter["content"])
+    if empty:
+        print(f"[WARN] {method}: {empty} chapter(s) came back empty")
+    return len(urls) / elapsed
+
+
+async def main(chapters: int, concurrency: int, skip_browser: bool) -> None:
+    """
+    Runs the selected methods against the same fixture pages and prints a comparison.
+    """
+    methods = ["http"] if skip_browser else ["http", "paragraph"]
+    results = {}
+
+    with FixtureServer() as server:
+        urls = [server.url(f"/chapter-{n}.html") for n in range(1, chapters + 1)]
+        for method in methods:
+            results[method] = await run_method(method, urls, concurrency)
+
+    print()
+    print(f"{'method':<12}{'chapters/s':>12}")
+    for method, rate in results.items():
+        print(f"{method:<12}{rate:>12.1f}")
+    if "paragraph" in results:
+        print(f"speedup: {results['http'] / results['paragraph']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the browserless HTTP scraper.")
+    parser.add_argument("--chapters", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--skip-browser", action="store_true",
+                        help="only run the http method")
+    args = parser.parse_args()
+    asyncio.run(main(args.chapters, args.concurrency, args.skip_browser))
@@ -0,0 +1,101 @@
+"""
+Compares scraping chapters in the main event loop with sharding them over
+worker processes, against a fixture host serving long chapters so that
+parsing, not the network, is the bottleneck.
+
+The fixture server runs in its own process so it does not compete with the
+scraper for the benchmark process's GIL.
+
+Run from the repository root:
+    python -m benchmarks.bench_sharding --chapters 2000 --processes 1 2 4
+"""
+import argparse
+import asyncio
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fixture_server import FixtureServer
+from scraper.browser_utils import BrowserPool
+from scraper.chapter_store import LogChapterStore
+from scraper.orchestrator import stream_chapters
+from scraper.retry import RetryQueue
+from scraper.scheduler import HostScheduler, SchedulerConfig
+from scraper.sharding import scrape_in_processes
+
+CONFIG = SchedulerConfig(initial_concurrency=16, min_concurrency=16, max_concurrency=16,
+                         rate=0, backoff_base=0)
+
+
+def serve(port_queue: multiprocessing.Queue, latency: float) -> None:
+    """Fixture server process: reports its base URL and serves until killed."""
+    with FixtureServer(latency=latency) as server:
+        port_queue.put(server.base_url)
+        while True:
+            time.sleep(3600)
+
+
+async def in_process(chapters: list) -> int:
+    """Scrapes every chapter in this process's event loop."""
+    saved = 0
+    async with BrowserPool() as pool:
+        async for _ in stream_chapters(chapters, "http", pool, HostScheduler(CONFIG),
+                                       RetryQueue()):
+            saved += 1
+    return saved
+
+
+async def sharded(chapters: list, processes: int) -> int:
+    """Scrapes every chapter in worker processes and counts the merged chapters."""
+    saved = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        # Each shard gets the full window so the comparison is about cores, not limits
+        config = SchedulerConfig(**{**CONFIG.__dict__,
+                                    "initial_concurrency": 16 * processes,
+                                    "min_concurrency": 16 * processes,
+                                    "max_concurrency": 16 * processes})
+        async for shard_dir, _ in scrape_in_processes(chapters, "http", config, processes,
+                                                      Path(tmp)):
+            with LogChapterStore(shard_dir) as store:
+                saved += len(store.indexes())
+    return saved
+
+
+def main(chapters: int, paragraphs: int, latency: float, process_counts: list) -> None:
+    """
+    Times the in-process baseline and each process count on the same fixture.
+    """
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue, latency), daemon=True)
+    server.start()
+    base_url = port_queue.get()
+    work = [(n, f"{base_url}/chapter-{n}.html?paragraphs={paragraphs}")
+            for n in range(1, chapters + 1)]
+
+    rows = []
+    try:
+        start = time.perf_counter()
+        saved = asyncio.run(in_process(work))
+        rows.append(("in-process", saved, time.perf_counter() - start))
+        for processes in process_counts:
+            start = time.perf_counter()
+            saved = asyncio.run(sharded(work, processes))
+            rows.append((f"{processes} process(es)", saved, time.perf_counter() - start))
+    finally:
+        server.terminate()
+
+    print()
+    print(f"{'mode':<16}{'saved':>8}{'seconds':>10}{'chapters/s':>12}")
+    for mode, saved, elapsed in rows:
+        print(f"{mode:<16}{saved:>8}{elapsed:>10.2f}{saved / elapsed:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark process-sharded scraping.")
+    parser.add_argument("--chapters", type=int, default=2000)
+    parser.add_argument("--paragraphs", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+    main(args.chapters, args.paragraphs, args.latency, args.processes)
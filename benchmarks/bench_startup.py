@@ -0,0 +1,97 @@
+"""
+Measures how long each main.py subcommand takes to start, using
+`python -X importtime`.
+
+Every subcommand runs against an empty output directory, so it imports
+everything it needs and then finds nothing to do (scrape gets an empty
+batch file). Wall time is the median of several runs; import time and the
+modules loaded come from the `-X importtime` log of one more run.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_RUNS = 5
+COMMANDS = ("status", "convert", "update", "scrape")
+# Top-level packages whose presence shows which stack a subcommand loaded
+HEAVY_PACKAGES = ("playwright", "playwright_stealth", "aiohttp", "lxml", "ebooklib")
+
+
+def command_line(command: str, work_dir: Path) -> List[str]:
+    """Arguments that make `command` start up fully and then do nothing."""
+    arguments = [command, "--output-dir", str(work_dir / "output")]
+    if command == "scrape":
+        batch = work_dir / "empty-batch.txt"
+        batch.touch()
+        arguments += ["--batch", str(batch)]
+    return arguments
+
+
+def import_log(arguments: List[str]) -> Tuple[int, Set[str]]:
+    """
+    Total import microseconds and the names of all modules imported.
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", *arguments],
+                               cwd=REPO_ROOT, capture_output=True, text=True, check=False)
+    total = 0
+    modules = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented under the module importing them
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+        modules.add(name.strip())
+    return total, modules
+
+
+def measure(arguments: List[str], runs: int) -> Dict:
+    """Median wall time over `runs` runs, plus the import log of one run."""
+    wall = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *arguments], cwd=REPO_ROOT, capture_output=True,
+                       check=False)
+        wall.append(time.perf_counter() - start)
+    total, modules = import_log(arguments)
+    return {
+        "wall_ms": statistics.median(wall) * 1000,
+        "import_ms": total / 1000,
+        "heavy": [name for name in HEAVY_PACKAGES if name in modules],
+    }
+
+
+def main(runs: int) -> None:
+    """
+    Measures a bare interpreter and then every subcommand.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        results["python -c pass"] = measure(["-c", "pass"], runs)
+        for command in COMMANDS:
+            print(f"[INFO] Timing main.py {command}...")
+            results[f"main.py {command}"] = measure(
+                [str(REPO_ROOT / "main.py"), *command_line(command, Path(tmp))], runs)
+
+    print()
+    print(f"{'command':<18}{'wall ms':>9}{'import ms':>11}  heavy packages loaded")
+    for name, result in results.items():
+        print(f"{name:<18}{result['wall_ms']:>9.0f}{result['import_ms']:>11.0f}  "
+              f"{', '.join(result['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup time.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    args = parser.parse_args()
+    main(args.runs)
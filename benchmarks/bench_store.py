@@ -0,0 +1,76 @@
+"""
+Compares the chapter store backends on a synthetic novel: write time, time
+to open and look up every chapter by URL, sequential read time, files on
+disk and bytes used.
+
+Run from the repository root:
+    python -m benchmarks.bench_store --chapters 10000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fixture_server import render_chapter
+from scraper.chapter_store import STORE_BACKENDS
+
+
+def make_chapter(number: int, paragraphs: int) -> dict:
+    """A chapter record shaped like the orchestrator's output."""
+    html = render_chapter(number, paragraphs)
+    return {
+        "number": number,
+        "title": f"Chapter {number}: The Fixture",
+        "content": html[html.index("<p>"):html.rindex("</p>") + 4],
+        "source_url": f"https://example.com/chapter-{number}.html",
+    }
+
+
+def measure(backend: str, root: Path, chapters: int, paragraphs: int) -> dict:
+    """Runs every operation against one backend and returns the timings."""
+    novel_dir = root / backend
+    start = time.perf_counter()
+    with STORE_BACKENDS[backend](novel_dir) as store:
+        for number in range(1, chapters + 1):
+            store.put(number, make_chapter(number, paragraphs))
+    write = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with STORE_BACKENDS[backend](novel_dir) as store:
+        for number in range(1, chapters + 1):
+            store.get_by_url(f"https://example.com/chapter-{number}.html")
+    lookup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with STORE_BACKENDS[backend](novel_dir) as store:
+        read = sum(1 for _ in store.iter_chapters())
+    stream = time.perf_counter() - start
+    assert read == chapters
+
+    files = [path for path in novel_dir.rglob("*") if path.is_file()]
+    return {"write": write, "lookup": lookup, "stream": stream, "files": len(files),
+            "mib": sum(path.stat().st_size for path in files) / 1024 / 1024}
+
+
+def main(chapters: int, paragraphs: int) -> None:
+    """
+    Measures every backend on the same synthetic chapters.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {backend: measure(backend, Path(tmp), chapters, paragraphs)
+                   for backend in STORE_BACKENDS}
+
+    print()
+    print(f"{'store':<8}{'write s':>9}{'open+lookup s':>15}{'stream s':>10}"
+          f"{'files':>8}{'MiB':>8}")
+    for backend, r in results.items():
+        print(f"{backend:<8}{r['write']:>9.2f}{r['lookup']:>15.2f}{r['stream']:>10.2f}"
+              f"{r['files']:>8}{r['mib']:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the chapter store backends.")
+    parser.add_argument("--chapters", type=int, default=10000)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    args = parser.parse_args()
+    main(args.chapters, args.paragraphs)
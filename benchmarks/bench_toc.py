@@ -0,0 +1,75 @@
+"""
+Compares the old click-and-sleep ToC walk against `extract_toc_info` on a
+local multi-page ToC fixture.
+
+Run from the repository root:
+    python -m benchmarks.bench_toc --pages 20 --per-page 50 --latency 0.1
+"""
+import argparse
+import asyncio
+import time
+from urllib.parse import urljoin
+
+from benchmarks.fixture_server import TOC_PATH, FixtureServer
+from scraper.browser_utils import BrowserPool
+from scraper.toc_extractor import (CHAPTER_LINK_CONTAINER_SELECTOR, CHAPTER_LINK_SELECTOR,
+                                   extract_toc_info, find_next_pagination_button,
+                                   is_valid_chapter_link)
+
+
+async def walk_toc_sequentially(pool: BrowserPool, toc_url: str) -> list:
+    """
+    The previous pagination loop: one awaited call per link, a fixed
+    1.5 s sleep after every "next" click and list-based visited checks.
+    """
+    chapter_urls = []
+    visited_urls = []
+    async with pool.page() as page:
+        await page.goto(toc_url, timeout=15000)
+        while page.url not in visited_urls:
+            visited_urls.append(page.url)
+            container = page.locator(CHAPTER_LINK_CONTAINER_SELECTOR)
+            for link in await container.locator(CHAPTER_LINK_SELECTOR).all():
+                href = await link.get_attribute("href")
+                if href and is_valid_chapter_link(href):
+                    chapter_urls.append(urljoin(toc_url, href))
+
+            next_button = await find_next_pagination_button(page)
+            if not next_button:
+                break
+            await next_button.click()
+            await page.wait_for_timeout(1500)
+    return list(dict.fromkeys(chapter_urls))
+
+
+async def main(pages: int, per_page: int, latency: float) -> None:
+    """
+    Times both extractors on the same fixture ToC.
+    """
+    with FixtureServer(toc_pages=pages, chapters_per_toc_page=per_page,
+                       latency=latency) as server:
+        toc_url = server.url(TOC_PATH)
+        async with BrowserPool(pages_per_browser=4) as pool:
+            start = time.perf_counter()
+            legacy_urls = await walk_toc_sequentially(pool, toc_url)
+            legacy = time.perf_counter() - start
+
+            start = time.perf_counter()
+            toc_info = await extract_toc_info(toc_url, pool)
+            current = time.perf_counter() - start
+
+    expected = pages * per_page
+    print()
+    print(f"{'extractor':<14}{'links':>8}{'seconds':>10}")
+    print(f"{'sequential':<14}{len(legacy_urls):>8}{legacy:>10.2f}")
+    print(f"{'concurrent':<14}{len(toc_info['chapter_urls']):>8}{current:>10.2f}")
+    print(f"expected links: {expected}, speedup: {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ToC extraction.")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--per-page", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.per_page, args.latency))
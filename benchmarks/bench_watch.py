@@ -0,0 +1,113 @@
+"""
+Compares keeping an ongoing serial up to date by running `main.py update`
+on a schedule (every poll reads the whole ToC and diffs it against the
+manifest) with `main.py watch` (every poll probes two ToC pages, and only a
+change reads the ToC pages that can hold new chapters).
+
+The simulated novel starts with --chapters chapters and publishes --new
+more every --grow-every polls. Each variant downloads it once, then polls
+it --polls times under one warm browser pool against its own simulator.
+Chapter downloads and EPUB updates are the same in both variants, so the
+difference is the ToC traffic.
+
+Run from the repository root:
+    python -m benchmarks.bench_watch --chapters 2000 --polls 12 --grow-every 3
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fixture_server import TOC_PATH, FixtureServer
+from pipeline import finish_novel, watch_novel
+from scraper.batch import BatchNovel
+from scraper.boilerplate import DEFAULT_THRESHOLD
+from scraper.browser_utils import BrowserPool
+from scraper.orchestrator import NovelScrape, scrape_novel
+from scraper.retry import RetryQueue
+from scraper.scheduler import FairWorkerPool, HostScheduler
+from scraper.watch import DEFAULT_FULL_SYNC_INTERVAL
+
+DEFAULT_CHAPTERS = 2000
+DEFAULT_PER_PAGE = 50
+DEFAULT_POLLS = 12
+DEFAULT_GROW_EVERY = 3
+DEFAULT_NEW = 2
+WORKERS = 8
+EPUB_OPTIONS = {"max_image_size": 0, "image_quality": None, "volumes": None,
+                "boilerplate_threshold": DEFAULT_THRESHOLD}
+
+
+async def update_novel(novel_dir: Path, novel: BatchNovel, pool: BrowserPool,
+                       scheduler: HostScheduler, workers: FairWorkerPool) -> bool:
+    """One `main.py update` of the novel: reads the whole ToC, fetches what is new."""
+    scrape = NovelScrape(novel.toc_url, novel_dir.parent, pool, fetch_images=False)
+    result = await scrape_novel(scrape, novel.method, scheduler, RetryQueue(), workers)
+    if scrape.saved:
+        await finish_novel(result, novel, **EPUB_OPTIONS)
+    return bool(scrape.saved)
+
+
+async def run_variant(variant: str, output_dir: Path, args: argparse.Namespace) -> dict:
+    """Downloads the novel, then polls it, returning requests and time per poll."""
+    with FixtureServer(chapters_per_toc_page=args.per_page) as server:
+        server.set_chapters(args.chapters)
+        novel = BatchNovel(server.url(TOC_PATH), "http")
+        scheduler = HostScheduler()
+        workers = FairWorkerPool(WORKERS)
+        async with BrowserPool(pages_per_browser=WORKERS) as pool:
+            scrape = NovelScrape(novel.toc_url, output_dir, pool, fetch_images=False)
+            result = await scrape_novel(scrape, novel.method, scheduler, RetryQueue(), workers)
+            await finish_novel(result, novel, **EPUB_OPTIONS)
+            novel_dir = result["novel_dir"]
+
+            chapters = args.chapters
+            requests = []
+            seconds = []
+            for poll in range(1, args.polls + 1):
+                if poll % args.grow_every == 0:
+                    chapters += args.new
+                    server.set_chapters(chapters)
+                served = server.handler.served
+                start = time.perf_counter()
+                if variant == "watch":
+                    await watch_novel(novel_dir, novel, pool, scheduler, workers,
+                                      "log", False, EPUB_OPTIONS, DEFAULT_FULL_SYNC_INTERVAL)
+                else:
+                    await update_novel(novel_dir, novel, pool, scheduler, workers)
+                seconds.append(time.perf_counter() - start)
+                requests.append(server.handler.served - served)
+    return {"requests": requests, "seconds": seconds, "chapters": chapters}
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Runs both variants on their own simulator and output folder.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for variant in ("update", "watch"):
+            print(f"[INFO] {variant}: {args.polls} polls of a {args.chapters}-chapter serial...")
+            results[variant] = await run_variant(variant, Path(tmp) / variant, args)
+
+    print()
+    print(f"{'variant':<10}{'requests':>10}{'req/poll':>10}{'seconds':>10}{'s/poll':>9}")
+    for variant, result in results.items():
+        total = sum(result["requests"])
+        elapsed = sum(result["seconds"])
+        print(f"{variant:<10}{total:>10}{total / args.polls:>10.1f}{elapsed:>10.2f}"
+              f"{elapsed / args.polls:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark watch mode against repeated updates.")
+    parser.add_argument("--chapters", type=int, default=DEFAULT_CHAPTERS)
+    parser.add_argument("--per-page", type=int, default=DEFAULT_PER_PAGE,
+                        help="chapters per ToC page")
+    parser.add_argument("--polls", type=int, default=DEFAULT_POLLS)
+    parser.add_argument("--grow-every", type=int, default=DEFAULT_GROW_EVERY,
+                        help="polls between two chapter releases")
+    parser.add_argument("--new", type=int, default=DEFAULT_NEW,
+                        help="chapters published per release")
+    asyncio.run(main(parser.parse_args()))
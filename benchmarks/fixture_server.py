@@ -0,0 +1,356 @@
+"""
+Local HTTP server simulating a novel site, so benchmarks can run without
+touching a real site: a paginated ToC, server-rendered paragraph chapters,
+iframe chapters, heavy ad-laden pages, artificial latency, throttling and
+transient errors.
+"""
+import hashlib
+import math
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_PARAGRAPHS = 60
+DEFAULT_TOC_PAGES = 5
+DEFAULT_CHAPTERS_PER_TOC_PAGE = 50
+
+DEFAULT_ASSET_BYTES = 50_000
+
+CHAPTER_KINDS = ("paragraph", "iframe")
+
+CHAPTER_PATH = re.compile(r"^/chapter-(\d+)\.html$")
+IFRAME_CHAPTER_PATH = re.compile(r"^/iframe-chapter-(\d+)\.html$")
+IFRAME_CONTENT_PATH = re.compile(r"^/iframe-content-(\d+)\.html$")
+ASSET_PATH = re.compile(r"^/assets/[\w.-]+$")
+TOC_PATH = "/novel.html"
+# *.localhost resolves to the loopback address in Chromium, so this host
+# reaches the fixture server while looking like a third-party tracker
+TRACKER_HOST = "tracker.localhost"
+
+ASSET_TYPES = {
+    ".png": "image/png",
+    ".woff2": "font/woff2",
+    ".css": "text/css",
+    ".js": "application/javascript",
+    ".mp4": "video/mp4",
+}
+
+
+def render_chapter(number: int, paragraphs: int = DEFAULT_PARAGRAPHS) -> str:
+    """
+    Renders a server-side chapter page with a title and `paragraphs` <p> tags.
+    """
+    body = "\n".join(
+        f"<p>Chapter {number}, paragraph {i}. The lamp flickered as the "
+        f"wind pushed against the shutters of the old house.</p>"
+        for i in range(1, paragraphs + 1)
+    )
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>Test Novel - Chapter {number}</title></head><body>"
+        f"<h1>Chapter {number}: The Fixture</h1>"
+        f"<div class=\"chapter-content\">{body}</div>"
+        "</body></html>"
+    )
+
+
+def chapter_path(number: int, kind: str = "paragraph") -> str:
+    """Path of chapter `number` as linked from the ToC."""
+    return f"/iframe-chapter-{number}.html" if kind == "iframe" else f"/chapter-{number}.html"
+
+
+def render_iframe_chapter(number: int) -> str:
+    """
+    Renders an iframe chapter page: the title is on the page, the text is in
+    `#unencrypted-content` inside the embedded document.
+    """
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>Test Novel - Chapter {number}</title></head><body>"
+        f"<h1>Chapter {number}: The Fixture</h1>"
+        f"<iframe src=\"/iframe-content-{number}.html\"></iframe>"
+        "</body></html>"
+    )
+
+
+def render_iframe_content(number: int, paragraphs: int = DEFAULT_PARAGRAPHS) -> str:
+    """Renders the embedded document holding an iframe chapter's text."""
+    page = render_chapter(number, paragraphs)
+    body = page[page.index("<p>"):page.rindex("</p>") + 4]
+    return (
+        "<!DOCTYPE html><html><head></head><body>"
+        f"<div id=\"unencrypted-content\">{body}</div>"
+        "</body></html>"
+    )
+
+
+def render_heavy_chapter(number: int, paragraphs: int, assets: int, port: int) -> str:
+    """
+    Renders a chapter page loaded with sub-resources like a typical ad-funded
+    novel site: images, web fonts, a video, a stylesheet and a tracker script
+    that keeps beaconing, so the network never goes idle for long.
+    """
+    tracker = f"http://{TRACKER_HOST}:{port}"
+    images = "".join(f"<img src=\"/assets/banner-{number}-{i}.png\">" for i in range(assets))
+    fonts = "".join(
+        f"@font-face {{ font-family: f{i}; src: url(/assets/font-{i}.woff2); }} "
+        f".f{i} {{ font-family: f{i}; }} "
+        for i in range(assets // 4 + 1)
+    )
+    spans = "".join(f"<span class=\"f{i}\">ad</span>" for i in range(assets // 4 + 1))
+    page = render_chapter(number, paragraphs)
+    head = (
+        f"<style>{fonts}</style>"
+        "<link rel=\"stylesheet\" href=\"/assets/site.css\">"
+        f"<script async src=\"{tracker}/assets/analytics.js\"></script>"
+        "<script>setInterval(() => fetch("
+        f"\"{tracker}/assets/beacon-\" + Date.now() + \".js\").catch(() => {{}}), 400);"
+        "</script>"
+    )
+    body = f"<div class=\"ads\">{images}{spans}<video src=\"/assets/promo.mp4\"></video></div>"
+    return page.replace("</head>", f"{head}</head>").replace("<body>", f"<body>{body}")
+
+
+def render_toc(page: int, pages: int = DEFAULT_TOC_PAGES,
+               per_page: int = DEFAULT_CHAPTERS_PER_TOC_PAGE,
+               total: int = 0, kind: str = "paragraph") -> str:
+    """
+    Renders page `page` of a paginated table of contents. The pagination bar
+    shows a window of page numbers, a "next" link and a "last" link, like
+    most novel sites. `total` caps the number of chapters (0 fills every
+    page); `kind` selects paragraph or iframe chapter links.
+    """
+    first = (page - 1) * per_page + 1
+    last = first + per_page - 1
+    if total:
+        last = min(last, total)
+    links = "\n".join(
+        f"<li><a href=\"{chapter_path(n, kind)}\">Chapter {n}</a></li>"
+        for n in range(first, last + 1)
+    )
+
+    numbers = range(max(1, page - 2), min(pages, page + 2) + 1)
+    pagination = "".join(
+        f"<li><a href=\"{TOC_PATH}?page={n}\">{n}</a></li>" for n in numbers
+    )
+    if page < pages:
+        pagination += (
+            f"<li class=\"next\"><a rel=\"next\" href=\"{TOC_PATH}?page={page + 1}\">›</a></li>"
+            f"<li><a href=\"{TOC_PATH}?page={pages}\">Last</a></li>"
+        )
+
+    return (
+        "<!DOCTYPE html><html><head><title>Test Novel</title></head><body>"
+        "<h1 class=\"novel-title\">Test Novel of the Fixture</h1>"
+        "<div class=\"book-cover\"><img src=\"/cover.jpg\"></div>"
+        f"<ul class=\"chapter-list\">{links}</ul>"
+        f"<ul class=\"pagination\">{pagination}</ul>"
+        "</body></html>"
+    )
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """
+    Serves `/chapter-<n>.html` pages and a paginated ToC at `/novel.html?page=<n>`,
+    with ETags so conditional requests are answered with 304.
+    The number of paragraphs can be set with the `paragraphs` query parameter;
+    the ToC size with the `toc_pages` and `chapters_per_toc_page` attributes.
+    `?assets=<n>` turns a chapter into a heavy page with sub-resources from
+    `/assets/`, each `asset_bytes` long and delayed by `asset_latency` seconds.
+    Iframe chapters live at `/iframe-chapter-<n>.html`; `chapter_kind` picks
+    which kind the ToC links to, `chapters` caps the ToC length (0 fills
+    every page) and `paragraphs` is the default chapter length.
+
+    Class attributes simulate a strained host: every response is delayed by
+    `latency` seconds, and requests beyond `max_concurrent` in flight are
+    answered with 429 (0 disables throttling). A fraction `error_rate` of
+    chapter paths, picked by hashing the path with `seed`, answers
+    `error_status` to its first request, so runs are reproducible and a
+    retry recovers.
+    """
+    latency = 0.0
+    max_concurrent = 0
+    toc_pages = DEFAULT_TOC_PAGES
+    chapters_per_toc_page = DEFAULT_CHAPTERS_PER_TOC_PAGE
+    chapters = 0
+    chapter_kind = "paragraph"
+    paragraphs = DEFAULT_PARAGRAPHS
+    error_rate = 0.0
+    error_status = 500
+    seed = 0
+    asset_bytes = DEFAULT_ASSET_BYTES
+    asset_latency = 0.0
+
+    # Shared counters, reset per server by FixtureServer
+    lock = threading.Lock()
+    active = 0
+    served = 0
+    throttled = 0
+    errors = 0
+    bytes_sent = 0
+    failed_paths: set = set()
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        cls = type(self)
+        with cls.lock:
+            if cls.max_concurrent and cls.active >= cls.max_concurrent:
+                cls.throttled += 1
+                over_limit = True
+            else:
+                cls.active += 1
+                over_limit = False
+
+        if over_limit:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        try:
+            if cls.latency:
+                time.sleep(cls.latency)
+            if self.fails_once():
+                self.send_error(cls.error_status)
+                return
+            self.serve_page()
+        finally:
+            with cls.lock:
+                cls.active -= 1
+                cls.served += 1
+
+    def fails_once(self) -> bool:
+        """Whether this request is a simulated transient error."""
+        cls = type(self)
+        path = urlparse(self.path).path
+        if not cls.error_rate or not (CHAPTER_PATH.match(path)
+                                      or IFRAME_CHAPTER_PATH.match(path)):
+            return False
+        digest = hashlib.sha1(f"{cls.seed}:{path}".encode("utf-8")).digest()
+        if int.from_bytes(digest[:4], "big") / 2 ** 32 >= cls.error_rate:
+            return False
+        with cls.lock:
+            if path in cls.failed_paths:
+                return False
+            cls.failed_paths.add(path)
+            cls.errors += 1
+        return True
+
+    def serve_page(self):
+        """Writes the page for the requested path."""
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        match = CHAPTER_PATH.match(parsed.path)
+        if ASSET_PATH.match(parsed.path):
+            self.serve_asset(parsed.path)
+            return
+        iframe_chapter = IFRAME_CHAPTER_PATH.match(parsed.path)
+        iframe_content = IFRAME_CONTENT_PATH.match(parsed.path)
+        paragraphs = int(query.get("paragraphs", [self.paragraphs])[0])
+        if iframe_chapter:
+            html = render_iframe_chapter(int(iframe_chapter.group(1)))
+        elif iframe_content:
+            html = render_iframe_content(int(iframe_content.group(1)), paragraphs)
+        elif match:
+            assets = int(query.get("assets", [0])[0])
+            if assets:
+                port = self.server.server_address[1]
+                html = render_heavy_chapter(int(match.group(1)), paragraphs, assets, port)
+            else:
+                html = render_chapter(int(match.group(1)), paragraphs)
+        elif parsed.path == TOC_PATH:
+            page = int(query.get("page", [1])[0])
+            if not 1 <= page <= self.toc_pages:
+                self.send_error(404)
+                return
+            html = render_toc(page, self.toc_pages, self.chapters_per_toc_page,
+                              self.chapters, self.chapter_kind)
+        else:
+            self.send_error(404)
+            return
+
+        body = html.encode("utf-8")
+        etag = f"\"{hashlib.sha1(body).hexdigest()}\""
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.send_body(body)
+
+    def serve_asset(self, path: str):
+        """Writes a filler sub-resource of `asset_bytes` bytes."""
+        if self.asset_latency:
+            time.sleep(self.asset_latency)
+        suffix = path[path.rfind("."):]
+        body = b"" if suffix in (".js", ".css") else b"\0" * self.asset_bytes
+        self.send_response(200)
+        self.send_header("Content-Type", ASSET_TYPES.get(suffix, "application/octet-stream"))
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.send_body(body)
+
+    def send_body(self, body: bytes):
+        """Writes `body` and counts it towards `bytes_sent`."""
+        self.wfile.write(body)
+        with type(self).lock:
+            type(self).bytes_sent += len(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class FixtureServer:
+    """
+    Runs `FixtureHandler` on an ephemeral localhost port in a background thread.
+
+    Keyword options override the handler's class attributes for this server
+    only, e.g. `FixtureServer(latency=0.05, max_concurrent=4)`.
+
+    Usage:
+        with FixtureServer() as server:
+            url = server.url("/chapter-1.html")
+            server.set_chapters(120)
+    """
+
+    def __init__(self, handler=FixtureHandler, **options):
+        self.handler = type(handler.__name__, (handler,), {
+            "lock": threading.Lock(), "active": 0, "served": 0, "throttled": 0, "errors": 0,
+            "bytes_sent": 0, "failed_paths": set(), **options,
+        })
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def base_url(self) -> str:
+        """Root URL of the running server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        """Absolute URL for `path` on this server."""
+        return f"{self.base_url}{path}"
+
+    def set_chapters(self, total: int) -> None:
+        """
+        Lists `total` chapters in the ToC, adding ToC pages as needed, like
+        an ongoing serial publishing new chapters.
+        """
+        self.handler.chapters = total
+        self.handler.toc_pages = max(1, math.ceil(total / self.handler.chapters_per_toc_page))
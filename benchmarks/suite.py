@@ -0,0 +1,263 @@
+"""
+Offline benchmark suite: times the full main.py pipeline and each stage on
+its own against the local novel-site simulator, at several novel sizes,
+and stores the results per commit so runs can be compared.
+
+Stages:
+    toc        extract_toc_info over a paginated ToC of N chapters
+    paragraph  scrape_paragraph_chapter on N paragraph chapters
+    iframe     scrape_iframe_chapter on N iframe chapters
+    http       scrape_http_chapter on N paragraph chapters
+    epub       generate_epub for a stored novel of N chapters
+    pipeline   main.py end to end (ToC, chapters, EPUB) in a subprocess
+
+Stages that cannot run (e.g. no Chromium installed) are recorded with
+their error and the suite moves on.
+
+Run from the repository root:
+    python -m benchmarks.suite --sizes 10 100 1000 10000
+    python -m benchmarks.suite --stages epub http --sizes 10000
+    python -m benchmarks.suite --compare benchmarks/results/A.json benchmarks/results/B.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.bench_epub import build_fixture
+from benchmarks.fixture_server import FixtureServer, TOC_PATH, chapter_path
+from converter.epub_converter import generate_epub
+from scraper.browser_utils import BrowserPool
+from scraper.http_scraper import scrape_http_chapter
+from scraper.iframe_scraper import scrape_iframe_chapter
+from scraper.metrics import DEFAULT_REPORT_NAME
+from scraper.paragraph_scraper import scrape_paragraph_chapter
+from scraper.retry import ChapterScrapeError
+from scraper.toc_extractor import extract_toc_info
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+STAGES = ("toc", "paragraph", "iframe", "http", "epub", "pipeline")
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+CHAPTERS_PER_TOC_PAGE = 100
+PIPELINE_TIMEOUT = 3600  # seconds
+
+CHAPTER_SCRAPERS = {
+    "paragraph": (scrape_paragraph_chapter, "paragraph"),
+    "iframe": (scrape_iframe_chapter, "iframe"),
+    "http": (scrape_http_chapter, "paragraph"),
+}
+
+
+def site(size: int, options: argparse.Namespace, kind: str = "paragraph") -> FixtureServer:
+    """A simulator serving a novel of `size` chapters with the suite's options."""
+    return FixtureServer(
+        chapters=size, chapters_per_toc_page=CHAPTERS_PER_TOC_PAGE,
+        toc_pages=math.ceil(size / CHAPTERS_PER_TOC_PAGE), chapter_kind=kind,
+        paragraphs=options.paragraphs, latency=options.latency,
+        error_rate=options.error_rate, seed=options.seed,
+    )
+
+
+async def bench_toc(size: int, options: argparse.Namespace) -> Dict:
+    """Times ToC extraction and checks every chapter link was found."""
+    with site(size, options) as server:
+        start = time.perf_counter()
+        toc = await extract_toc_info(server.url(TOC_PATH))
+        elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "chapters": len(toc["chapter_urls"])}
+
+
+async def bench_chapters(stage: str, size: int, options: argparse.Namespace) -> Dict:
+    """Scrapes `size` chapters with one scraper, `options.concurrency` at a time."""
+    scraper, kind = CHAPTER_SCRAPERS[stage]
+    semaphore = asyncio.Semaphore(options.concurrency)
+    with site(size, options, kind) as server:
+        urls = [server.url(chapter_path(n, kind)) for n in range(1, size + 1)]
+        async with BrowserPool(pages_per_browser=options.concurrency) as pool:
+            async def scrape(url: str) -> Optional[dict]:
+                async with semaphore:
+                    try:
+                        return await scraper(url, pool)
+                    except ChapterScrapeError:
+                        return None
+
+            start = time.perf_counter()
+            chapters = await asyncio.gather(*(scrape(url) for url in urls))
+            elapsed = time.perf_counter() - start
+        errors = server.handler.errors
+    return {"seconds": elapsed, "chapters": sum(1 for c in chapters if c and c["content"]),
+            "failed": sum(1 for c in chapters if not c or not c["content"]),
+            "server_errors": errors}
+
+
+def bench_epub(size: int, options: argparse.Namespace) -> Dict:
+    """Times a from-scratch EPUB build of a stored novel."""
+    with tempfile.TemporaryDirectory() as tmp:
+        novel_dir = Path(tmp) / "novel"
+        build_fixture(novel_dir, size, options.paragraphs)
+        start = time.perf_counter()
+        output_path = generate_epub(novel_dir)
+        elapsed = time.perf_counter() - start
+        epub_bytes = output_path.stat().st_size
+    return {"seconds": elapsed, "chapters": size, "epub_bytes": epub_bytes}
+
+
+def bench_pipeline(size: int, options: argparse.Namespace) -> Dict:
+    """
+    Runs `main.py scrape` on the simulator in a scratch directory and returns its wall
+    time together with the stage totals of its run metrics report.
+    """
+    with site(size, options) as server, tempfile.TemporaryDirectory() as tmp:
+        metrics_path = Path(tmp) / DEFAULT_REPORT_NAME
+        command = [
+            sys.executable, str(REPO_ROOT / "main.py"), "scrape", server.url(TOC_PATH),
+            "--method", options.method, "--no-cache", "--rate", "0",
+            "--concurrency", str(options.concurrency),
+            "--min-concurrency", str(options.concurrency),
+            "--max-concurrency", str(options.concurrency),
+            "--metrics-file", str(metrics_path),
+        ]
+        start = time.perf_counter()
+        completed = subprocess.run(command, cwd=tmp, capture_output=True, text=True,
+                                   timeout=PIPELINE_TIMEOUT, check=False)
+        elapsed = time.perf_counter() - start
+        if completed.returncode != 0:
+            # The exception line of the traceback, not Playwright's banner after it
+            lines = [line for line in completed.stderr.splitlines() if "Error" in line]
+            raise RuntimeError(lines[-1] if lines else f"exit {completed.returncode}")
+        report = json.loads(metrics_path.read_text(encoding="utf-8"))
+    return {
+        "seconds": elapsed,
+        "chapters": report["counters"].get("chapters.scraped", 0),
+        "stages": {name: stage["total_s"] for name, stage in report["stages"].items()},
+    }
+
+
+def run_stage(stage: str, size: int, options: argparse.Namespace) -> Dict:
+    """Runs one stage at one size; failures are recorded instead of raised."""
+    print(f"[INFO] Benchmarking {stage} at {size} chapters...")
+    try:
+        if stage == "toc":
+            result = asyncio.run(bench_toc(size, options))
+        elif stage in CHAPTER_SCRAPERS:
+            result = asyncio.run(bench_chapters(stage, size, options))
+        elif stage == "epub":
+            result = bench_epub(size, options)
+        else:
+            result = bench_pipeline(size, options)
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"[WARN] {stage} at {size} chapters failed: {type(e).__name__}: {e}")
+        return {"stage": stage, "size": size, "error": f"{type(e).__name__}: {e}"}
+    result["chapters_per_second"] = result["chapters"] / max(result["seconds"], 1e-9)
+    return {"stage": stage, "size": size, **result}
+
+
+def git_revision() -> Dict:
+    """Commit the suite ran on, and whether the tree had local changes."""
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=False).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD"), "subject": git("log", "-1", "--format=%s"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def save_results(results: List[Dict], options: argparse.Namespace) -> Path:
+    """
+    Writes the run to `benchmarks/results/<date>-<commit>.json`.
+
+    Returns:
+        Path: The results file.
+    """
+    revision = git_revision()
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{revision['commit'][:10] or 'nogit'}"
+    if revision["dirty"]:
+        name += "-dirty"
+    path = RESULTS_DIR / f"{name}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "revision": revision,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                        "processor": platform.processor()},
+            "options": {key: value for key, value in vars(options).items()
+                        if key not in ("compare", "stages", "sizes")},
+            "results": results,
+        }, f, indent=2)
+    return path
+
+
+def print_results(results: List[Dict]) -> None:
+    """Prints one row per stage and size."""
+    print()
+    print(f"{'stage':<11}{'size':>7}{'seconds':>10}{'chapters/s':>12}  note")
+    for row in results:
+        if "error" in row:
+            print(f"{row['stage']:<11}{row['size']:>7}{'-':>10}{'-':>12}  {row['error'][:60]}")
+            continue
+        note = f"{row['failed']} failed" if row.get("failed") else ""
+        print(f"{row['stage']:<11}{row['size']:>7}{row['seconds']:>10.2f}"
+              f"{row['chapters_per_second']:>12.1f}  {note}")
+
+
+def compare(old_path: Path, new_path: Path) -> None:
+    """Prints the change in seconds per stage and size between two result files."""
+    def load(path: Path) -> Dict:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data, {(row["stage"], row["size"]): row for row in data["results"]}
+
+    old, old_rows = load(old_path)
+    new, new_rows = load(new_path)
+    print(f"old: {old['revision']['commit'][:10]} {old['revision']['subject']}")
+    print(f"new: {new['revision']['commit'][:10]} {new['revision']['subject']}")
+    print()
+    print(f"{'stage':<11}{'size':>7}{'old s':>10}{'new s':>10}{'change':>9}")
+    for key in sorted(old_rows.keys() & new_rows.keys(),
+                      key=lambda key: (STAGES.index(key[0]), key[1])):
+        before, after = old_rows[key].get("seconds"), new_rows[key].get("seconds")
+        if before is None or after is None:
+            print(f"{key[0]:<11}{key[1]:>7}{'-':>10}{'-':>10}{'-':>9}")
+            continue
+        print(f"{key[0]:<11}{key[1]:>7}{before:>10.2f}{after:>10.2f}"
+              f"{(after - before) / max(before, 1e-9):>+9.1%}")
+
+
+def main(options: argparse.Namespace) -> None:
+    """
+    Runs the selected stages at every size, prints a table and saves the run.
+    """
+    results = [run_stage(stage, size, options)
+               for stage in options.stages for size in options.sizes]
+    print_results(results)
+    print(f"\n[INFO] Results saved at '{save_results(results, options)}'")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark suite.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--paragraphs", type=int, default=40, help="paragraphs per chapter")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds added to every simulator response")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of chapters whose first request fails")
+    parser.add_argument("--seed", type=int, default=0, help="picks which chapters fail")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--method", default="paragraph", help="chapter method for the pipeline")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("OLD", "NEW"),
+                        help="compare two saved result files instead of running")
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+    else:
+        main(args)
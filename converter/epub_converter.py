@@ -1,10 +1,99 @@
 """
 This module contains the function to convert a structured novel directory into an EPUB file.
+
+The default "streaming" backend writes each chapter's XHTML into the zip as
+soon as its JSON is read and emits the navigation documents and package file
+last, so memory use does not grow with the size of the book. It also records
+a build manifest of chapter hashes next to the EPUB; on the next build the
+unchanged leading chapters are kept as already-compressed zip members and
+only new chapters plus the navigation and package files are written. Images
+that chapters reference in the novel's images/ folder are embedded next to
+the first chapter using them, optionally downscaled and recompressed (this
+needs Pillow). Paragraphs that the novel's boilerplate index finds in too
+many chapters are left out. The "ebooklib" backend builds the whole book in
+memory and is kept for comparison.
+
+`generate_epub_volumes` splits long novels into several EPUBs, each with at
+most a number of chapters or about a compressed size, and each with its own
+cover, nav and NCX. Volumes are built in parallel worker processes. A volume
+manifest records the chapter range of every file, so when new chapters
+arrive only the last volume (and any new ones after it) is rebuilt.
 """
+import hashlib
+import io
 import json
+import multiprocessing
+import os
 import re
+import shutil
+import uuid
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from html import escape
 from pathlib import Path
-from ebooklib import epub
+from typing import Callable, Collection, Dict, List, Optional, Tuple
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from scraper.boilerplate import DEFAULT_THRESHOLD, BoilerplateIndex, strip_boilerplate
+from scraper.chapter_store import ChapterStore, JsonChapterStore, detect_store
+from scraper.manifest import IMAGES_DIR
+from scraper.metrics import METRICS
+
+CONTENT_DIR = "EPUB"
+COMPRESSION_LEVEL = 6
+
+BUILD_MANIFEST_NAME = "epub_build.json"
+# Bump when the archive layout changes so old builds are not extended
+BUILD_FORMAT = 2
+TRAILING_MEMBERS = ("nav.xhtml", "toc.ncx", "content.opf")
+
+VOLUMES_MANIFEST_NAME = "epub_volumes.json"
+VOLUMES_FORMAT = 1
+# Fast deflate compresses a little worse than COMPRESSION_LEVEL, so estimates
+# err on the large side and volumes stay under their byte target
+ESTIMATE_LEVEL = 1
+# Zip headers, XHTML wrapper and nav/NCX/OPF entries of one chapter
+CHAPTER_OVERHEAD_BYTES = 400
+# mimetype, container, cover page and the fixed parts of nav/NCX/OPF
+VOLUME_OVERHEAD_BYTES = 8 * 1024
+LOCAL_IMAGE = re.compile(rf"""src=["']{IMAGES_DIR}/([^"'/]+)["']""")
+
+IMAGE_MEDIA_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+    ".svg": "image/svg+xml",
+}
+# Formats Pillow may resize or re-encode; GIFs may be animated and SVGs are text
+RESIZABLE_IMAGE_TYPES = {".jpg", ".jpeg", ".png", ".webp"}
+DEFAULT_IMAGE_QUALITY = 80
+
+CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="EPUB/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+XHTML_TEMPLATE = """<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="en" xml:lang="en">
+<head><title>{title}</title>{head}</head>
+<body>{body}</body>
+</html>
+"""
+
+COVER_STYLE = ("<style>body { margin: 0; padding: 0; text-align: center; } "
+               "img { max-width: 100%; max-height: 100%; }</style>")
+
 
 def slugify(text: str) -> str:
     """
@@ -15,22 +104,494 @@ def slugify(text: str) -> str:
     text = re.sub(r"[\s_-]+", "-", text).strip("-")
     return text
 
-def generate_epub(novel_dir: Path) -> Path:
-    metadata_path = novel_dir / "metadata.json"
-    chapters_dir = novel_dir / "chapters"
+
+def to_xhtml(content: str,
+             resolve_image: Optional[Callable[[str], Optional[str]]] = None) -> str:
+    """
+    Re-serializes scraped chapter HTML as well-formed XHTML. Scraped markup
+    is often loose (unclosed tags, bare ampersands), which EPUB readers reject.
+
+    `resolve_image` maps each <img> src to its path inside the EPUB; images
+    it returns None for are dropped. Without it every image is dropped,
+    since readers cannot load remote images.
+    """
+    if not content.strip():
+        return ""
+    wrapper = lxml_html.fragment_fromstring(content, create_parent="div")
+    for img in list(wrapper.iter("img")):
+        src = resolve_image(img.get("src", "")) if resolve_image else None
+        if src is None:
+            parent = img.getparent()
+            img.drop_tree()
+            # Do not leave behind the empty paragraph that only held the image
+            if parent is not wrapper and not len(parent) and not (parent.text or "").strip():
+                parent.drop_tree()
+        else:
+            img.set("src", src)
+            img.set("alt", img.get("alt", ""))
+    parts = [escape(wrapper.text, quote=False)] if wrapper.text else []
+    parts.extend(etree.tostring(child, encoding="unicode", method="xml") for child in wrapper)
+    return "".join(parts)
+
+
+def chapter_store(novel_dir: Path) -> ChapterStore:
+    """The novel's chapter store, opened read-only, whichever backend it uses."""
+    return detect_store(novel_dir, read_only=True) or JsonChapterStore(novel_dir, read_only=True)
+
+
+def chapter_stem(number: int) -> str:
+    """Base name of a chapter's XHTML file inside the EPUB."""
+    return f"{number:03}"
+
+
+@lru_cache(maxsize=None)
+def _pillow():
+    """Pillow's Image module, or None (warning once) when it is not installed."""
+    try:
+        # Optional dependency, only needed when images are shrunk
+        from PIL import Image  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        print("[WARN] Pillow is not installed; embedding images unchanged.")
+        return None
+    return Image
+
+
+def shrink_image(path: Path, max_size: int = 0,
+                 quality: Optional[int] = None) -> Tuple[bytes, str]:
+    """
+    Downscales an image so neither side exceeds `max_size` pixels (0 keeps
+    the size) and re-encodes it at JPEG/WebP `quality`. Images with
+    transparency stay PNG. The original is returned when it is not a
+    resizable format, Pillow is missing, or re-encoding would not help.
+
+    Returns:
+        tuple: (image bytes, file extension)
+    """
+    original = path.read_bytes(), path.suffix.lower()
+    if path.suffix.lower() not in RESIZABLE_IMAGE_TYPES or not (max_size or quality):
+        return original
+    pillow = _pillow()
+    if pillow is None:
+        return original
+
+    try:
+        with pillow.open(path) as image:
+            resized = bool(max_size) and max(image.size) > max_size
+            if resized:
+                image.thumbnail((max_size, max_size))
+            transparent = "A" in image.getbands() or "transparency" in image.info
+            buffer = io.BytesIO()
+            if transparent:
+                image.save(buffer, "PNG", optimize=True)
+                ext = ".png"
+            else:
+                image.convert("RGB").save(buffer, "JPEG", optimize=True,
+                                          quality=quality or DEFAULT_IMAGE_QUALITY)
+                ext = ".jpg"
+    except OSError as e:
+        print(f"[WARN] Cannot process image {path.name}: {e}")
+        return original
+    data = buffer.getvalue()
+    return (data, ext) if resized or len(data) < len(original[0]) else original
+
+
+def file_digest(data: bytes) -> str:
+    """Hash used by the build manifest to detect changed inputs."""
+    return hashlib.sha1(data).hexdigest()
+
+
+def chapter_digest(chapter: Dict) -> str:
+    """Hash of a stored chapter record, independent of the store backend."""
+    return file_digest(json.dumps(chapter, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+
+
+class StreamingEpubWriter:
+    """
+    Writes an EPUB 3 file one member at a time.
+
+    Chapters are compressed into the archive as they are added; only their
+    file names and titles are kept until `finish` writes the nav document,
+    the NCX and the OPF package file at the end of the archive.
+
+    Given a `previous` build manifest, the existing EPUB is extended instead:
+    its first `keep` chapters (and cover) are reused byte for byte and
+    everything after them is replaced.
+
+    Usage:
+        with StreamingEpubWriter(path, title, identifier) as writer:
+            writer.add_cover(cover_path)
+            writer.add_chapter("001", "Chapter 1", "<p>...</p>")
+    """
+
+    def __init__(self, output_path: Path, title: str, identifier: str,
+                 author: str = "Unknown", language: str = "en",
+                 previous: Optional[Dict] = None, keep: int = 0,
+                 images_dir: Optional[Path] = None, max_image_size: int = 0,
+                 image_quality: Optional[int] = None):
+        self.output_path = Path(output_path)
+        self.title = title
+        self.identifier = identifier
+        self.author = author
+        self.language = language
+        self.images_dir = images_dir
+        self.max_image_size = max_image_size
+        self.image_quality = image_quality
+
+        self.chapters: List[Dict] = []
+        self.cover: Optional[Dict[str, str]] = None
+        # Embedded images by source file name, and those added by the current chapter
+        self.images: Dict[str, Dict[str, str]] = {}
+        self._new_images: List[Dict[str, str]] = []
+        self._tmp_path = self.output_path.with_name(self.output_path.name + ".tmp")
+        if previous is None:
+            self._zip = zipfile.ZipFile(self._tmp_path, "w", compression=zipfile.ZIP_DEFLATED,
+                                        compresslevel=COMPRESSION_LEVEL)
+            # The mimetype must be the first member and stored uncompressed
+            self._zip.writestr("mimetype", "application/epub+zip",
+                               compress_type=zipfile.ZIP_STORED)
+            self._zip.writestr("META-INF/container.xml", CONTAINER_XML)
+        else:
+            self._zip = self._reopen(previous, keep)
+
+    def _reopen(self, previous: Dict, keep: int) -> zipfile.ZipFile:
+        """
+        Copies the existing EPUB and truncates the copy just before the first
+        member that will be rewritten, keeping the central directory entries
+        of everything before it.
+        """
+        shutil.copyfile(self.output_path, self._tmp_path)
+        archive = zipfile.ZipFile(self._tmp_path, "a", compression=zipfile.ZIP_DEFLATED,
+                                  compresslevel=COMPRESSION_LEVEL)
+        try:
+            dropped = previous["chapters"][keep:]
+            replaced = {f"{CONTENT_DIR}/{c['file']}" for c in dropped}
+            # Images are written just before the first chapter using them
+            replaced.update(f"{CONTENT_DIR}/{image['file']}"
+                            for c in dropped for image in c.get("images", []))
+            replaced.update(f"{CONTENT_DIR}/{name}" for name in TRAILING_MEMBERS)
+            cut = min(archive.getinfo(name).header_offset for name in replaced)
+            kept = [info for info in archive.infolist() if info.header_offset < cut]
+            if any(info.filename in replaced for info in kept):
+                raise ValueError("replaced members are not at the end of the archive")
+
+            # New members overwrite the dropped ones; closing the archive writes
+            # the central directory after them and truncates the rest
+            archive.filelist = kept
+            archive.NameToInfo = {info.filename: info for info in kept}
+            archive.start_dir = cut
+            archive.fp.seek(cut)
+        except Exception:
+            archive.close()
+            self._tmp_path.unlink(missing_ok=True)
+            raise
+
+        self.chapters = list(previous["chapters"][:keep])
+        self.cover = previous.get("cover")
+        self.images = {image["source"]: image
+                       for c in self.chapters for image in c.get("images", [])}
+        return archive
+
+    def __enter__(self) -> "StreamingEpubWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.finish()
+        else:
+            self.abort()
+
+    def add_cover(self, cover_path: Path) -> None:
+        """
+        Adds the cover image and a cover page shown before the first chapter.
+        """
+        ext = cover_path.suffix.lower()
+        image_name = f"cover{ext}"
+        self._zip.write(cover_path, f"{CONTENT_DIR}/{image_name}")
+        body = f'<img src="{image_name}" alt="{escape(self.title)}"/>'
+        self._zip.writestr(f"{CONTENT_DIR}/cover.xhtml", XHTML_TEMPLATE.format(
+            title="Cover", head=COVER_STYLE, body=body))
+        self.cover = {"image": image_name,
+                      "media_type": IMAGE_MEDIA_TYPES.get(ext, "image/jpeg")}
+
+    def add_chapter(self, stem: str, title: str, content: str, digest: str = "") -> None:
+        """
+        Compresses one chapter into the archive as `<stem>.xhtml`. `digest`
+        identifies the source file in the build manifest.
+        """
+        with METRICS.stage("epub.convert"):
+            body = (f"<h1>{escape(title, quote=False)}</h1>\n"
+                    f"{to_xhtml(content, self._embed_image)}")
+        file_name = f"{stem}.xhtml"
+        with METRICS.stage("epub.compress"):
+            self._zip.writestr(f"{CONTENT_DIR}/{file_name}", XHTML_TEMPLATE.format(
+                title=escape(title, quote=False), head="", body=body))
+        self.chapters.append({"id": f"chapter_{stem}", "file": file_name, "title": title,
+                              "hash": digest, "images": self._new_images})
+        self._new_images = []
+
+    def _embed_image(self, src: str) -> Optional[str]:
+        """
+        Writes a downloaded chapter image into the archive on first use.
+
+        Returns:
+            str | None: Its path relative to the chapter, or None if `src` is
+                not an image of the novel's images folder.
+        """
+        prefix = f"{IMAGES_DIR}/"
+        if self.images_dir is None or not src.startswith(prefix):
+            return None
+        source = src[len(prefix):]
+        if source not in self.images:
+            path = self.images_dir / source
+            if "/" in source or not path.is_file():
+                return None
+            with METRICS.stage("epub.image"):
+                data, ext = shrink_image(path, self.max_image_size, self.image_quality)
+                file_name = f"{IMAGES_DIR}/{Path(source).stem}{ext}"
+                # Already-compressed formats gain nothing from deflate
+                self._zip.writestr(f"{CONTENT_DIR}/{file_name}", data,
+                                   compress_type=(zipfile.ZIP_DEFLATED if ext == ".svg"
+                                                  else zipfile.ZIP_STORED))
+            image = {"id": f"image_{len(self.images) + 1}", "source": source,
+                     "file": file_name, "media_type": IMAGE_MEDIA_TYPES[ext]}
+            self.images[source] = image
+            self._new_images.append(image)
+        return self.images[source]["file"]
+
+    def _nav_xhtml(self) -> str:
+        items = "\n".join(
+            f'<li><a href="{c["file"]}">{escape(c["title"], quote=False)}</a></li>'
+            for c in self.chapters
+        )
+        body = (f'<nav epub:type="toc" id="toc"><h2>{escape(self.title, quote=False)}</h2>'
+                f"<ol>\n{items}\n</ol></nav>")
+        return XHTML_TEMPLATE.format(title=escape(self.title, quote=False), head="", body=body)
+
+    def _toc_ncx(self) -> str:
+        points = "\n".join(
+            f'<navPoint id="{c["id"]}" playOrder="{n}"><navLabel><text>'
+            f'{escape(c["title"], quote=False)}</text></navLabel>'
+            f'<content src="{c["file"]}"/></navPoint>'
+            for n, c in enumerate(self.chapters, start=1)
+        )
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">\n'
+            f'<head><meta name="dtb:uid" content="{escape(self.identifier)}"/>'
+            '<meta name="dtb:depth" content="1"/></head>\n'
+            f"<docTitle><text>{escape(self.title, quote=False)}</text></docTitle>\n"
+            f"<navMap>\n{points}\n</navMap>\n</ncx>\n"
+        )
+
+    def _content_opf(self) -> str:
+        manifest = ['<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" '
+                    'properties="nav"/>',
+                    '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>']
+        spine = []
+        cover_meta = ""
+        if self.cover:
+            manifest.append(f'<item id="cover-img" href="{self.cover["image"]}" '
+                            f'media-type="{self.cover["media_type"]}" properties="cover-image"/>')
+            manifest.append('<item id="cover" href="cover.xhtml" '
+                            'media-type="application/xhtml+xml"/>')
+            spine.append('<itemref idref="cover" linear="no"/>')
+            cover_meta = '<meta name="cover" content="cover-img"/>'
+        spine.append('<itemref idref="nav"/>')
+        for c in self.chapters:
+            manifest.append(f'<item id="{c["id"]}" href="{c["file"]}" '
+                            'media-type="application/xhtml+xml"/>')
+            spine.append(f'<itemref idref="{c["id"]}"/>')
+        for image in self.images.values():
+            manifest.append(f'<item id="{image["id"]}" href="{image["file"]}" '
+                            f'media-type="{image["media_type"]}"/>')
+
+        modified = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" '
+            'unique-identifier="id" xml:lang="en">\n'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+            f'<dc:identifier id="id">{escape(self.identifier, quote=False)}</dc:identifier>\n'
+            f"<dc:title>{escape(self.title, quote=False)}</dc:title>\n"
+            f"<dc:language>{self.language}</dc:language>\n"
+            f"<dc:creator>{escape(self.author, quote=False)}</dc:creator>\n"
+            f'<meta property="dcterms:modified">{modified}</meta>\n{cover_meta}\n'
+            "</metadata>\n"
+            "<manifest>\n" + "\n".join(manifest) + "\n</manifest>\n"
+            '<spine toc="ncx">\n' + "\n".join(spine) + "\n</spine>\n"
+            "</package>\n"
+        )
+
+    def finish(self) -> Path:
+        """
+        Writes the navigation and package documents, closes the archive and
+        moves it into place.
+        """
+        with METRICS.stage("epub.finish"):
+            self._zip.writestr(f"{CONTENT_DIR}/nav.xhtml", self._nav_xhtml())
+            self._zip.writestr(f"{CONTENT_DIR}/toc.ncx", self._toc_ncx())
+            self._zip.writestr(f"{CONTENT_DIR}/content.opf", self._content_opf())
+            self._zip.close()
+            os.replace(self._tmp_path, self.output_path)
+        return self.output_path
+
+    def abort(self) -> None:
+        """Discards the partially written archive."""
+        self._zip.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+def load_build_manifest(novel_dir: Path, output_path: Path, fingerprint: str) -> Optional[Dict]:
+    """
+    Returns the manifest of the previous streaming build if the EPUB it
+    describes still exists and was built from the same metadata and cover.
+    """
+    try:
+        with open(novel_dir / BUILD_MANIFEST_NAME, "r", encoding="utf-8") as f:
+            build = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (build.get("format") != BUILD_FORMAT or build.get("fingerprint") != fingerprint
+            or build.get("epub") != output_path.name or not output_path.exists()):
+        return None
+    return build
+
+
+def save_build_manifest(novel_dir: Path, output_path: Path, fingerprint: str,
+                        writer: StreamingEpubWriter) -> None:
+    """Atomically records what the EPUB at `output_path` was built from."""
+    build = {
+        "format": BUILD_FORMAT,
+        "epub": output_path.name,
+        "fingerprint": fingerprint,
+        "cover": writer.cover,
+        "chapters": writer.chapters,
+    }
+    manifest_path = novel_dir / BUILD_MANIFEST_NAME
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(build, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def remove_volumes(novel_dir: Path) -> None:
+    """
+    Deletes the volume EPUBs of an earlier `generate_epub_volumes` build and
+    their manifest, so they are not left next to a single-file EPUB.
+    """
+    previous = load_volumes_manifest(novel_dir)
+    for volume in (previous or {"volumes": []})["volumes"]:
+        path = novel_dir / volume["file"]
+        if path.exists():
+            print(f"[INFO] Removing volume from an earlier build: {path.name}")
+            path.unlink()
+    (novel_dir / VOLUMES_MANIFEST_NAME).unlink(missing_ok=True)
+
+
+def remove_single_epub(novel_dir: Path, slug: str) -> None:
+    """
+    Deletes the single-file EPUB of an earlier `generate_epub` build and its
+    build manifest, so they are not left next to the volumes.
+    """
+    path = novel_dir / f"{slug}.epub"
+    if path.exists():
+        print(f"[INFO] Removing single-file EPUB from an earlier build: {path.name}")
+        path.unlink()
+    (novel_dir / BUILD_MANIFEST_NAME).unlink(missing_ok=True)
+
+
+def book_identity(novel_dir: Path, metadata: Dict, max_image_size: int = 0,
+                  image_quality: Optional[int] = None,
+                  boilerplate: str = "") -> Tuple[str, str, Optional[Path], str]:
+    """
+    Identifier, author and cover of a novel, plus a fingerprint of
+    everything besides the chapters that goes into its EPUB. `boilerplate`
+    is the `BoilerplateIndex.signature()` of the paragraphs left out.
+
+    Returns:
+        tuple: (identifier, author, cover path or None, fingerprint)
+    """
     cover_path = next(novel_dir.glob("cover.*"), None)
+    # A stable fallback identifier keeps the build fingerprint stable too
+    identifier = (metadata.get("source")
+                  or f"urn:uuid:{uuid.uuid5(uuid.NAMESPACE_URL, metadata['title'])}")
+    author = metadata.get("author", "Unknown")
+    fingerprint = file_digest(json.dumps([
+        metadata["title"], identifier, author,
+        cover_path.name if cover_path else None,
+        file_digest(cover_path.read_bytes()) if cover_path else None,
+        max_image_size, image_quality, boilerplate,
+    ]).encode("utf-8"))
+    return identifier, author, cover_path, fingerprint
 
-    # Load metadata
-    with open(metadata_path, "r", encoding="utf-8") as f:
-        metadata = json.load(f)
 
-    title = metadata["title"]
-    safe_title = slugify(title)
-    output_path = novel_dir / f"{safe_title}.epub"
+def _write_streaming(novel_dir: Path, metadata: Dict, output_path: Path,
+                     max_image_size: int = 0, image_quality: Optional[int] = None,
+                     boilerplate_threshold: float = DEFAULT_THRESHOLD) -> None:
+    images = {"images_dir": novel_dir / IMAGES_DIR, "max_image_size": max_image_size,
+              "image_quality": image_quality}
+    index = BoilerplateIndex.load(novel_dir, boilerplate_threshold)
+
+    with chapter_store(novel_dir) as store:
+        # First pass: hashes only, one chapter in memory at a time
+        with METRICS.stage("epub.hash"):
+            sources = [(chapter["number"], chapter_digest(chapter))
+                       for chapter in index.catch_up(store.iter_chapters())]
+        boilerplate = index.boilerplate()
+        # A changed boilerplate set changes every chapter, so it is part of the fingerprint
+        identifier, author, cover_path, fingerprint = book_identity(
+            novel_dir, metadata, max_image_size, image_quality, index.signature())
+
+        # Reuse the longest run of leading chapters that has not changed
+        previous = load_build_manifest(novel_dir, output_path, fingerprint)
+        keep = 0
+        if previous:
+            for built, (number, digest) in zip(previous["chapters"], sources):
+                if built["file"] != f"{chapter_stem(number)}.xhtml" or built["hash"] != digest:
+                    break
+                keep += 1
+            if keep == len(sources) == len(previous["chapters"]):
+                print(f"[INFO] EPUB is up to date ({keep} chapters).")
+                return
+
+        writer = None
+        if keep:
+            try:
+                writer = StreamingEpubWriter(output_path, metadata["title"], identifier, author,
+                                             previous=previous, keep=keep, **images)
+                print(f"[INFO] Reusing {keep} built chapter(s), "
+                      f"writing {len(sources) - keep} new or changed.")
+            except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+                print(f"[WARN] Cannot extend the existing EPUB ({e}); rebuilding it.")
+                keep = 0
+        if writer is None:
+            writer = StreamingEpubWriter(output_path, metadata["title"], identifier, author,
+                                         **images)
+            if cover_path:
+                writer.add_cover(cover_path)
+
+        # Second pass: stream the chapters that are not in the EPUB yet
+        with writer:
+            if keep < len(sources):
+                new_chapters = store.iter_chapters(start=sources[keep][0])
+                for chapter, (_, digest) in zip(new_chapters, sources[keep:]):
+                    writer.add_chapter(chapter_stem(chapter["number"]), chapter["title"],
+                                       strip_boilerplate(chapter["content"], boilerplate),
+                                       digest)
+    save_build_manifest(novel_dir, output_path, fingerprint, writer)
+
+
+def _write_ebooklib(novel_dir: Path, metadata: Dict, output_path: Path,
+                    boilerplate_threshold: float = DEFAULT_THRESHOLD, **_image_options) -> None:
+    # Chapter images are not embedded by this backend
+    # Imported here so the streaming backend does not need ebooklib installed
+    from ebooklib import epub  # pylint: disable=import-outside-toplevel
+
+    cover_path = next(novel_dir.glob("cover.*"), None)
 
     book = epub.EpubBook()
     book.set_identifier(metadata.get("source", "unknown"))
-    book.set_title(title)
+    book.set_title(metadata["title"])
     book.set_language("en")
     book.add_author(metadata.get("author", "Unknown"))
 
@@ -42,24 +603,22 @@ def generate_epub(novel_dir: Path) -> Path:
     spine = ['nav']
     toc = []
 
-    chapter_files = sorted(
-        chapters_dir.glob("*.json"),
-        key=lambda f: int(f.stem)
-    )
-
-    for file in chapter_files:
-        with open(file, "r", encoding="utf-8") as f:
-            chapter = json.load(f)
-
-        chap = epub.EpubHtml(
-            title=chapter["title"],
-            file_name=f"{file.stem}.xhtml",
-            lang="en"
-        )
-        chap.content = f"<h1>{chapter['title']}</h1>\n{chapter['content']}"
-        book.add_item(chap)
-        toc.append(chap)
-        spine.append(chap)
+    index = BoilerplateIndex.load(novel_dir, boilerplate_threshold)
+    with chapter_store(novel_dir) as store:
+        for _ in index.catch_up(store.iter_chapters()):
+            pass
+        boilerplate = index.boilerplate()
+        for chapter in store.iter_chapters():
+            chap = epub.EpubHtml(
+                title=chapter["title"],
+                file_name=f"{chapter_stem(chapter['number'])}.xhtml",
+                lang="en"
+            )
+            content = strip_boilerplate(chapter["content"], boilerplate)
+            chap.content = f"<h1>{chapter['title']}</h1>\n{content}"
+            book.add_item(chap)
+            toc.append(chap)
+            spine.append(chap)
 
     book.toc = tuple(toc)
     book.spine = spine
@@ -67,5 +626,267 @@ def generate_epub(novel_dir: Path) -> Path:
     book.add_item(epub.EpubNav())
 
     epub.write_epub(str(output_path), book)
+
+
+EPUB_BACKENDS = {
+    "streaming": _write_streaming,
+    "ebooklib": _write_ebooklib,
+}
+
+
+def generate_epub(novel_dir: Path, backend: str = "streaming", max_image_size: int = 0,
+                  image_quality: Optional[int] = None,
+                  boilerplate_threshold: float = DEFAULT_THRESHOLD) -> Path:
+    """
+    Builds `<slug>.epub` in `novel_dir` from its metadata, cover and chapters.
+    Volumes of an earlier `generate_epub_volumes` build are removed.
+
+    Args:
+        novel_dir (Path): Novel folder containing metadata.json and chapters/.
+        backend (str): "streaming" (constant memory) or "ebooklib".
+        max_image_size (int): Downscale chapter images so neither side
+            exceeds this many pixels; 0 keeps their size. Needs Pillow.
+        image_quality (int, optional): Re-encode chapter images as JPEG at
+            this quality when that makes them smaller. Needs Pillow.
+        boilerplate_threshold (float): Leave out paragraphs found in more
+            than this fraction of the chapters; 0 keeps everything.
+
+    Returns:
+        Path: The written EPUB file.
+    """
+    metadata_path = novel_dir / "metadata.json"
+
+    # Load metadata
+    with open(metadata_path, "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+
+    output_path = novel_dir / f"{slugify(metadata['title'])}.epub"
+    with METRICS.stage("epub.build"):
+        EPUB_BACKENDS[backend](novel_dir, metadata, output_path,
+                               max_image_size=max_image_size, image_quality=image_quality,
+                               boilerplate_threshold=boilerplate_threshold)
+    remove_volumes(novel_dir)
     print(f"[INFO] EPUB written to: {output_path}")
     return output_path
+
+
+def estimate_chapter_bytes(chapter: Dict, images_dir: Path) -> int:
+    """
+    Upper estimate of what a chapter adds to a compressed EPUB: its text
+    deflated quickly, the local images it references and fixed overhead.
+    """
+    size = len(zlib.compress(f"{chapter['title']}\n{chapter['content']}".encode("utf-8"),
+                             ESTIMATE_LEVEL)) + CHAPTER_OVERHEAD_BYTES
+    for name in set(LOCAL_IMAGE.findall(chapter["content"])):
+        path = images_dir / name
+        if path.is_file():
+            size += path.stat().st_size
+    return size
+
+
+def split_volumes(chapters: List[list], max_chapters: int = 0, budget: int = 0) -> List[List[list]]:
+    """
+    Cuts [number, digest, estimate] chapters into consecutive volumes of at
+    most `max_chapters` chapters and `budget` estimated bytes (0 for no
+    limit). A chapter larger than the budget gets a volume of its own.
+    """
+    volumes = []
+    current: List[list] = []
+    size = 0
+    for chapter in chapters:
+        full = ((max_chapters and len(current) >= max_chapters)
+                or (budget and size + chapter[2] > budget))
+        if current and full:
+            volumes.append(current)
+            current, size = [], 0
+        current.append(chapter)
+        size += chapter[2]
+    if current:
+        volumes.append(current)
+    return volumes
+
+
+def load_volumes_manifest(novel_dir: Path) -> Optional[Dict]:
+    """Returns the manifest of the previous volume build, if there is one."""
+    try:
+        with open(novel_dir / VOLUMES_MANIFEST_NAME, "r", encoding="utf-8") as f:
+            build = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return build if build.get("format") == VOLUMES_FORMAT else None
+
+
+def plan_volumes(chapters: List[list], previous: Optional[Dict], slug: str,
+                 max_chapters: int, budget: int) -> List[Dict]:
+    """
+    Assigns chapters to volumes. Every volume of the previous build but the
+    last keeps its chapter range as long as the same chapter numbers are
+    still there, so new chapters never shift earlier volumes; the remaining
+    chapters are split afresh, starting with the previous last volume.
+
+    Returns:
+        List[Dict]: {"number", "file", "first", "last", "chapters"} per volume.
+    """
+    ranges = []
+    position = 0
+    for volume in (previous or {"volumes": []})["volumes"][:-1]:
+        numbers = [chapter[0] for chapter in volume["chapters"]]
+        if [chapter[0] for chapter in chapters[position:position + len(numbers)]] != numbers:
+            break
+        ranges.append(chapters[position:position + len(numbers)])
+        position += len(numbers)
+    ranges.extend(split_volumes(chapters[position:], max_chapters, budget))
+
+    return [{"number": number, "file": f"{slug}-vol-{number:03}.epub",
+             "first": volume[0][0], "last": volume[-1][0], "chapters": volume}
+            for number, volume in enumerate(ranges, start=1)]
+
+
+def write_volume(novel_dir: Path, metadata: Dict, volume: Dict, image_options: Dict,
+                 boilerplate: Collection[str] = ()) -> int:
+    """
+    Writes one volume from scratch, leaving out the `boilerplate` paragraphs.
+
+    Returns:
+        int: Size of the written file in bytes.
+    """
+    identifier, author, cover_path, _ = book_identity(novel_dir, metadata, **image_options)
+    title = f"{metadata['title']} - Volume {volume['number']}"
+    output_path = novel_dir / volume["file"]
+    digests = {number: digest for number, digest, _ in volume["chapters"]}
+
+    with METRICS.stage("epub.volume"):
+        # The parent closed the store before starting workers, so they only read it
+        with chapter_store(novel_dir) as store:
+            with StreamingEpubWriter(output_path, title,
+                                     f"{identifier}#volume-{volume['number']}", author,
+                                     images_dir=novel_dir / IMAGES_DIR,
+                                     **image_options) as writer:
+                if cover_path:
+                    writer.add_cover(cover_path)
+                for chapter in store.iter_chapters(start=volume["first"]):
+                    if chapter["number"] > volume["last"]:
+                        break
+                    writer.add_chapter(chapter_stem(chapter["number"]), chapter["title"],
+                                       strip_boilerplate(chapter["content"], boilerplate),
+                                       digests.get(chapter["number"], ""))
+    return output_path.stat().st_size
+
+
+def build_volume(novel_dir: str, metadata: Dict, volume: Dict, image_options: Dict,
+                 boilerplate: List[str]) -> Dict:
+    """
+    Worker process entry point: writes one volume.
+
+    Returns:
+        dict: { "bytes": size of the written file,
+                "metrics": this process' `RunMetrics.snapshot()` }
+    """
+    METRICS.reset()
+    size = write_volume(Path(novel_dir), metadata, volume, image_options, set(boilerplate))
+    return {"bytes": size, "metrics": METRICS.snapshot()}
+
+
+def generate_epub_volumes(novel_dir: Path, max_chapters: int = 0, max_bytes: int = 0,
+                          workers: Optional[int] = None, max_image_size: int = 0,
+                          image_quality: Optional[int] = None,
+                          boilerplate_threshold: float = DEFAULT_THRESHOLD) -> List[Path]:
+    """
+    Builds the novel as `<slug>-vol-NNN.epub` volumes of at most
+    `max_chapters` chapters and about `max_bytes` compressed bytes each.
+    Volumes whose chapters did not change since the last build are kept;
+    the others are built in up to `workers` processes. The EPUB of an
+    earlier single-file `generate_epub` build is removed.
+
+    Args:
+        novel_dir (Path): Novel folder containing metadata.json and chapters.
+        max_chapters (int): Chapters per volume, 0 for no limit.
+        max_bytes (int): Target EPUB size per volume, 0 for no limit.
+        workers (int, optional): Worker processes; defaults to the CPU count.
+        max_image_size (int): See `generate_epub`.
+        image_quality (int, optional): See `generate_epub`.
+        boilerplate_threshold (float): See `generate_epub`.
+
+    Returns:
+        List[Path]: Every volume file, in order.
+    """
+    if not max_chapters and not max_bytes:
+        raise ValueError("volumes need a chapter or byte limit")
+    with open(novel_dir / "metadata.json", "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    image_options = {"max_image_size": max_image_size, "image_quality": image_quality}
+    split = {"chapters": max_chapters, "bytes": max_bytes}
+    previous = load_volumes_manifest(novel_dir)
+    index = BoilerplateIndex.load(novel_dir, boilerplate_threshold)
+
+    # Size estimates of unchanged chapters are reused instead of recompressed
+    estimates = {(number, digest): estimate
+                 for volume in (previous or {"volumes": []})["volumes"]
+                 for number, digest, estimate in volume["chapters"]}
+    chapters = []
+    with METRICS.stage("epub.hash"), chapter_store(novel_dir) as store:
+        for chapter in index.catch_up(store.iter_chapters()):
+            digest = chapter_digest(chapter)
+            estimate = estimates.get((chapter["number"], digest))
+            if estimate is None:
+                estimate = (estimate_chapter_bytes(chapter, novel_dir / IMAGES_DIR)
+                            if max_bytes else 0)
+            chapters.append([chapter["number"], digest, estimate])
+    boilerplate = sorted(index.boilerplate())
+    _, _, cover_path, fingerprint = book_identity(novel_dir, metadata, **image_options,
+                                                  boilerplate=index.signature())
+    # Other metadata, cover or split settings invalidate every previous volume
+    if previous and (previous.get("fingerprint") != fingerprint
+                     or previous.get("split") != split):
+        previous = None
+
+    budget = 0
+    if max_bytes:
+        cover_bytes = cover_path.stat().st_size if cover_path else 0
+        budget = max(1, max_bytes - VOLUME_OVERHEAD_BYTES - cover_bytes)
+    volumes = plan_volumes(chapters, previous, slugify(metadata["title"]), max_chapters, budget)
+
+    built = {volume["number"]: volume for volume in (previous or {"volumes": []})["volumes"]}
+    stale = [volume for volume in volumes
+             if built.get(volume["number"], {}).get("chapters") != volume["chapters"]
+             or not (novel_dir / volume["file"]).exists()]
+    for volume in volumes:
+        if volume not in stale:
+            volume["bytes"] = built[volume["number"]]["bytes"]
+    print(f"[INFO] {len(volumes)} volume(s), {len(volumes) - len(stale)} up to date, "
+          f"building {len(stale)}.")
+
+    # A single volume is not worth starting a process for
+    workers = min(workers or os.cpu_count() or 1, len(stale))
+    if workers <= 1:
+        for volume in stale:
+            volume["bytes"] = write_volume(novel_dir, metadata, volume, image_options,
+                                           set(boilerplate))
+    else:
+        # Like chapter shards, workers start from scratch instead of forking
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            results = executor.map(build_volume, [str(novel_dir)] * len(stale),
+                                   [metadata] * len(stale), stale,
+                                   [image_options] * len(stale), [boilerplate] * len(stale))
+            for volume, result in zip(stale, results):
+                volume["bytes"] = result["bytes"]
+                METRICS.merge(result["metrics"])
+
+    # Volumes past the new last one (e.g. after chapters were removed)
+    for number, volume in built.items():
+        if number > len(volumes):
+            (novel_dir / volume["file"]).unlink(missing_ok=True)
+
+    manifest_path = novel_dir / VOLUMES_MANIFEST_NAME
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"format": VOLUMES_FORMAT, "fingerprint": fingerprint, "split": split,
+                   "volumes": volumes}, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+    remove_single_epub(novel_dir, slugify(metadata["title"]))
+
+    for volume in volumes:
+        print(f"[INFO] {volume['file']}: chapters {volume['first']}-{volume['last']}, "
+              f"{volume['bytes'] / 1024 / 1024:.1f} MiB")
+    return [novel_dir / volume["file"] for volume in volumes]
@@ -1,93 +1,437 @@
 """
-This program scrapes a given URL (a web novel) for all its novel chapters
-and stores them in JSON format, ready for conversion.
+Command line interface of WebToNovel:
+
+    python main.py scrape URL [URL ...]       download novels and build their EPUBs
+    python main.py update [NOVEL_DIR ...]     fetch new chapters of downloaded novels
+    python main.py watch [NOVEL_DIR ...]      poll downloaded novels for new chapters
+    python main.py convert [NOVEL_DIR ...]    rebuild EPUBs from the stored chapters
+    python main.py status [NOVEL_DIR ...]     show what is stored, without a browser
+
+Without NOVEL_DIRs, update, watch, convert and status work on every novel under
+--output-dir. Each subcommand imports only the parts of the package it
+uses, and only the chosen subcommand's arguments are registered (the scrape
+defaults live in modules that load Playwright), so convert and status start
+without paying for the browser and HTTP stacks.
 """
-import os
+import argparse
 import json
-import re
-import asyncio
+import sys
 from pathlib import Path
-from scraper.orchestrator import scrape_all_chapters
-from scraper.image_utils import download_image
-from converter.epub_converter import generate_epub
+from typing import Dict, List, Optional, Tuple
 
-TOC_URL = "https://novgo.net/lord-of-the-mysteries.html"
-CHAPTERS_SUBDIR = "chapters"
 OUTPUT_DIR = Path("output")
 
-def slugify(text: str) -> str:
+
+def add_output_argument(parser: argparse.ArgumentParser) -> None:
+    """--output-dir, shared by every subcommand."""
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR,
+                        help=f"directory holding one folder per novel (default: {OUTPUT_DIR})")
+
+
+def add_novel_dirs_argument(parser: argparse.ArgumentParser) -> None:
+    """Optional novel folders, given as paths or as names under --output-dir."""
+    parser.add_argument("novel_dirs", nargs="*", type=Path, metavar="NOVEL_DIR",
+                        help="novel folders (default: every novel under --output-dir)")
+
+
+def add_scrape_arguments(parser: argparse.ArgumentParser) -> None:
     """
-    Creates a safe folder name from a string.
+    Overrides for the scheduler, response cache, chapter store, request
+    blocking, run metrics and batch mode, shared by scrape and update.
     """
-    text = text.lower()
-    text = re.sub(r"[^\w\s-]", "", text)
-    text = re.sub(r"[\s_-]+", "-", text).strip("-")
-    return text
+    # pylint: disable=import-outside-toplevel
+    from scraper.batch import DEFAULT_ACTIVE_NOVELS, DEFAULT_PROGRESS_INTERVAL, DEFAULT_WORKERS
+    from scraper.chapter_store import DEFAULT_STORE, STORE_BACKENDS
+    from scraper.metrics import DEFAULT_PROGRESS_INTERVAL as DEFAULT_METRICS_INTERVAL
+    from scraper.orchestrator import SCRAPER_MAP
+    from scraper.response_cache import DEFAULT_CACHE_DIR, DEFAULT_TTL_SECONDS
+    from scraper.scheduler import SchedulerConfig
+    from scraper.site_profiles import DEFAULT_PROFILES_PATH
 
-def ensure_dirs(base_dir: str) -> str:
-    """
-    Ensures the output directory exists.
+    defaults = SchedulerConfig()
+    add_output_argument(parser)
+    parser.add_argument("--method", choices=list(SCRAPER_MAP),
+                        help="how chapters are scraped")
+    parser.add_argument("--concurrency", type=int, default=defaults.initial_concurrency,
+                        help="initial concurrent chapters per host")
+    parser.add_argument("--min-concurrency", type=int, default=defaults.min_concurrency)
+    parser.add_argument("--max-concurrency", type=int, default=defaults.max_concurrency)
+    parser.add_argument("--rate", type=float, default=defaults.rate,
+                        help="requests per second per host (0 disables)")
+    parser.add_argument("--burst", type=int, default=defaults.burst)
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR,
+                        help="directory of the on-disk response cache")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL_SECONDS,
+                        help="seconds before a cached page is revalidated")
+    parser.add_argument("--offline", action="store_true",
+                        help="serve every cached page without revalidating it")
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache")
+    parser.add_argument("--store", choices=list(STORE_BACKENDS), default=DEFAULT_STORE,
+                        help="chapter store for novels that have no chapters yet")
+    parser.add_argument("--block-domain", action="append", default=[], metavar="DOMAIN",
+                        help="extra ad/tracker domain whose requests are aborted (repeatable)")
+    parser.add_argument("--allow-domain", action="append", default=[], metavar="DOMAIN",
+                        help="domain whose requests are never aborted (repeatable)")
+    parser.add_argument("--load-resources", action="store_true",
+                        help="let pages load images, fonts and media")
+    parser.add_argument("--no-block", action="store_true",
+                        help="disable request blocking in browser pages")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="worker processes to shard a single novel's chapters over")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="chapter scrapes running at once across a batch")
+    parser.add_argument("--active-novels", type=int, default=DEFAULT_ACTIVE_NOVELS,
+                        help="novels of a batch processed at the same time")
+    parser.add_argument("--progress-interval", type=float, default=DEFAULT_PROGRESS_INTERVAL,
+                        help="seconds between batch progress lines (0 disables)")
+    parser.add_argument("--metrics-file", type=Path, default=None,
+                        help="where to write the JSON run metrics report "
+                             "(default: run_metrics.json in --output-dir)")
+    parser.add_argument("--metrics-interval", type=float, default=DEFAULT_METRICS_INTERVAL,
+                        help="seconds between throughput/latency progress lines (0 disables)")
+    parser.add_argument("--no-images", action="store_true",
+                        help="do not download or embed chapter images")
+    parser.add_argument("--profiles-file", type=Path, default=DEFAULT_PROFILES_PATH,
+                        help="where learned per-site extraction profiles are kept")
+    parser.add_argument("--no-profiles", action="store_true",
+                        help="always use the generic extraction heuristics")
+    add_epub_arguments(parser)
+
+
+def add_epub_arguments(parser: argparse.ArgumentParser) -> None:
+    """How EPUBs are built, shared by scrape, update and convert."""
+    # pylint: disable-next=import-outside-toplevel
+    from scraper.boilerplate import DEFAULT_THRESHOLD
+
+    parser.add_argument("--image-max-size", type=int, default=0, metavar="PIXELS",
+                        help="downscale embedded images to fit this size (needs Pillow)")
+    parser.add_argument("--image-quality", type=int, default=None, metavar="1-95",
+                        help="re-encode embedded images as JPEG at this quality (needs Pillow)")
+    parser.add_argument("--volume-chapters", type=int, default=0, metavar="N",
+                        help="split the EPUB into volumes of at most N chapters")
+    parser.add_argument("--volume-size", type=float, default=0, metavar="MIB",
+                        help="split the EPUB into volumes of about this many MiB")
+    parser.add_argument("--volume-workers", type=int, default=None,
+                        help="processes building volumes (default: CPU count)")
+    parser.add_argument("--boilerplate-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        metavar="FRACTION",
+                        help="drop paragraphs repeated in more than this fraction of a "
+                             "novel's chapters (0 keeps everything)")
+
+
+def add_scrape_command(parser: argparse.ArgumentParser) -> None:
+    """Arguments of `scrape`."""
+    parser.add_argument("toc_urls", nargs="*", metavar="URL", help="table of contents URLs")
+    parser.add_argument("--batch", type=Path,
+                        help="file listing ToC URLs, one per line or as JSON")
+    add_scrape_arguments(parser)
+
+
+def add_update_command(parser: argparse.ArgumentParser) -> None:
+    """Arguments of `update`."""
+    add_novel_dirs_argument(parser)
+    add_scrape_arguments(parser)
+
+
+def add_watch_command(parser: argparse.ArgumentParser) -> None:
+    """Arguments of `watch`."""
+    # pylint: disable-next=import-outside-toplevel
+    from scraper.watch import DEFAULT_FULL_SYNC_INTERVAL, DEFAULT_POLL_INTERVAL
+
+    add_novel_dirs_argument(parser)
+    parser.add_argument("--interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        metavar="SECONDS", help="time between polls of each novel's ToC")
+    parser.add_argument("--full-sync-interval", type=float, default=DEFAULT_FULL_SYNC_INTERVAL,
+                        metavar="SECONDS",
+                        help="read every ToC page again on a change after this long "
+                             "(0 always reads them all)")
+    parser.add_argument("--polls", type=int, default=0,
+                        help="stop after this many polls (default: run until interrupted)")
+    add_scrape_arguments(parser)
 
-    Returns the path to the chapter subdirectory.
+
+def add_convert_command(parser: argparse.ArgumentParser) -> None:
+    """Arguments of `convert`."""
+    # pylint: disable-next=import-outside-toplevel
+    from converter.epub_converter import EPUB_BACKENDS
+
+    add_novel_dirs_argument(parser)
+    add_output_argument(parser)
+    parser.add_argument("--backend", choices=list(EPUB_BACKENDS), default="streaming",
+                        help="EPUB writer; volumes always use the streaming one")
+    add_epub_arguments(parser)
+
+
+def add_status_command(parser: argparse.ArgumentParser) -> None:
+    """Arguments of `status`."""
+    add_novel_dirs_argument(parser)
+    add_output_argument(parser)
+
+
+def find_novels(output_dir: Path, novel_dirs: List[Path]) -> List[Path]:
+    """
+    Resolves the novel folders a subcommand works on: the given ones (a bare
+    name is looked up under `output_dir`), or else every folder under
+    `output_dir` holding a novel's metadata or chapter manifest.
     """
-    chapters_path = os.path.join(base_dir, CHAPTERS_SUBDIR)
-    os.makedirs(chapters_path, exist_ok=True)
-    print(f"[INFO] Output directory: '{chapters_path}'")
-    return chapters_path
+    # pylint: disable-next=import-outside-toplevel
+    from scraper.manifest import MANIFEST_NAME, METADATA_NAME
+
+    if novel_dirs:
+        return [path if path.exists() or not (output_dir / path).exists() else output_dir / path
+                for path in novel_dirs]
+    if not output_dir.is_dir():
+        return []
+    return sorted(path for path in output_dir.iterdir()
+                  if (path / METADATA_NAME).exists() or (path / MANIFEST_NAME).exists())
+
 
-async def main():
+def read_metadata(novel_dir: Path) -> Dict:
+    """A novel's metadata.json, or {} if it has none yet."""
+    # pylint: disable-next=import-outside-toplevel
+    from scraper.manifest import METADATA_NAME
+
+    try:
+        with open(novel_dir / METADATA_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def epub_options(args: argparse.Namespace) -> Dict:
+    """Keyword arguments of the EPUB builders, including the volume split or None."""
+    volumes = None
+    if args.volume_chapters or args.volume_size:
+        volumes = {"max_chapters": args.volume_chapters,
+                   "max_bytes": int(args.volume_size * 1024 * 1024),
+                   "workers": args.volume_workers}
+    return {"max_image_size": args.image_max_size, "image_quality": args.image_quality,
+            "boilerplate_threshold": args.boilerplate_threshold, "volumes": volumes}
+
+
+def scrape_settings(args: argparse.Namespace, output_dir: Path) -> Dict:
     """
-    Main function to run the scraping process and save chapters.
+    Keyword arguments shared by `run_pipeline` and `watch_novels`: scheduler
+    limits, response cache, chapter store, request blocking, metrics file,
+    images and site profiles.
     """
-    scrape_result = await scrape_all_chapters(TOC_URL, method="paragraph",
-                                              output_base_dir=OUTPUT_DIR)
-    novel_title = scrape_result["title"]
-    chapters = scrape_result["scraped_chapters"]
-
-    folder_name = slugify(novel_title)
-    base_output_dir = os.path.join("output", folder_name)
-    chapters_path = ensure_dirs(base_output_dir)
-
-    # Download cover image if available
-    print(f"[INFO] Image URL: {scrape_result.get('cover_image_url')}")
-    if scrape_result.get("cover_image_url"):
-        print(f"[INFO] Cover image URL: {scrape_result['cover_image_url']}")
-        cover_url = scrape_result["cover_image_url"]
-        ext = os.path.splitext(cover_url)[-1].split("?")[0]
-        ext = ext if ext.lower() in [".jpg", ".jpeg", ".png", ".webp"] else ".jpg"
-        cover_path = os.path.join(base_output_dir, f"cover{ext}")
-        download_image(cover_url, Path(cover_path))
-
-
-    print(f"[INFO] Total chapters scraped: {len(chapters)}")
-
-    for i, chapter in enumerate(chapters, start=1):
-        chapter_data = {
-            "number": i,
-            "title": chapter["title"] or f"Chapter {i}",
-            "content": chapter["content"],
-            "source_url": scrape_result["scraped_urls"][i - 1]
-        }
-
-        filename = os.path.join(chapters_path, f"{i:03}.json")
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(chapter_data, f, ensure_ascii=False, indent=2)
-
-        print(f"[INFO] Saved Chapter {i}: '{chapter_data['title']}' → {filename}")
-
-    # Save metadata stub
-    metadata_path = os.path.join(base_output_dir, "metadata.json")
-    metadata = {
-        "title": novel_title,
-        "source": TOC_URL,
-        "chapters": len(chapters)
+    # The browser stack is only loaded by the subcommands that scrape
+    # pylint: disable=import-outside-toplevel
+    from scraper.browser_utils import DEFAULT_REQUEST_FILTER
+    from scraper.metrics import DEFAULT_REPORT_NAME
+    from scraper.response_cache import ResponseCache
+    from scraper.scheduler import SchedulerConfig
+    from scraper.site_profiles import ProfileStore
+
+    return {
+        "scheduler_config": SchedulerConfig(
+            initial_concurrency=args.concurrency,
+            min_concurrency=args.min_concurrency,
+            max_concurrency=args.max_concurrency,
+            rate=args.rate,
+            burst=args.burst,
+        ),
+        "cache": None if args.no_cache else ResponseCache(
+            args.cache_dir, ttl=args.cache_ttl, offline=args.offline),
+        "store_backend": args.store,
+        "request_filter": None if args.no_block else DEFAULT_REQUEST_FILTER.extend(
+            args.block_domain, args.allow_domain, args.load_resources),
+        "metrics_file": args.metrics_file or output_dir / DEFAULT_REPORT_NAME,
+        "fetch_images": not args.no_images,
+        "profiles": None if args.no_profiles else ProfileStore(args.profiles_file),
     }
-    with open(metadata_path, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
 
-    print(f"[INFO] Metadata saved at '{metadata_path}'")
 
-    generate_epub(Path(base_output_dir))
+def scrape_novels(novels: List, args: argparse.Namespace, output_dir: Path) -> int:
+    """Runs the pipeline on `novels` (BatchNovels) into `output_dir`."""
+    # pylint: disable=import-outside-toplevel
+    import asyncio
+    from pipeline import run_pipeline
+
+    asyncio.run(run_pipeline(novels, processes=args.processes,
+                             metrics_interval=args.metrics_interval, output_dir=output_dir,
+                             workers=args.workers, active_novels=args.active_novels,
+                             progress_interval=args.progress_interval,
+                             **scrape_settings(args, output_dir), **epub_options(args)))
+    return 0
+
+
+def run_scrape(args: argparse.Namespace) -> int:
+    """`scrape`: downloads the given novels and builds their EPUBs."""
+    # pylint: disable-next=import-outside-toplevel
+    from scraper.batch import DEFAULT_METHOD, BatchNovel, load_batch_file
+
+    novels = [BatchNovel(url, args.method or DEFAULT_METHOD) for url in args.toc_urls]
+    if args.batch:
+        novels += load_batch_file(args.batch)
+    if not novels:
+        print("[ERROR] Nothing to scrape: give ToC URLs or --batch.")
+        return 2
+    return scrape_novels(novels, args, args.output_dir)
+
+
+def downloaded_novels(args: argparse.Namespace) -> List[Tuple]:
+    """
+    (novel folder, BatchNovel) of every novel to update, with the source and
+    method from its metadata.json; --method overrides the method.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from scraper.batch import DEFAULT_METHOD, BatchNovel
+
+    novels = []
+    for novel_dir in find_novels(args.output_dir, args.novel_dirs):
+        metadata = read_metadata(novel_dir)
+        if not metadata.get("source"):
+            print(f"[WARN] {novel_dir} has no source URL in its metadata; scrape it again "
+                  "with `main.py scrape`.")
+            continue
+        method = args.method or metadata.get("method") or DEFAULT_METHOD
+        novels.append((novel_dir, BatchNovel(metadata["source"], method)))
+    return novels
+
+
+def run_update(args: argparse.Namespace) -> int:
+    """
+    `update`: scrapes downloaded novels again from the source and method in
+    their metadata.json, fetching only chapters that are new or failed, and
+    rebuilds their EPUBs.
+    """
+    # Novels stay in the folder they were downloaded to
+    by_output_dir: Dict[Path, List] = {}
+    for novel_dir, novel in downloaded_novels(args):
+        by_output_dir.setdefault(novel_dir.parent, []).append(novel)
+    if not by_output_dir:
+        print(f"[INFO] No novels to update in {args.output_dir}.")
+        return 0
+    for output_dir, novels in by_output_dir.items():
+        scrape_novels(novels, args, output_dir)
+    return 0
+
+
+def run_watch(args: argparse.Namespace) -> int:
+    """
+    `watch`: polls downloaded novels every --interval seconds and fetches
+    new chapters of the ones whose ToC changed, until interrupted.
+    """
+    # pylint: disable=import-outside-toplevel
+    import asyncio
+    from pipeline import watch_novels
+
+    novels = downloaded_novels(args)
+    if not novels:
+        print(f"[INFO] No novels to watch in {args.output_dir}.")
+        return 0
+    try:
+        asyncio.run(watch_novels(novels, workers=args.workers, interval=args.interval,
+                                 full_sync_interval=args.full_sync_interval,
+                                 polls=args.polls, **scrape_settings(args, args.output_dir),
+                                 **epub_options(args)))
+    except KeyboardInterrupt:
+        print("[INFO] Watch stopped.")
+    return 0
+
+
+def run_convert(args: argparse.Namespace) -> int:
+    """`convert`: builds EPUBs from stored chapters without going online."""
+    # pylint: disable-next=import-outside-toplevel
+    from converter.epub_converter import generate_epub, generate_epub_volumes
+
+    options = epub_options(args)
+    volumes = options.pop("volumes")
+    novels = find_novels(args.output_dir, args.novel_dirs)
+    if not novels:
+        print(f"[INFO] No novels to convert in {args.output_dir}.")
+    missing = 0
+    for novel_dir in novels:
+        if not read_metadata(novel_dir):
+            print(f"[WARN] {novel_dir} has no metadata.json yet; skipping it.")
+            missing += 1
+        elif volumes:
+            generate_epub_volumes(novel_dir, **volumes, **options)
+        else:
+            generate_epub(novel_dir, backend=args.backend, **options)
+    return 1 if missing else 0
+
+
+def print_status(novel_dir: Path) -> None:
+    """Summarizes one novel from its metadata, manifest, chapter store and EPUBs."""
+    # pylint: disable=import-outside-toplevel
+    from scraper.chapter_store import detect_store
+    from scraper.manifest import (MANIFEST_NAME, STATUS_COMPLETE, STATUS_FAILED,
+                                  STATUS_PENDING, ChapterManifest)
+
+    metadata = read_metadata(novel_dir)
+    print(f"[INFO] {metadata.get('title', novel_dir.name)} ({novel_dir})")
+    if metadata.get("source"):
+        method = f" ({metadata['method']})" if metadata.get("method") else ""
+        print(f"[INFO]   source: {metadata['source']}{method}")
+
+    manifest_path = novel_dir / MANIFEST_NAME
+    if manifest_path.exists():
+        counts = ChapterManifest.load(novel_dir).counts()
+        print(f"[INFO]   chapters: {counts[STATUS_COMPLETE]} downloaded, "
+              f"{counts[STATUS_FAILED]} failed, {counts[STATUS_PENDING]} pending")
+    store = detect_store(novel_dir, read_only=True)
+    if store is None:
+        print("[INFO]   no chapters stored yet")
+    else:
+        with store:
+            print(f"[INFO]   {len(store.indexes())} chapter(s) in the '{store.name}' store")
+
+    epubs = sorted(novel_dir.glob("*.epub"))
+    for epub in epubs:
+        print(f"[INFO]   {epub.name}: {epub.stat().st_size / 1024 / 1024:.1f} MiB")
+    if not epubs:
+        print("[INFO]   no EPUB built yet")
+    elif (manifest_path.exists()
+          and max(epub.stat().st_mtime for epub in epubs) < manifest_path.stat().st_mtime):
+        print("[INFO]   chapters changed since the EPUB was built; run `main.py convert`")
+
+
+def run_status(args: argparse.Namespace) -> int:
+    """`status`: reads what is on disk; nothing is fetched or launched."""
+    novels = find_novels(args.output_dir, args.novel_dirs)
+    if not novels:
+        print(f"[INFO] No novels in {args.output_dir}.")
+    for novel_dir in novels:
+        print_status(novel_dir)
+    return 0
+
+
+# name -> (help, argument registration, handler)
+COMMANDS = {
+    "scrape": ("download novels from their ToC pages and build their EPUBs",
+               add_scrape_command, run_scrape),
+    "update": ("fetch new chapters of downloaded novels and rebuild their EPUBs",
+               add_update_command, run_update),
+    "watch": ("poll downloaded novels and fetch new chapters as they appear",
+              add_watch_command, run_watch),
+    "convert": ("build EPUBs from stored chapters", add_convert_command, run_convert),
+    "status": ("show downloaded chapters and built EPUBs", add_status_command, run_status),
+}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parses a subcommand and its arguments. Only the chosen subcommand's
+    arguments are registered, since registering them imports their defaults.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(prog="main.py", description="Scrape web novels into EPUBs.")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+    chosen = next((arg for arg in argv if not arg.startswith("-")), None)
+    for name, (help_text, add_arguments, _) in COMMANDS.items():
+        command = commands.add_parser(name, help=help_text, description=help_text)
+        if name == chosen:
+            add_arguments(command)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs the subcommand given on the command line and returns its exit status."""
+    args = parse_args(argv)
+    return COMMANDS[args.command][2](args)
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+The full pipeline behind `main.py scrape` and `main.py update`: scrapes one
+novel or a batch into chapter stores, then downloads each cover, writes its
+metadata.json and builds its EPUB. `main.py watch` runs the same steps for
+downloaded novels whenever a cheap poll of their ToC shows new chapters.
+
+This module pulls in the whole browser stack, so the CLI only imports it
+for the subcommands that scrape.
+"""
+import asyncio
+import json
+import math
+import os
+from pathlib import Path
+from typing import List, Tuple
+
+from scraper.batch import DEFAULT_WORKERS, BatchNovel, scrape_batch
+from scraper.boilerplate import DEFAULT_THRESHOLD
+from scraper.browser_utils import DEFAULT_REQUEST_FILTER, BrowserPool, RequestFilter
+from scraper.chapter_store import DEFAULT_STORE
+from scraper.image_utils import download_image
+from scraper.manifest import METADATA_NAME
+from scraper.metrics import DEFAULT_PROGRESS_INTERVAL as DEFAULT_METRICS_INTERVAL
+from scraper.metrics import DEFAULT_REPORT_NAME, METRICS
+from scraper.orchestrator import (BROWSER_COUNT, MAX_PAGE_USES, NovelScrape,
+                                  scrape_all_chapters, scrape_novel)
+from scraper.response_cache import ResponseCache
+from scraper.retry import RetryQueue
+from scraper.scheduler import FairWorkerPool, HostScheduler, SchedulerConfig
+from scraper.site_profiles import ProfileStore
+from scraper.watch import (DEFAULT_FULL_SYNC_INTERVAL, DEFAULT_POLL_INTERVAL, WatchState,
+                           toc_changed)
+from converter.epub_converter import generate_epub, generate_epub_volumes
+
+OUTPUT_DIR = Path("output")
+
+
+async def finish_novel(scrape_result: dict, novel: BatchNovel, cache: ResponseCache | None = None,
+                       volumes: dict | None = None, **build_options):
+    """
+    Downloads the cover, writes metadata.json and builds the EPUB of a scraped novel,
+    split into volumes by `generate_epub_volumes(**volumes)` when `volumes` is given.
+    `build_options` (image and boilerplate settings) are passed to the EPUB builder.
+    The build runs in a worker thread so other novels keep scraping meanwhile.
+    """
+    novel_title = scrape_result["title"]
+    base_output_dir = str(scrape_result["novel_dir"])
+
+    # Download cover image if available
+    print(f"[INFO] Image URL: {scrape_result.get('cover_image_url')}")
+    if scrape_result.get("cover_image_url"):
+        print(f"[INFO] Cover image URL: {scrape_result['cover_image_url']}")
+        cover_url = scrape_result["cover_image_url"]
+        ext = os.path.splitext(cover_url)[-1].split("?")[0]
+        ext = ext if ext.lower() in [".jpg", ".jpeg", ".png", ".webp"] else ".jpg"
+        cover_path = os.path.join(base_output_dir, f"cover{ext}")
+        await download_image(cover_url, Path(cover_path), cache)
+
+
+    print(f"[INFO] Total chapters scraped: {len(scrape_result['scraped_urls'])}")
+
+    # Save metadata stub; `main.py update` scrapes the source again with the same method
+    metadata_path = os.path.join(base_output_dir, METADATA_NAME)
+    metadata = {
+        "title": novel_title,
+        "source": novel.toc_url,
+        "method": novel.method,
+        "chapters": len(scrape_result["chapter_urls"])
+    }
+    with open(metadata_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+    print(f"[INFO] Metadata saved at '{metadata_path}'")
+
+    if volumes:
+        await asyncio.to_thread(generate_epub_volumes, Path(base_output_dir), **volumes,
+                                **build_options)
+    else:
+        await asyncio.to_thread(generate_epub, Path(base_output_dir), **build_options)
+
+async def run_pipeline(novels: List[BatchNovel], scheduler_config: SchedulerConfig,
+                       cache: ResponseCache | None = None, store_backend: str = DEFAULT_STORE,
+                       processes: int = 1,
+                       request_filter: RequestFilter | None = DEFAULT_REQUEST_FILTER,
+                       metrics_file: Path = OUTPUT_DIR / DEFAULT_REPORT_NAME,
+                       metrics_interval: float = DEFAULT_METRICS_INTERVAL,
+                       fetch_images: bool = True, max_image_size: int = 0,
+                       image_quality: int | None = None, profiles: ProfileStore | None = None,
+                       volumes: dict | None = None,
+                       boilerplate_threshold: float = DEFAULT_THRESHOLD,
+                       output_dir: Path = OUTPUT_DIR, **batch_options):
+    """
+    Runs the scraping process and saves chapters into one folder per novel
+    under `output_dir`. More than one novel runs in batch mode;
+    `batch_options` are passed to `scrape_batch`. Stage timings of the whole
+    run are written to `metrics_file`. Chapter images are downloaded unless
+    `fetch_images` is False, and embedded in the EPUB downscaled to
+    `max_image_size` at `image_quality`. Pages are extracted with the site
+    `profiles` when given. `volumes` splits each EPUB, see
+    `generate_epub_volumes`. Paragraphs repeated in more than
+    `boilerplate_threshold` of a novel's chapters are left out of both the
+    stored chapters and the EPUB.
+    """
+    METRICS.reset()
+    progress = (asyncio.create_task(METRICS.report_progress(metrics_interval))
+                if metrics_interval > 0 else None)
+    try:
+        await run_novels(novels, scheduler_config, cache, store_backend, processes,
+                         request_filter, fetch_images,
+                         {"max_image_size": max_image_size, "image_quality": image_quality,
+                          "volumes": volumes, "boilerplate_threshold": boilerplate_threshold},
+                         profiles, output_dir, **batch_options)
+    finally:
+        if progress is not None:
+            progress.cancel()
+        METRICS.write_report(metrics_file, cache=cache.report() if cache else None)
+
+async def run_novels(novels: List[BatchNovel], scheduler_config: SchedulerConfig,
+                     cache: ResponseCache | None, store_backend: str, processes: int,
+                     request_filter: RequestFilter | None, fetch_images: bool,
+                     epub_options: dict, profiles: ProfileStore | None,
+                     output_dir: Path = OUTPUT_DIR, **batch_options):
+    """
+    Scrapes and builds one novel directly, or several as a batch.
+    """
+    if len(novels) == 1:
+        scrape_result = await scrape_all_chapters(novels[0].toc_url, method=novels[0].method,
+                                                  output_base_dir=output_dir,
+                                                  scheduler_config=scheduler_config,
+                                                  cache=cache, store_backend=store_backend,
+                                                  processes=processes,
+                                                  request_filter=request_filter,
+                                                  fetch_images=fetch_images,
+                                                  profiles=profiles,
+                                                  boilerplate_threshold=epub_options[
+                                                      "boilerplate_threshold"])
+        await finish_novel(scrape_result, novels[0], cache, **epub_options)
+        return
+
+    jobs = await scrape_batch(novels, output_dir, scheduler_config, cache=cache,
+                              store_backend=store_backend, request_filter=request_filter,
+                              fetch_images=fetch_images, profiles=profiles,
+                              boilerplate_threshold=epub_options["boilerplate_threshold"],
+                              **batch_options)
+    for job in jobs:
+        if job.result is not None:
+            await finish_novel(job.result, job.novel, cache, **epub_options)
+
+async def watch_novel(novel_dir: Path, novel: BatchNovel, pool: BrowserPool,
+                      scheduler: HostScheduler, workers: FairWorkerPool,
+                      store_backend: str, fetch_images: bool, epub_options: dict,
+                      full_sync_interval: float) -> bool:
+    """
+    Polls one downloaded novel: probes its ToC and, only when it changed,
+    scrapes the new chapters and updates the EPUB.
+
+    Returns:
+        bool: Whether new chapters were saved.
+    """
+    state = WatchState.load(novel_dir)
+    changed = await toc_changed(pool, state, novel.toc_url)
+    if not changed:
+        if changed is None:
+            print(f"[WARN] Watch: couldn't check {novel_dir.name}; trying again next poll.")
+        state.save()
+        return False
+
+    print(f"[INFO] Watch: {novel_dir.name} changed; fetching new chapters.")
+    scrape = NovelScrape(novel.toc_url, novel_dir.parent, pool, store_backend, fetch_images,
+                         epub_options["boilerplate_threshold"],
+                         skip_toc_pages=state.skip_pages(full_sync_interval))
+    retries = RetryQueue()
+    result = await scrape_novel(scrape, novel.method, scheduler, retries, workers)
+    state.record_scrape(novel.toc_url, scrape.toc_pages, full=not scrape.toc_pages_skipped)
+    if state.unprobed(novel.toc_url):
+        # e.g. a new last ToC page: take its links as the baseline for the next poll
+        await toc_changed(pool, state, novel.toc_url)
+    state.save()
+    if scrape.saved:
+        await finish_novel(result, novel, pool.cache, **epub_options)
+    return bool(scrape.saved)
+
+async def watch_novel_safely(novel_dir: Path, *args) -> bool:
+    """`watch_novel`, logging errors so one broken novel does not end the watch."""
+    try:
+        return await watch_novel(novel_dir, *args)
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"[ERROR] Watch: {novel_dir.name} failed: {type(e).__name__}: {e}")
+        return False
+
+async def watch_novels(novels: List[Tuple[Path, BatchNovel]], scheduler_config: SchedulerConfig,
+                       cache: ResponseCache | None = None, store_backend: str = DEFAULT_STORE,
+                       request_filter: RequestFilter | None = DEFAULT_REQUEST_FILTER,
+                       metrics_file: Path = OUTPUT_DIR / DEFAULT_REPORT_NAME,
+                       fetch_images: bool = True, profiles: ProfileStore | None = None,
+                       workers: int = DEFAULT_WORKERS,
+                       interval: float = DEFAULT_POLL_INTERVAL,
+                       full_sync_interval: float = DEFAULT_FULL_SYNC_INTERVAL,
+                       polls: int = 0, **epub_options) -> None:
+    """
+    Keeps downloaded novels up to date: every `interval` seconds each novel's
+    ToC is probed (see `scraper.watch`) and the novels that changed are
+    scraped and converted like `main.py update` does, appending only the new
+    chapters. One browser pool, host scheduler and worker pool stay up for
+    the whole watch, so browsers are launched once (when a poll first needs
+    one) and stay warm between polls. Stops after `polls` polls, or never
+    when it is 0. The metrics report is rewritten after every poll.
+
+    Args:
+        novels: (novel folder, source ToC and scraper method) per novel.
+        epub_options: Image, volume and boilerplate settings, see `run_pipeline`.
+    """
+    scheduler = HostScheduler(scheduler_config)
+    worker_pool = FairWorkerPool(workers)
+    pages_per_browser = math.ceil(worker_pool.workers / BROWSER_COUNT)
+    loop = asyncio.get_running_loop()
+    poll = 0
+
+    async with BrowserPool(browsers=BROWSER_COUNT, pages_per_browser=pages_per_browser,
+                           max_page_uses=MAX_PAGE_USES, cache=cache,
+                           request_filter=request_filter, profiles=profiles) as pool:
+        while True:
+            poll += 1
+            started = loop.time()
+            METRICS.reset()
+            print(f"[INFO] Watch poll {poll}: checking {len(novels)} novel(s)")
+            updated = await asyncio.gather(*(
+                watch_novel_safely(novel_dir, novel, pool, scheduler, worker_pool,
+                                   store_backend, fetch_images, epub_options,
+                                   full_sync_interval)
+                for novel_dir, novel in novels))
+            print(f"[INFO] Watch poll {poll}: {sum(updated)} novel(s) updated in "
+                  f"{loop.time() - started:.1f}s")
+            METRICS.write_report(metrics_file, cache=cache.report() if cache else None)
+            if polls and poll >= polls:
+                break
+            await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
@@ -0,0 +1,244 @@
+"""
+Batch mode: scrapes many novels concurrently under one browser pool, one
+per-host scheduler and one global worker pool shared fairly between them.
+
+A batch is a list of ToC URLs, either given directly or read from a file:
+plain text with one URL per line ('#' starts a comment), or JSON holding a
+list of URLs / { "toc_url": ..., "method": ... } objects, optionally under a
+top-level "novels" key.
+"""
+import asyncio
+import json
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from scraper.boilerplate import DEFAULT_THRESHOLD
+from scraper.browser_utils import DEFAULT_REQUEST_FILTER, BrowserPool, RequestFilter
+from scraper.chapter_store import DEFAULT_STORE
+from scraper.orchestrator import BROWSER_COUNT, MAX_PAGE_USES, NovelScrape, scrape_novel
+from scraper.response_cache import ResponseCache
+from scraper.retry import RetryQueue
+from scraper.scheduler import FairWorkerPool, HostScheduler, SchedulerConfig
+from scraper.site_profiles import ProfileStore
+
+DEFAULT_METHOD = "paragraph"
+DEFAULT_WORKERS = 16
+DEFAULT_ACTIVE_NOVELS = 8
+DEFAULT_PROGRESS_INTERVAL = 30.0  # seconds, 0 disables progress lines
+BATCH_REPORT_NAME = "batch_report.json"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class BatchNovel:
+    """One novel of a batch."""
+    toc_url: str
+    method: str = DEFAULT_METHOD
+
+
+def load_batch_file(path: Path) -> List[BatchNovel]:
+    """
+    Reads the novels of a batch from a text or JSON file.
+
+    Args:
+        path (Path): Batch file.
+
+    Returns:
+        List[BatchNovel]: Novels in file order, without duplicate ToC URLs.
+    """
+    text = Path(path).read_text(encoding="utf-8")
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = [line.split("#", 1)[0].strip() for line in text.splitlines()]
+
+    if isinstance(data, dict):
+        data = data.get("novels", [])
+    novels: Dict[str, BatchNovel] = {}
+    for item in data:
+        novel = BatchNovel(item) if isinstance(item, str) else BatchNovel(**item)
+        if novel.toc_url and novel.toc_url not in novels:
+            novels[novel.toc_url] = novel
+    return list(novels.values())
+
+
+class NovelJob:
+    """
+    Progress and outcome of one novel in a batch.
+    """
+
+    def __init__(self, novel: BatchNovel):
+        self.novel = novel
+        self.status = JOB_QUEUED
+        self.retries = RetryQueue()
+        self.scrape: Optional[NovelScrape] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def title(self) -> str:
+        """Novel title once its ToC has loaded, the ToC URL before that."""
+        if self.scrape is not None and self.scrape.novel_dir is not None:
+            return self.scrape.title
+        return self.novel.toc_url
+
+    def progress(self, workers: FairWorkerPool) -> str:
+        """One-line progress summary for the periodic batch report."""
+        scrape = self.scrape
+        if scrape is None:
+            return f"{self.title}: {self.status}"
+        total = (len(scrape.chapter_urls) if scrape.index_of is not None
+                 else f"{len(scrape.dispatched)}+")
+        return (f"{self.title}: {scrape.saved}/{total} saved, "
+                f"{workers.running[self.novel.toc_url]} running, "
+                f"{workers.waiting(self.novel.toc_url)} waiting, "
+                f"{len(self.retries)} retrying, {len(self.retries.lost)} lost")
+
+    def report(self) -> Dict:
+        """JSON-serializable summary of the job for the batch report."""
+        summary = self.retries.summary()
+        scrape = self.scrape
+        return {
+            "toc_url": self.novel.toc_url,
+            "title": self.title,
+            "status": self.status,
+            "error": self.error,
+            "novel_dir": str(scrape.novel_dir) if scrape and scrape.novel_dir else None,
+            "chapters": len(scrape.chapter_urls) if scrape else 0,
+            "scraped": scrape.saved if scrape else 0,
+            "failures_by_kind": summary["failures_by_kind"],
+            "recovered": summary["recovered"],
+            "lost": summary["lost"],
+            "seconds": round((self.finished_at or time.monotonic())
+                             - (self.started_at or time.monotonic()), 2),
+        }
+
+
+async def _run_job(job: NovelJob, output_base_dir: Path, pool: BrowserPool,
+                   scheduler: HostScheduler, workers: FairWorkerPool,
+                   active: asyncio.Semaphore, store_backend: str, fetch_images: bool,
+                   boilerplate_threshold: float) -> None:
+    async with active:
+        job.status = JOB_RUNNING
+        job.started_at = time.monotonic()
+        print(f"[INFO] Batch: starting {job.novel.toc_url}")
+        job.scrape = NovelScrape(job.novel.toc_url, output_base_dir, pool, store_backend,
+                                 fetch_images, boilerplate_threshold)
+        try:
+            job.result = await scrape_novel(job.scrape, job.novel.method, scheduler,
+                                            job.retries, workers)
+            job.status = JOB_DONE
+        except Exception as e:  # pylint: disable=broad-except
+            # One broken novel must not take the rest of the batch down
+            job.status = JOB_FAILED
+            job.error = f"{type(e).__name__}: {e}"
+            print(f"[ERROR] Batch: {job.novel.toc_url} failed: {job.error}")
+        finally:
+            job.finished_at = time.monotonic()
+
+
+async def _print_progress(jobs: List[NovelJob], workers: FairWorkerPool,
+                          interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        finished = sum(job.status in (JOB_DONE, JOB_FAILED) for job in jobs)
+        print(f"[INFO] Batch progress: {finished}/{len(jobs)} novels finished")
+        for job in jobs:
+            if job.status == JOB_RUNNING:
+                print(f"[INFO]   {job.progress(workers)}")
+
+
+def print_batch_report(jobs: List[NovelJob]) -> None:
+    """Prints one line per novel with its chapter counts and losses."""
+    print(f"[INFO] Batch finished: {sum(job.status == JOB_DONE for job in jobs)} done, "
+          f"{sum(job.status == JOB_FAILED for job in jobs)} failed")
+    for job in jobs:
+        report = job.report()
+        level = "[INFO]" if job.status == JOB_DONE and not report["lost"] else "[WARN]"
+        detail = report["error"] or (f"{report['scraped']} scraped, "
+                                     f"{len(report['lost'])} lost of {report['chapters']}")
+        print(f"{level}   {report['title']}: {job.status} ({detail}, {report['seconds']}s)")
+
+
+async def scrape_batch(novels: List[BatchNovel], output_base_dir: Path,
+                       scheduler_config: SchedulerConfig | None = None,
+                       workers: int = DEFAULT_WORKERS,
+                       active_novels: int = DEFAULT_ACTIVE_NOVELS,
+                       cache: ResponseCache | None = None,
+                       store_backend: str = DEFAULT_STORE,
+                       progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+                       request_filter: RequestFilter | None = DEFAULT_REQUEST_FILTER,
+                       fetch_images: bool = True,
+                       profiles: ProfileStore | None = None,
+                       boilerplate_threshold: float = DEFAULT_THRESHOLD) -> List[NovelJob]:
+    """
+    Scrapes every novel of a batch, `active_novels` at a time.
+
+    All novels share one browser pool, one per-host scheduler (so novels on
+    the same site respect a single set of limits) and a pool of `workers`
+    chapter scrapes handed out round-robin between novels. A per-novel report
+    is printed at the end and written to `<output_base_dir>/batch_report.json`.
+
+    Args:
+        novels (List[BatchNovel]): Novels to scrape.
+        output_base_dir (Path): Directory holding one folder per novel.
+        scheduler_config (SchedulerConfig, optional): Per-host limits.
+        workers (int): Chapter scrapes running at once across all novels.
+        active_novels (int): Novels whose ToC and chapters are processed at once.
+        cache (ResponseCache, optional): On-disk cache for ToC and chapter pages.
+        store_backend (str): Chapter store for novels without stored chapters yet.
+        progress_interval (float): Seconds between progress lines, 0 for none.
+        request_filter (RequestFilter, optional): Sub-resources browser pages
+            do not load; None loads everything.
+        fetch_images (bool): Download the images inside chapters.
+        profiles (ProfileStore, optional): Site extraction profiles to use
+            and learn.
+        boilerplate_threshold (float): Leave out paragraphs found in more
+            than this fraction of a novel's chapters; 0 keeps everything.
+
+    Returns:
+        List[NovelJob]: One job per novel, in input order.
+    """
+    print(f"[INFO] Starting batch of {len(novels)} novel(s) with {workers} worker(s)")
+    scheduler = HostScheduler(scheduler_config)
+    worker_pool = FairWorkerPool(workers)
+    active = asyncio.Semaphore(max(1, active_novels))
+    jobs = [NovelJob(novel) for novel in novels]
+    pages_per_browser = math.ceil(worker_pool.workers / BROWSER_COUNT)
+
+    async with BrowserPool(browsers=BROWSER_COUNT, pages_per_browser=pages_per_browser,
+                           max_page_uses=MAX_PAGE_USES, cache=cache,
+                           request_filter=request_filter, profiles=profiles) as pool:
+        progress = (asyncio.create_task(_print_progress(jobs, worker_pool, progress_interval))
+                    if progress_interval > 0 else None)
+        try:
+            await asyncio.gather(*(_run_job(job, output_base_dir, pool, scheduler,
+                                            worker_pool, active, store_backend, fetch_images,
+                                            boilerplate_threshold)
+                                   for job in jobs))
+        finally:
+            if progress is not None:
+                progress.cancel()
+
+    scheduler.print_report()
+    if cache is not None:
+        cache.print_report()
+    if profiles is not None:
+        profiles.print_report()
+    print_batch_report(jobs)
+
+    output_base_dir.mkdir(parents=True, exist_ok=True)
+    report_path = output_base_dir / BATCH_REPORT_NAME
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump([job.report() for job in jobs], f, ensure_ascii=False, indent=2)
+    print(f"[INFO] Batch report saved at '{report_path}'")
+    return jobs
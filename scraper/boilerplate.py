@@ -0,0 +1,201 @@
+"""
+Detects paragraphs a site repeats in every chapter (navigation, "read at
+site X" notices, footers, ads) and strips them from chapter content.
+
+Paragraphs are hashed after normalizing their text, and a frequency index
+counts how many chapters contain each hash. A paragraph found in more than
+`threshold` of a novel's chapters is boilerplate. The index is updated one
+chapter at a time as chapters are saved, using lossy counting: every
+`BUCKET_CHAPTERS` chapters, hashes too rare to ever reach ERROR_RATE of the
+chapters are forgotten, so the index holds the recent chapters' paragraphs
+plus the repeated ones instead of every paragraph of the novel. Counts are
+at most ERROR_RATE of the chapters too low, which only makes stripping more
+conservative.
+
+The index is kept next to the chapters as a JSON-lines file holding a
+snapshot followed by the paragraph hashes of each chapter counted since,
+so the scraper and the EPUB converter share it across runs.
+"""
+import hashlib
+import json
+import math
+import re
+from html import unescape
+from pathlib import Path
+from typing import Collection, Dict, Iterable, Iterator, List, Optional, Set
+
+BOILERPLATE_NAME = "boilerplate.jsonl"
+# Fraction of chapters a paragraph must appear in to be dropped; 0 disables
+DEFAULT_THRESHOLD = 0.5
+# Below this many chapters every paragraph looks frequent, so nothing is dropped
+MIN_CHAPTERS = 10
+# Largest undercount of a paragraph, as a fraction of the chapters counted
+ERROR_RATE = 0.02
+BUCKET_CHAPTERS = math.ceil(1 / ERROR_RATE)
+
+PARAGRAPH = re.compile(r"<p\b[^>]*>(.*?)</p>\n?", re.DOTALL | re.IGNORECASE)
+TAG = re.compile(r"<[^>]+>")
+LETTER_OR_DIGIT = re.compile(r"[^\W_]")
+
+
+def paragraph_key(inner_html: str) -> Optional[str]:
+    """
+    Hash of a paragraph's normalized text, or None for paragraphs that never
+    count as boilerplate: images and scene breaks such as "* * *".
+    """
+    if "<" in inner_html:
+        inner_html = TAG.sub(" ", inner_html)
+    if "&" in inner_html:
+        inner_html = unescape(inner_html)
+    text = " ".join(inner_html.split()).casefold()
+    if not LETTER_OR_DIGIT.search(text):
+        return None
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def paragraph_keys(content: str) -> Set[str]:
+    """Distinct paragraph hashes of a chapter's content."""
+    keys = {paragraph_key(match.group(1)) for match in PARAGRAPH.finditer(content)}
+    keys.discard(None)
+    return keys
+
+
+def strip_boilerplate(content: str, boilerplate: Collection[str]) -> str:
+    """
+    Removes the paragraphs whose hash is in `boilerplate`. Content made only
+    of boilerplate is returned unchanged rather than emptied.
+    """
+    if not boilerplate:
+        return content
+    stripped = PARAGRAPH.sub(lambda match: ("" if paragraph_key(match.group(1)) in boilerplate
+                                            else match.group(0)), content).strip()
+    return stripped or content
+
+
+class BoilerplateIndex:
+    """
+    Lossy counts of the paragraph hashes of a novel's chapters. Each chapter
+    number is counted once; downloading a chapter again does not recount it.
+
+    Usage:
+        index = BoilerplateIndex.load(novel_dir)
+        index.observe(number, content)
+        content = index.strip(content)
+    """
+
+    def __init__(self, path: Path, threshold: float = DEFAULT_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.counted: Set[int] = set()
+        # hash -> [count, largest count missed before it was tracked]
+        self.entries: Dict[str, List[int]] = {}
+        self._boilerplate: Optional[Set[str]] = None
+        self._log_lines = 0
+
+    @classmethod
+    def load(cls, novel_dir: Path, threshold: float = DEFAULT_THRESHOLD) -> "BoilerplateIndex":
+        """Loads the index of a novel directory; an empty one if there is none yet."""
+        index = cls(novel_dir / BOILERPLATE_NAME, threshold)
+        if index.path.exists():
+            with open(index.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash can leave a truncated last line behind
+                        print(f"[WARN] Skipping corrupt line in {index.path.name}")
+                        continue
+                    if "entries" in entry:
+                        index.counted = set(entry["chapters"])
+                        index.entries = entry["entries"]
+                        index._boilerplate = None
+                    else:
+                        index._count(entry["number"], entry["keys"])
+                        index._log_lines += 1
+        return index
+
+    def _count(self, number: int, keys: Iterable[str]) -> bool:
+        if number in self.counted:
+            return False
+        self.counted.add(number)
+        self._boilerplate = None
+        bucket = math.ceil(len(self.counted) / BUCKET_CHAPTERS)
+        for key in keys:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.entries[key] = [1, bucket - 1]
+            else:
+                entry[0] += 1
+        if len(self.counted) % BUCKET_CHAPTERS == 0:
+            self.entries = {key: entry for key, entry in self.entries.items()
+                            if entry[0] + entry[1] > bucket}
+        return True
+
+    def observe(self, number: int, content: str) -> None:
+        """
+        Counts the paragraphs of chapter `number` unless it was counted
+        before, and appends them to the index file.
+        """
+        keys = sorted(paragraph_keys(content))
+        if not self._count(number, keys):
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"number": number, "keys": keys}) + "\n")
+        self._log_lines += 1
+        if self._log_lines >= BUCKET_CHAPTERS:
+            self.save()
+
+    def catch_up(self, chapters: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Passes stored chapter records through, counting the ones the index
+        does not cover yet (e.g. stored before it existed). Once `chapters`
+        is exhausted the index file is rewritten if anything was counted.
+        """
+        changed = False
+        for chapter in chapters:
+            if chapter["number"] not in self.counted:
+                changed |= self._count(chapter["number"], paragraph_keys(chapter["content"]))
+            yield chapter
+        if changed:
+            self.save()
+
+    def renumber(self, moves: Dict[int, int]) -> None:
+        """
+        Follows chapters whose number changed (old -> new), so the chapters
+        now at their old numbers are still counted once downloaded.
+        """
+        self.counted = {moves.get(number, number) for number in self.counted}
+        self.save()
+
+    def save(self) -> None:
+        """Rewrites the index as a single snapshot line."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"chapters": sorted(self.counted),
+                                "entries": self.entries}) + "\n")
+        tmp_path.replace(self.path)
+        self._log_lines = 0
+
+    def _minimum(self) -> Optional[float]:
+        # Paragraphs need more than this many chapters to be boilerplate
+        if self.threshold <= 0 or len(self.counted) < MIN_CHAPTERS:
+            return None
+        return self.threshold * len(self.counted)
+
+    def boilerplate(self) -> Set[str]:
+        """Hashes of the paragraphs currently counted as boilerplate."""
+        if self._boilerplate is None:
+            minimum = self._minimum()
+            self._boilerplate = set() if minimum is None else {
+                key for key, (count, _) in self.entries.items() if count > minimum}
+        return self._boilerplate
+
+    def strip(self, content: str) -> str:
+        """`strip_boilerplate` with the current counts."""
+        return strip_boilerplate(content, self.boilerplate())
+
+    def signature(self) -> str:
+        """Digest of the boilerplate set, for build fingerprints."""
+        return hashlib.sha1("\n".join(sorted(self.boilerplate())).encode("utf-8")).hexdigest()
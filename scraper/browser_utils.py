@@ -1,21 +1,392 @@
-from playwright.async_api import Browser, BrowserContext
+"""
+Browser helpers shared by the scrapers: stealth-configured contexts and a
+pool that reuses Chromium instances across many chapter scrapes.
+"""
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, FrozenSet, List, Optional
+from urllib.parse import urlparse
 
-DEFAULT_USER_AGENT = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/120.0.0.0 Safari/537.36"
-)
+from playwright.async_api import (Browser, BrowserContext, Error as PlaywrightError, Page,
+                                  Playwright, Route, async_playwright)
+from playwright_stealth import stealth_async
+
+from scraper.http_client import DEFAULT_USER_AGENT, HttpClient
+from scraper.metrics import METRICS
+from scraper.response_cache import ResponseCache
+from scraper.site_profiles import ProfileStore
 
 VIEWPORT = {"width": 1280, "height": 720}
 
+DEFAULT_BROWSER_COUNT = 1
+DEFAULT_PAGES_PER_BROWSER = 3
+DEFAULT_MAX_PAGE_USES = 50
+
+# Resource types answered from the response cache; scripts, styles and
+# media are left to the browser's own cache
+CACHED_RESOURCE_TYPES = {"document"}
+
+# Resource types a chapter never needs: the scrapers only read the DOM.
+# Stylesheets stay, since innerText depends on them for hidden elements.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "texttrack", "manifest"})
+
+# Ad networks, analytics and trackers commonly found on novel sites;
+# subdomains are blocked along with the domain itself
+BLOCKED_DOMAINS = frozenset({
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com",
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com",
+    "adservice.google.com", "amazon-adsystem.com", "adnxs.com", "criteo.com",
+    "criteo.net", "pubmatic.com", "rubiconproject.com", "openx.net", "taboola.com",
+    "outbrain.com", "scorecardresearch.com", "quantserve.com", "quantcount.com",
+    "hotjar.com", "facebook.net", "mc.yandex.ru",
+    "popads.net", "popcash.net", "propellerads.com", "adsterra.com", "exoclick.com",
+    "juicyads.com", "mgid.com", "revcontent.com", "disqus.com", "disquscdn.com",
+    "cloudflareinsights.com", "statcounter.com", "histats.com",
+})
+
+
+def _host_matches(host: str, domains: FrozenSet[str]) -> bool:
+    """Whether `host` is one of `domains` or a subdomain of one."""
+    parts = host.split(".")
+    return any(".".join(parts[i:]) in domains for i in range(len(parts)))
+
+
+@dataclass(frozen=True)
+class RequestFilter:
+    """
+    Decides which sub-resource requests of a page are aborted.
 
-async def create_stealth_context(browser: Browser) -> BrowserContext:
+    A request is blocked when its resource type is in `blocked_types` or its
+    host is (a subdomain of) one of `blocked_domains`, unless the host is
+    listed in `allowed_domains`. Page documents are never blocked by type.
+    """
+    blocked_types: FrozenSet[str] = BLOCKED_RESOURCE_TYPES
+    blocked_domains: FrozenSet[str] = BLOCKED_DOMAINS
+    allowed_domains: FrozenSet[str] = field(default_factory=frozenset)
+
+    def extend(self, block: Optional[List[str]] = None, allow: Optional[List[str]] = None,
+               load_resources: bool = False) -> "RequestFilter":
+        """
+        Returns a copy with extra blocked and allowed domains; `load_resources`
+        lets every resource type through so only domains are filtered.
+        """
+        return RequestFilter(
+            blocked_types=frozenset() if load_resources else self.blocked_types,
+            blocked_domains=self.blocked_domains | {d.lower() for d in block or []},
+            allowed_domains=self.allowed_domains | {d.lower() for d in allow or []},
+        )
+
+    def blocks(self, url: str, resource_type: str) -> bool:
+        """Whether a request for `url` of `resource_type` should be aborted."""
+        host = (urlparse(url).hostname or "").lower()
+        if self.allowed_domains and _host_matches(host, self.allowed_domains):
+            return False
+        if resource_type != "document" and resource_type in self.blocked_types:
+            return True
+        return _host_matches(host, self.blocked_domains)
+
+
+DEFAULT_REQUEST_FILTER = RequestFilter()
+
+
+async def create_stealth_context(browser: Browser,
+                                 request_filter: Optional[RequestFilter] = DEFAULT_REQUEST_FILTER,
+                                 cache: Optional[ResponseCache] = None,
+                                 blocked: Optional[Counter] = None) -> BrowserContext:
     """
     Creates a new browser context with spoofed headers and stealth enabled.
+
+    Args:
+        browser (Browser): Browser to open the context in.
+        request_filter (RequestFilter, optional): Sub-resources to abort;
+            None loads everything.
+        cache (ResponseCache, optional): Cache serving page documents.
+        blocked (Counter, optional): Counts aborted requests per resource type.
     """
     context = await browser.new_context(
         user_agent=DEFAULT_USER_AGENT,
         viewport=VIEWPORT,
         locale="en-US"
     )
+    if request_filter is not None or cache is not None:
+        await context.route("**/*", request_route_handler(request_filter, cache, blocked))
     return context
+
+
+def cache_route_handler(cache: ResponseCache, revalidate: bool = False
+                        ) -> Callable[[Route], Awaitable[None]]:
+    """
+    Builds a `context.route` handler that serves page documents from `cache`,
+    revalidating stale entries and storing fresh downloads. With `revalidate`,
+    fresh entries are revalidated too, unless the cache is offline.
+    """
+    async def handle(route: Route) -> None:
+        request = route.request
+        if request.method != "GET" or request.resource_type not in CACHED_RESOURCE_TYPES:
+            await route.continue_()
+            return
+
+        entry = cache.lookup(request.url)
+        if entry is not None and entry.fresh and (cache.offline or not revalidate):
+            await route.fulfill(status=entry.status, content_type=entry.content_type,
+                                body=entry.body)
+            return
+
+        headers = {**request.headers, **(entry.validators() if entry is not None else {})}
+        try:
+            response = await route.fetch(headers=headers)
+        except PlaywrightError as e:
+            if entry is None:
+                await route.abort("failed")
+                return
+            print(f"[WARN] Serving stale cached copy of {request.url}: {e}")
+            await route.fulfill(status=entry.status, content_type=entry.content_type,
+                                body=entry.body)
+            return
+
+        if response.status == 304 and entry is not None:
+            cache.refresh(request.url)
+            await route.fulfill(status=entry.status, content_type=entry.content_type,
+                                body=entry.body)
+            return
+
+        body = await response.body()
+        cache.store(request.url, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+
+    return handle
+
+
+def request_route_handler(request_filter: Optional[RequestFilter],
+                          cache: Optional[ResponseCache] = None,
+                          blocked: Optional[Counter] = None
+                          ) -> Callable[[Route], Awaitable[None]]:
+    """
+    Builds a `context.route` handler that aborts the requests `request_filter`
+    blocks and passes the rest through the response cache, if any.
+    """
+    cached = cache_route_handler(cache) if cache is not None else None
+
+    async def handle(route: Route) -> None:
+        request = route.request
+        if request_filter is not None and request_filter.blocks(request.url,
+                                                                request.resource_type):
+            if blocked is not None:
+                blocked[request.resource_type] += 1
+            await route.abort("blockedbyclient")
+        elif cached is not None:
+            await cached(route)
+        else:
+            await route.continue_()
+
+    return handle
+
+
+def revalidate_route_handler(cache: ResponseCache,
+                             request_filter: Optional[RequestFilter] = None
+                             ) -> Callable[[Route], Awaitable[None]]:
+    """
+    Builds a `page.route` handler that revalidates cached page documents even
+    while they are fresh, for pages whose content changes between runs. It
+    leaves blocked requests to the context's handler.
+    """
+    revalidating = cache_route_handler(cache, revalidate=True)
+
+    async def handle(route: Route) -> None:
+        request = route.request
+        if request_filter is not None and request_filter.blocks(request.url,
+                                                                request.resource_type):
+            await route.fallback()
+        else:
+            await revalidating(route)
+
+    return handle
+
+
+class BrowserPool:
+    """
+    Keeps a fixed number of Chromium instances alive and hands out
+    stealth-configured pages to the scrapers.
+
+    Browsers are launched lazily on the first page request, so a run that
+    never needs a browser never pays for one. Pages are returned to the pool
+    after each use and replaced once they have served `max_page_uses` chapters.
+    The pool also owns the shared `HttpClient` used by browserless scrapers.
+    Given a `ResponseCache`, both the HTTP client and every browser context
+    read page documents through it. Browser contexts abort the sub-resources
+    matched by `request_filter` (images, fonts, ads and trackers by default);
+    `blocked` counts them per resource type. `profiles` gives the scrapers
+    the site extraction profiles to use and learn.
+
+    Usage:
+        async with BrowserPool(browsers=2) as pool:
+            async with pool.page() as page:
+                await page.goto(url)
+    """
+
+    def __init__(self, browsers: int = DEFAULT_BROWSER_COUNT,
+                 pages_per_browser: int = DEFAULT_PAGES_PER_BROWSER,
+                 max_page_uses: int = DEFAULT_MAX_PAGE_USES,
+                 headless: bool = True,
+                 cache: Optional[ResponseCache] = None,
+                 request_filter: Optional[RequestFilter] = DEFAULT_REQUEST_FILTER,
+                 profiles: Optional[ProfileStore] = None):
+        self.browser_count = max(1, browsers)
+        self.pages_per_browser = max(1, pages_per_browser)
+        self.max_page_uses = max(1, max_page_uses)
+        self.headless = headless
+        self.cache = cache
+        self.request_filter = request_filter
+        self.profiles = profiles
+        self.blocked: Counter = Counter()
+
+        self._playwright: Optional[Playwright] = None
+        self._http: Optional[HttpClient] = None
+        self._browsers: List[Browser] = []
+        self._contexts: List[BrowserContext] = []
+        self._idle: List[Page] = []
+        self._uses: Dict[Page, int] = {}
+        self._next_context = 0
+        self._slots = asyncio.Semaphore(self.browser_count * self.pages_per_browser)
+        self._start_lock = asyncio.Lock()
+        self._closed = False
+
+    async def __aenter__(self) -> "BrowserPool":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of pages handed out at the same time."""
+        return self.browser_count * self.pages_per_browser
+
+    @property
+    def http(self) -> HttpClient:
+        """Pooled HTTP client sharing the pool's lifetime."""
+        if self._http is None:
+            self._http = HttpClient(connection_limit=self.capacity * 4, cache=self.cache)
+        return self._http
+
+    async def start(self) -> None:
+        """
+        Launches the browsers and their stealth contexts if not running yet.
+        """
+        async with self._start_lock:
+            if self._closed:
+                raise RuntimeError("BrowserPool has been closed")
+            if self._playwright:
+                return
+
+            self._playwright = await async_playwright().start()
+            for _ in range(self.browser_count):
+                with METRICS.stage("browser.launch"):
+                    browser = await self._playwright.chromium.launch(headless=self.headless)
+                    self._browsers.append(browser)
+                    context = await create_stealth_context(browser, self.request_filter,
+                                                           self.cache, self.blocked)
+                self._contexts.append(context)
+            print(f"[INFO] Browser pool started: {self.browser_count} browser(s), "
+                  f"{self.capacity} page slot(s)")
+
+    async def close(self) -> None:
+        """
+        Closes every page, context and browser owned by the pool.
+        """
+        self._closed = True
+        if self.blocked:
+            print(f"[INFO] Blocked {sum(self.blocked.values())} sub-resource request(s): "
+                  + ", ".join(f"{n} {kind}" for kind, n in self.blocked.most_common()))
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+        for browser in self._browsers:
+            try:
+                await browser.close()
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"[WARN] Failed to close browser: {e}")
+        if self._playwright:
+            await self._playwright.stop()
+
+        self._browsers.clear()
+        self._contexts.clear()
+        self._idle.clear()
+        self._uses.clear()
+        self._playwright = None
+
+    async def _new_page(self) -> Page:
+        context = self._contexts[self._next_context % len(self._contexts)]
+        self._next_context += 1
+        with METRICS.stage("browser.new_page"):
+            page = await context.new_page()
+            await stealth_async(page)
+        self._uses[page] = 0
+        return page
+
+    async def _retire_page(self, page: Page) -> None:
+        self._uses.pop(page, None)
+        try:
+            await page.close()
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    @asynccontextmanager
+    async def page(self, revalidate: bool = False) -> AsyncIterator[Page]:
+        """
+        Leases a page from the pool for the duration of the `async with` block.
+
+        A page that raised or has reached `max_page_uses` is closed instead of
+        being returned, and a fresh one is opened on the next lease. With
+        `revalidate`, documents the page loads are revalidated against the
+        server even when the response cache holds a fresh copy.
+        """
+        await self.start()
+        with METRICS.stage("browser.page_wait"):
+            await self._slots.acquire()
+        try:
+            page = self._idle.pop() if self._idle else await self._new_page()
+            healthy = False
+            handler = (revalidate_route_handler(self.cache, self.request_filter)
+                       if revalidate and self.cache is not None else None)
+            try:
+                if handler is not None:
+                    await page.route("**/*", handler)
+                yield page
+                if handler is not None and not page.is_closed():
+                    await page.unroute("**/*", handler)
+                healthy = not page.is_closed()
+            finally:
+                self._uses[page] = self._uses.get(page, 0) + 1
+                if healthy and not self._closed and self._uses[page] < self.max_page_uses:
+                    self._idle.append(page)
+                else:
+                    await self._retire_page(page)
+        finally:
+            self._slots.release()
+
+
+@asynccontextmanager
+async def single_use_page() -> AsyncIterator[Page]:
+    """
+    Launches a dedicated browser for a single page and tears it down afterwards.
+    """
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            context = await create_stealth_context(browser)
+            page = await context.new_page()
+            await stealth_async(page)
+            yield page
+        finally:
+            await browser.close()
+
+
+def lease_page(pool: Optional[BrowserPool] = None):
+    """
+    Returns an async context manager yielding a page, taken from `pool` when
+    given or from a freshly launched browser otherwise.
+    """
+    return pool.page() if pool else single_use_page()
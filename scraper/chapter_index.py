@@ -0,0 +1,181 @@
+"""
+Canonical chapter URLs and chapter numbers, used to deduplicate and order
+the links of a novel's ToC before any chapter is fetched.
+
+ToC pages link the same chapter in several spellings (http and https, with
+or without "www.", a trailing slash, a fragment, tracking parameters) and
+often twice, in a "latest chapters" widget and in the chapter list.
+`canonical_url` maps every spelling to one key, so each chapter is fetched
+once.
+
+Chapter numbers come from the link text ("Chapter 12: ...", "Ch. 12.5",
+"12 - Title") and from the URL, where only the number that runs along with
+the ToC's links counts: a novel ID repeated in every link does not, and
+neither does a digit in a title slug. The ToC's own order is kept unless
+one of those sources shows, without a single repeat or step back, that the
+ToC lists the newest chapter first; then it is read backwards. Numbers that
+restart (per volume, say) or jump around never reorder the chapters.
+"""
+import re
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Only names that are never part of a page's address; "ref", "from" or "source"
+# can be (read.php?id=5&from=3), so they are kept
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid"}
+TRACKING_PREFIXES = ("utm_",)
+
+NUMBER = re.compile(r"\d+(?:\.\d+)?")
+# "chapter-12", "ch_12", "episode/12", "c12" in URLs, but not "arc-3" or "step-2"
+URL_KEYWORD_NUMBER = re.compile(r"(?<![a-z])(?:chapter|chap|ch|episode|ep|c)[-_/]?"
+                                r"(\d+(?:\.\d+)?)", re.IGNORECASE)
+# "Chapter 12", "Ch. 12.5", "Episode #12" anywhere in the link text, or a leading "12."
+TEXT_KEYWORD_NUMBER = re.compile(r"\b(?:chapter|chap|ch|episode|ep|part)\.?\s*#?\s*"
+                                 r"(\d+(?:\.\d+)?)", re.IGNORECASE)
+TEXT_LEADING_NUMBER = re.compile(r"^\s*(\d+(?:\.\d+)?)\b")
+
+
+def canonical_url(url: str) -> str:
+    """
+    Key under which every spelling of a chapter URL is the same: no scheme,
+    lowercase host without "www." or a default port, no fragment, no
+    trailing slash or repeated slashes, and the query without tracking
+    parameters, sorted.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    path = re.sub(r"/{2,}", "/", parts.path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if name.lower() not in TRACKING_PARAMS
+                   and not name.lower().startswith(TRACKING_PREFIXES))
+    return f"{host}{path or '/'}" + (f"?{urlencode(query)}" if query else "")
+
+
+def spelling_rank(url: str) -> tuple:
+    """Sort key among spellings of one URL: https first, then the shortest."""
+    return not url.startswith("https:"), len(url)
+
+
+def text_number(text: Optional[str]) -> Optional[float]:
+    """The chapter number in a link text, or None."""
+    if not text:
+        return None
+    match = TEXT_KEYWORD_NUMBER.search(text) or TEXT_LEADING_NUMBER.match(text)
+    return float(match.group(1)) if match else None
+
+
+def url_numbers(urls: Sequence[str]) -> List[Optional[float]]:
+    """
+    The chapter number in each of a ToC's URLs (in ToC order): the one after
+    a "chapter" keyword, otherwise the number at the position, counted from
+    either end of the path and query, whose values best follow the ToC order.
+    """
+    numbers = []
+    for url in urls:
+        parts = urlsplit(url)
+        numbers.append([float(number) for number in
+                        NUMBER.findall(f"{parts.path}?{parts.query}")])
+
+    candidates = [[found[position] if position < len(found) else None for found in numbers]
+                  for position in range(max(map(len, numbers), default=0))]
+    candidates += [[found[-position] if position <= len(found) else None for found in numbers]
+                   for position in range(1, max(map(len, numbers), default=0) + 1)]
+    # Ties go to the position that counts up one chapter at a time most often
+    varying = max(candidates, key=lambda values: (abs(agreement(values)), unit_steps(values)),
+                  default=[None] * len(urls))
+
+    resolved = []
+    for url, number in zip(urls, varying):
+        keyword = URL_KEYWORD_NUMBER.search(urlsplit(url).path)
+        resolved.append(float(keyword.group(1)) if keyword else number)
+    return resolved
+
+
+def agreement(numbers: Sequence[Optional[float]]) -> int:
+    """
+    How many consecutive numbered links follow the ToC's dominant direction;
+    positive when numbers increase down the ToC, negative when they decrease.
+    """
+    known = [number for number in numbers if number is not None]
+    rising = sum(b > a for a, b in zip(known, known[1:]))
+    falling = sum(b < a for a, b in zip(known, known[1:]))
+    return rising if rising >= falling else -falling
+
+
+def direction(numbers: Sequence[Optional[float]]) -> int:
+    """
+    1 when the numbered links strictly increase down the ToC, -1 when they
+    strictly decrease, 0 when a number repeats, the direction changes or
+    fewer than two links are numbered.
+    """
+    known = [number for number in numbers if number is not None]
+    steps = {(b > a) - (b < a) for a, b in zip(known, known[1:])}
+    return steps.pop() if len(steps) == 1 and 0 not in steps else 0
+
+
+def unit_steps(numbers: Sequence[Optional[float]]) -> int:
+    """How many consecutive numbered links differ by exactly one."""
+    known = [number for number in numbers if number is not None]
+    return sum(abs(b - a) == 1 for a, b in zip(known, known[1:]))
+
+
+def order_chapters(urls: Sequence[str], texts: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Deduplicates a ToC's links by `canonical_url` and puts them in reading
+    order: ToC order, or reversed when the chapter numbers from the link
+    texts or the URLs strictly decrease down the ToC (see `direction`).
+
+    Args:
+        urls: Chapter links in ToC order, pages in page order.
+        texts: Link text per URL, when known.
+
+    Returns:
+        List[str]: One URL per chapter (its https spelling with the least
+            decoration, see `spelling_rank`), in reading order.
+    """
+    texts = texts or {}
+    chosen: Dict[str, str] = {}
+    text_of: Dict[str, str] = {}
+    for url in urls:
+        key = canonical_url(url)
+        seen = chosen.pop(key, url)
+        # A repeated link takes the place of its last occurrence, so a "latest
+        # chapters" widget above the chapter list does not decide the order
+        chosen[key] = min(seen, url, key=spelling_rank)
+        text = texts.get(url)
+        if text and (key not in text_of or text_number(text_of[key]) is None):
+            text_of[key] = text
+    unique = list(chosen.values())
+
+    from_text = [text_number(text_of.get(key)) for key in chosen]
+    from_url = url_numbers(unique)
+    # The source numbering more links decides; both must be free of repeats and reversals
+    numbers = max(from_text, from_url,
+                  key=lambda candidate: (direction(candidate) != 0,
+                                         sum(number is not None for number in candidate)))
+    # Walking a newest-first ToC backwards keeps unnumbered links after their predecessor
+    return unique[::-1] if direction(numbers) < 0 else unique
+
+
+def follows(known: Sequence[str], new: Sequence[str]) -> bool:
+    """
+    Whether the chapters at `new` URLs all come after the last of the
+    `known` ones (given in reading order), judged by their URL numbers.
+    """
+    if not known or not new:
+        return True
+    # Enough of the stored tail to tell which URL number is the chapter's
+    tail = list(known[-len(new) - 1:])
+    numbers = url_numbers(tail + list(new))
+    last, added = numbers[len(tail) - 1], numbers[len(tail):]
+    return last is not None and None not in added and min(added) > last
@@ -0,0 +1,587 @@
+"""
+Pluggable storage for scraped chapters.
+
+Every backend stores the chapter records written by the orchestrator
+({ "number", "title", "content", "source_url" }) keyed by their canonical
+index, looks them up by index or source URL, and streams them back in index
+order for conversion:
+
+- "json": the original layout, one `chapters/<index>.json` file per chapter.
+- "log": a single append-only `chapters.log` of zlib-compressed records,
+  indexed in memory when opened. Only the writer holding `chapters.log.lock`
+  drops torn records and compacts the log.
+- "sqlite": a `chapters.sqlite` table keyed by index with a URL index.
+
+Run this module to move existing novels between backends:
+    python -m scraper.chapter_store output/my-novel --to log --remove-source
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from scraper.manifest import CHAPTERS_SUBDIR, chapter_filename
+
+STORE_JSON = "json"
+STORE_LOG = "log"
+STORE_SQLITE = "sqlite"
+DEFAULT_STORE = STORE_LOG
+
+LOG_NAME = "chapters.log"
+LOCK_NAME = "chapters.log.lock"
+SQLITE_NAME = "chapters.sqlite"
+COMPRESSION_LEVEL = 6
+
+# Log record: header length, body length, JSON header, zlib-compressed JSON body
+RECORD_PREFIX = struct.Struct(">II")
+
+
+def encode_chapter(chapter: Dict) -> bytes:
+    """Compressed form of a chapter record used by the single-file backends."""
+    return zlib.compress(json.dumps(chapter, ensure_ascii=False).encode("utf-8"),
+                         COMPRESSION_LEVEL)
+
+
+def decode_chapter(data: bytes) -> Dict:
+    """Inverse of `encode_chapter`."""
+    return json.loads(zlib.decompress(data))
+
+
+class ChapterStore(ABC):
+    """
+    Interface shared by the chapter store backends. A backend missing one of
+    the abstract methods fails when it is created.
+
+    Usage:
+        with open_store(novel_dir) as store:
+            store.put(3, {"number": 3, "title": ..., "content": ..., "source_url": url})
+            chapter = store.get_by_url(url)
+            for chapter in store.iter_chapters():
+                ...
+
+    A store opened with `read_only=True` must not be written to and leaves
+    the files exactly as it found them.
+    """
+    name = ""
+
+    def __init__(self, novel_dir: Path, read_only: bool = False):
+        self.novel_dir = Path(novel_dir)
+        self.read_only = read_only
+
+    def __enter__(self) -> "ChapterStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    @classmethod
+    @abstractmethod
+    def exists(cls, novel_dir: Path) -> bool:
+        """Whether `novel_dir` holds chapters in this backend's layout."""
+
+    @abstractmethod
+    def put(self, index: int, chapter: Dict) -> None:
+        """Stores `chapter` at `index`, replacing any chapter there or at its old index."""
+
+    @abstractmethod
+    def get(self, index: int) -> Optional[Dict]:
+        """The chapter at `index`, or None."""
+
+    @abstractmethod
+    def get_by_url(self, url: str) -> Optional[Dict]:
+        """The chapter scraped from `url`, or None."""
+
+    @abstractmethod
+    def indexes(self) -> List[int]:
+        """Stored chapter indexes in ascending order."""
+
+    def iter_chapters(self, start: int = 0) -> Iterator[Dict]:
+        """Yields stored chapters with index >= `start`, one at a time, in index order."""
+        for index in self.indexes():
+            if index >= start:
+                chapter = self.get(index)
+                if chapter is not None:
+                    yield chapter
+
+    def move(self, moves: List[Tuple[str, int, int]]) -> List[str]:
+        """
+        Re-keys stored chapters after their ToC position changed, without
+        fetching them again.
+
+        Each chapter is read by URL, so an old index that no longer holds it
+        does no harm. Chapters are moved in an order that never overwrites one
+        still waiting to move. A cycle of moves is opened by parking one
+        chapter in a spare slot past every index.
+
+        Args:
+            moves: (source URL, old index, new index) per chapter.
+
+        Returns:
+            List[str]: URLs of the chapters that were not in the store.
+        """
+        target = {old: new for _, old, new in moves if old != new}
+        url_at = {old: url for url, old, new in moves if old != new}
+        source = {new: old for old, new in target.items()}
+        missing = []
+        spare = max([*self.indexes(), *target.values(), 0]) + 1
+
+        def relocate(url: str, index: int) -> bool:
+            chapter = self.get_by_url(url)
+            if chapter is None:
+                return False
+            self.put(index, {**chapter, "number": index})
+            return True
+
+        ready = [old for old, new in target.items() if new not in target]
+        while target:
+            parked = None
+            if not ready:
+                # Only cycles are left
+                old = next(iter(target))
+                parked = (url_at[old], target.pop(old))
+                relocate(parked[0], spare)
+                ready.append(source[old])
+            while ready:
+                old = ready.pop()
+                new = target.pop(old)
+                if not relocate(url_at[old], new):
+                    missing.append(url_at[old])
+                if old in source and source[old] in target:
+                    ready.append(source[old])
+            if parked is not None and not relocate(*parked):
+                missing.append(parked[0])
+        return missing
+
+    @abstractmethod
+    def location(self, index: int) -> str:
+        """Where the chapter at `index` lives, for log messages."""
+
+    @abstractmethod
+    def destroy(self) -> None:
+        """Closes the store and deletes its files."""
+
+    def close(self) -> None:
+        """Flushes and releases any open files."""
+
+
+class JsonChapterStore(ChapterStore):
+    """
+    One pretty-printed JSON file per chapter under `chapters/`. The URL map is
+    built on first use by reading every file.
+    """
+    name = STORE_JSON
+
+    def __init__(self, novel_dir: Path, read_only: bool = False):
+        super().__init__(novel_dir, read_only)
+        self.chapters_dir = self.novel_dir / CHAPTERS_SUBDIR
+        self._by_url: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def exists(cls, novel_dir: Path) -> bool:
+        return any((Path(novel_dir) / CHAPTERS_SUBDIR).glob("*.json"))
+
+    def _url_map(self) -> Dict[str, int]:
+        if self._by_url is None:
+            self._by_url = {}
+            for index in self.indexes():
+                chapter = self.get(index)
+                if chapter and chapter.get("source_url"):
+                    self._by_url[chapter["source_url"]] = index
+        return self._by_url
+
+    def put(self, index: int, chapter: Dict) -> None:
+        self.chapters_dir.mkdir(parents=True, exist_ok=True)
+        url = chapter.get("source_url")
+        by_url = self._url_map()
+        old_index = by_url.get(url)
+        with open(self.chapters_dir / chapter_filename(index), "w", encoding="utf-8") as f:
+            json.dump(chapter, f, ensure_ascii=False, indent=2)
+        if old_index is not None and old_index != index:
+            (self.chapters_dir / chapter_filename(old_index)).unlink(missing_ok=True)
+        if url:
+            by_url[url] = index
+
+    def get(self, index: int) -> Optional[Dict]:
+        try:
+            with open(self.chapters_dir / chapter_filename(index), "r", encoding="utf-8") as f:
+                chapter = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        # The file name is authoritative for files written before the store existed
+        chapter["number"] = index
+        return chapter
+
+    def get_by_url(self, url: str) -> Optional[Dict]:
+        index = self._url_map().get(url)
+        return self.get(index) if index is not None else None
+
+    def indexes(self) -> List[int]:
+        return sorted(int(path.stem) for path in self.chapters_dir.glob("*.json")
+                      if path.stem.isdigit())
+
+    def location(self, index: int) -> str:
+        return str(self.chapters_dir / chapter_filename(index))
+
+    def destroy(self) -> None:
+        for path in self.chapters_dir.glob("*.json"):
+            path.unlink()
+
+
+class LogChapterStore(ChapterStore):
+    """
+    Single append-only file of compressed chapter records.
+
+    Opening the store scans only the small record headers to build the
+    index → offset and URL → index maps; bodies are read on demand. A
+    replaced or deleted chapter leaves a dead record behind, and the log is
+    rewritten on close once dead records outweigh live ones.
+
+    Only one writer at a time maintains the log: the one that created the
+    lock file. It drops the partial record a crash leaves at the end and
+    compacts the log. Read-only stores and writers without the lock skip
+    an incomplete tail instead, as it may be another writer's append.
+    """
+    name = STORE_LOG
+
+    def __init__(self, novel_dir: Path, read_only: bool = False):
+        super().__init__(novel_dir, read_only)
+        self.path = self.novel_dir / LOG_NAME
+        self.lock_path = self.novel_dir / LOCK_NAME
+        # index -> (body offset, body length, whole record length)
+        self._offsets: Dict[int, Tuple[int, int, int]] = {}
+        self._urls: Dict[int, str] = {}
+        self._by_url: Dict[str, int] = {}
+        self._live_bytes = 0
+        self._dead_bytes = 0
+        self._fp = None
+        self._lock_fd: Optional[int] = None
+        if not read_only:
+            self._lock()
+        if self.path.exists():
+            self._scan()
+
+    @classmethod
+    def exists(cls, novel_dir: Path) -> bool:
+        return (Path(novel_dir) / LOG_NAME).exists()
+
+    def _file(self):
+        if self._fp is None:
+            if self.read_only:
+                self._fp = open(self.path, "rb")
+            else:
+                self.novel_dir.mkdir(parents=True, exist_ok=True)
+                self._fp = open(self.path, "a+b")
+        return self._fp
+
+    def _lock(self) -> None:
+        """Creates the lock file unless another running writer holds it."""
+        self.novel_dir.mkdir(parents=True, exist_ok=True)
+        for _ in range(2):
+            try:
+                self._lock_fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._lock_is_stale():
+                    break
+                continue
+            os.write(self._lock_fd, str(os.getpid()).encode("ascii"))
+            return
+        print(f"[WARN] {self.lock_path.name} is held by another writer; "
+              f"leaving {self.path.name} uncompacted.")
+
+    def _lock_is_stale(self) -> bool:
+        """Whether the writer that created the lock file has exited; removes it if so."""
+        if os.name == "posix":
+            try:
+                os.kill(int(self.lock_path.read_text(encoding="ascii")), 0)
+            except (ProcessLookupError, FileNotFoundError):
+                pass
+            except (OSError, ValueError):
+                # Not ours to signal, or created but not written yet
+                return False
+            else:
+                return False
+        # On Windows the running writer keeps the file open, so it cannot be removed
+        try:
+            self.lock_path.unlink(missing_ok=True)
+        except PermissionError:
+            return False
+        return True
+
+    def _unlock(self) -> None:
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+            self.lock_path.unlink(missing_ok=True)
+
+    def _scan(self) -> None:
+        f = self._file()
+        f.seek(0)
+        end = os.fstat(f.fileno()).st_size
+        offset = 0
+        while offset + RECORD_PREFIX.size <= end:
+            header_len, body_len = RECORD_PREFIX.unpack(f.read(RECORD_PREFIX.size))
+            record_end = offset + RECORD_PREFIX.size + header_len + body_len
+            if record_end > end:
+                break
+            try:
+                header = json.loads(f.read(header_len))
+            except ValueError:
+                break
+            self._apply(header, record_end - body_len, body_len,
+                        record_end - offset)
+            f.seek(record_end)
+            offset = record_end
+
+        if offset < end and self._lock_fd is not None:
+            # A crash mid-append leaves a partial record; drop it
+            print(f"[WARN] Truncating {end - offset} byte(s) of incomplete records "
+                  f"from {self.path.name}")
+            f.truncate(offset)
+
+    def _apply(self, header: Dict, body_offset: int, body_len: int, record_len: int) -> None:
+        index = header["index"]
+        if index in self._offsets:
+            self._forget(index)
+        url = header.get("url")
+        if header.get("deleted"):
+            self._dead_bytes += record_len
+            return
+        if url in self._by_url:
+            self._forget(self._by_url[url])
+        self._offsets[index] = (body_offset, body_len, record_len)
+        self._urls[index] = url
+        if url:
+            self._by_url[url] = index
+        self._live_bytes += record_len
+
+    def _forget(self, index: int) -> None:
+        _, _, record_len = self._offsets.pop(index)
+        url = self._urls.pop(index)
+        if url and self._by_url.get(url) == index:
+            del self._by_url[url]
+        self._live_bytes -= record_len
+        self._dead_bytes += record_len
+
+    def _append(self, header: Dict, body: bytes = b"") -> None:
+        f = self._file()
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        f.seek(0, os.SEEK_END)
+        offset = f.tell()
+        f.write(RECORD_PREFIX.pack(len(header_bytes), len(body)) + header_bytes + body)
+        f.flush()
+        self._apply(header, offset + RECORD_PREFIX.size + len(header_bytes), len(body),
+                    RECORD_PREFIX.size + len(header_bytes) + len(body))
+
+    def put(self, index: int, chapter: Dict) -> None:
+        self._append({"index": index, "url": chapter.get("source_url")}, encode_chapter(chapter))
+
+    def delete(self, index: int) -> None:
+        """Removes the chapter at `index` by appending a tombstone record."""
+        if index in self._offsets:
+            self._append({"index": index, "deleted": True})
+
+    def get(self, index: int) -> Optional[Dict]:
+        location = self._offsets.get(index)
+        if location is None:
+            return None
+        f = self._file()
+        f.seek(location[0])
+        return decode_chapter(f.read(location[1]))
+
+    def get_by_url(self, url: str) -> Optional[Dict]:
+        index = self._by_url.get(url)
+        return self.get(index) if index is not None else None
+
+    def indexes(self) -> List[int]:
+        return sorted(self._offsets)
+
+    def location(self, index: int) -> str:
+        return f"{self.path}#{index}"
+
+    def compact(self) -> None:
+        """Rewrites the log with only the live records, in index order."""
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as out:
+            for index in self.indexes():
+                f = self._file()
+                body_offset, body_len, _ = self._offsets[index]
+                f.seek(body_offset)
+                body = f.read(body_len)
+                header = json.dumps({"index": index, "url": self._urls[index]},
+                                    ensure_ascii=False).encode("utf-8")
+                out.write(RECORD_PREFIX.pack(len(header), len(body)) + header + body)
+        self._fp.close()
+        self._fp = None
+        os.replace(tmp_path, self.path)
+
+        self._offsets.clear()
+        self._urls.clear()
+        self._by_url.clear()
+        self._live_bytes = self._dead_bytes = 0
+        self._scan()
+
+    def destroy(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        if (self._fp is not None and self._lock_fd is not None
+                and self._dead_bytes > self._live_bytes):
+            self.compact()
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+        self._unlock()
+
+
+class SqliteChapterStore(ChapterStore):
+    """
+    One SQLite table with the index as primary key, an index on the source
+    URL and the chapter record as a compressed blob.
+    """
+    name = STORE_SQLITE
+
+    def __init__(self, novel_dir: Path, read_only: bool = False):
+        super().__init__(novel_dir, read_only)
+        self.path = self.novel_dir / SQLITE_NAME
+        if read_only:
+            self._db = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+            return
+        self.novel_dir.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS chapters ("
+                         "idx INTEGER PRIMARY KEY, url TEXT, body BLOB NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS chapters_url ON chapters (url)")
+
+    @classmethod
+    def exists(cls, novel_dir: Path) -> bool:
+        return (Path(novel_dir) / SQLITE_NAME).exists()
+
+    def put(self, index: int, chapter: Dict) -> None:
+        url = chapter.get("source_url")
+        with self._db:
+            if url:
+                self._db.execute("DELETE FROM chapters WHERE url = ? AND idx != ?", (url, index))
+            self._db.execute("INSERT OR REPLACE INTO chapters (idx, url, body) VALUES (?, ?, ?)",
+                             (index, url, encode_chapter(chapter)))
+
+    def get(self, index: int) -> Optional[Dict]:
+        row = self._db.execute("SELECT body FROM chapters WHERE idx = ?", (index,)).fetchone()
+        return decode_chapter(row[0]) if row else None
+
+    def get_by_url(self, url: str) -> Optional[Dict]:
+        row = self._db.execute("SELECT body FROM chapters WHERE url = ?", (url,)).fetchone()
+        return decode_chapter(row[0]) if row else None
+
+    def indexes(self) -> List[int]:
+        return [row[0] for row in self._db.execute("SELECT idx FROM chapters ORDER BY idx")]
+
+    def iter_chapters(self, start: int = 0) -> Iterator[Dict]:
+        cursor = self._db.execute("SELECT body FROM chapters WHERE idx >= ? ORDER BY idx",
+                                  (start,))
+        for (body,) in cursor:
+            yield decode_chapter(body)
+
+    def location(self, index: int) -> str:
+        return f"{self.path}#{index}"
+
+    def destroy(self) -> None:
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+STORE_BACKENDS = {
+    STORE_LOG: LogChapterStore,
+    STORE_SQLITE: SqliteChapterStore,
+    STORE_JSON: JsonChapterStore,
+}
+
+
+def detect_store(novel_dir: Path, read_only: bool = False) -> Optional[ChapterStore]:
+    """
+    Opens the store already holding the chapters of `novel_dir`, if any.
+    Pass `read_only` when nothing will be written, e.g. for `status` or a
+    conversion, so a scrape running at the same time keeps the files to itself.
+    """
+    for backend in STORE_BACKENDS.values():
+        if backend.exists(novel_dir):
+            return backend(novel_dir, read_only)
+    return None
+
+
+def open_store(novel_dir: Path, backend: str = DEFAULT_STORE) -> ChapterStore:
+    """
+    Opens the chapter store of `novel_dir`. A novel that already has chapters
+    keeps its existing backend; `backend` is used for new ones.
+    """
+    store = detect_store(novel_dir)
+    if store is None:
+        return STORE_BACKENDS[backend](novel_dir)
+    if store.name != backend:
+        print(f"[INFO] Keeping the existing '{store.name}' chapter store in {novel_dir}; "
+              f"run `python -m scraper.chapter_store {novel_dir} --to {backend}` to migrate.")
+    return store
+
+
+def migrate_store(novel_dir: Path, target: str, remove_source: bool = False) -> int:
+    """
+    Copies every chapter of `novel_dir` into a `target` store.
+
+    Args:
+        novel_dir (Path): Novel folder.
+        target (str): Backend name to migrate to.
+        remove_source (bool): Delete the old store once the copy is complete.
+
+    Returns:
+        int: Number of chapters copied.
+    """
+    source = detect_store(novel_dir)
+    if source is None or source.name == target:
+        print(f"[INFO] Nothing to migrate in {novel_dir}.")
+        if source is not None:
+            source.close()
+        return 0
+
+    copied = 0
+    with STORE_BACKENDS[target](novel_dir) as destination:
+        for chapter in source.iter_chapters():
+            destination.put(chapter["number"], chapter)
+            copied += 1
+    print(f"[INFO] Migrated {copied} chapter(s) in {novel_dir} from '{source.name}' "
+          f"to '{target}'.")
+
+    if remove_source:
+        source.destroy()
+        if isinstance(source, JsonChapterStore):
+            shutil.rmtree(source.chapters_dir, ignore_errors=True)
+    else:
+        source.close()
+        if list(STORE_BACKENDS).index(source.name) < list(STORE_BACKENDS).index(target):
+            print(f"[WARN] The '{source.name}' store is still found first; "
+                  "pass --remove-source to switch to the new one.")
+    return copied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate novels between chapter stores.")
+    parser.add_argument("novel_dirs", nargs="+", type=Path)
+    parser.add_argument("--to", choices=list(STORE_BACKENDS), default=DEFAULT_STORE)
+    parser.add_argument("--remove-source", action="store_true",
+                        help="delete the old chapter files after copying")
+    args = parser.parse_args()
+    for directory in args.novel_dirs:
+        migrate_store(directory, args.to, args.remove_source)
@@ -2,7 +2,9 @@
 Contains methods related to extracting chapter titles from web pages.
 '''
 import re
+from typing import Optional, Tuple
 from playwright.async_api import Page
+from scraper.site_profiles import ProfileStore
 
 TITLE_SELECTORS = [
     "h1", "h2", "h3",
@@ -12,29 +14,86 @@ TITLE_SELECTORS = [
 
 TITLE_REGEX = re.compile(r"(Chapter|Ch\.|Episode|Ep\.)\s*(\d+)(?:\s*[-–:]?\s*(.*))?", re.IGNORECASE)
 
+# Collects the text of every element matching each selector, plus the first
+# lines of the page source, in a single round-trip to the browser.
+TITLE_CANDIDATES_JS = """
+(selectors) => ({
+    candidates: selectors.map(
+        (selector) => Array.from(document.querySelectorAll(selector),
+                                 (el) => (el.textContent || "").trim())
+    ),
+    lines: document.documentElement.outerHTML.split("\\n")
+        .map((line) => line.trim())
+        .filter((line) => line)
+        .slice(0, 5),
+})
+"""
 
-async def extract_chapter_title(page: Page) -> str | None:
-    '''
-    Extracts the chapter title from the page using various selectors.
+# Text of every element matching a site profile's title selector
+TITLE_TEXTS_JS = """
+(selector) => Array.from(document.querySelectorAll(selector),
+                         (el) => (el.textContent || "").trim())
+"""
+
+
+def find_title(title_data: dict) -> Tuple[Optional[str], Optional[int]]:
     '''
-    candidates = []
+    Like `choose_title`, but also tells where the title was found.
 
-    for selector in TITLE_SELECTORS:
-        elements = await page.query_selector_all(selector)
-        for el in elements:
-            text = (await el.text_content() or "").strip()
+    Returns:
+        tuple: (title or None, index of the candidate list it came from, or
+            None if it came from the page source lines or was not found)
+    '''
+    for index, texts in enumerate(title_data["candidates"]):
+        for text in texts:
             if TITLE_REGEX.search(text):
-                candidates.append(text)
-
-    if candidates:
-        # Return the first matching high-confidence result
-        return candidates[0]
+                # Return the first matching high-confidence result
+                return text, index
 
     # Fallback: check first few text lines from page body
-    body_text = await page.content()
-    lines = [line.strip() for line in body_text.splitlines() if line.strip()]
-    for line in lines[:5]:
+    for line in title_data["lines"][:5]:
         if TITLE_REGEX.search(line):
-            return line
+            return line, None
+
+    return None, None
+
+
+def choose_title(title_data: dict) -> str | None:
+    '''
+    Picks the chapter title from candidates gathered by `TITLE_CANDIDATES_JS`.
+
+    Args:
+        title_data (dict): {
+            "candidates": List[List[str]] (one list per TITLE_SELECTORS entry),
+            "lines": List[str] (first non-empty lines of the page source)
+        }
+    '''
+    return find_title(title_data)[0]
+
+
+def learn_title(profiles: Optional[ProfileStore], url: str, title_data: dict) -> str | None:
+    '''
+    Picks the title from generic `TITLE_CANDIDATES_JS` results and records
+    the selector it came from in the site profile.
+    '''
+    title, index = find_title(title_data)
+    if profiles is not None and index is not None:
+        profiles.learn(url, chapter_title=TITLE_SELECTORS[index])
+    return title
+
+
+async def extract_chapter_title(page: Page, profiles: Optional[ProfileStore] = None) -> str | None:
+    '''
+    Extracts the chapter title from the page using various selectors. With
+    `profiles`, the site's known title selector is tried alone first.
+    '''
+    selector = profiles.get(page.url).chapter_title if profiles else None
+    if selector:
+        texts = await page.evaluate(TITLE_TEXTS_JS, selector)
+        title = choose_title({"candidates": [texts], "lines": []})
+        profiles.record(title is not None)
+        if title:
+            return title
 
-    return None
+    title_data = await page.evaluate(TITLE_CANDIDATES_JS, TITLE_SELECTORS)
+    return learn_title(profiles, page.url, title_data)
@@ -0,0 +1,105 @@
+"""
+Pooled asynchronous HTTP client used to fetch pages without a browser.
+"""
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+from scraper.metrics import METRICS
+from scraper.response_cache import ResponseCache
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+DEFAULT_CONNECTION_LIMIT = 20
+DEFAULT_TIMEOUT_SECONDS = 15
+
+DEFAULT_HEADERS = {
+    "User-Agent": DEFAULT_USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+class HttpClient:
+    """
+    Wraps a single aiohttp session so connections are kept alive and reused
+    across every page fetched during a run. With a `ResponseCache`, fresh
+    pages are read from disk and stale ones are revalidated conditionally;
+    when the network fails or times out, the stale copy is served.
+
+    Usage:
+        async with HttpClient() as client:
+            status, html = await client.fetch_text(url)
+    """
+
+    def __init__(self, connection_limit: int = DEFAULT_CONNECTION_LIMIT,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS,
+                 cache: Optional[ResponseCache] = None):
+        self.connection_limit = connection_limit
+        self.timeout = timeout
+        self.cache = cache
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "HttpClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The underlying session, created on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=DEFAULT_HEADERS,
+                connector=aiohttp.TCPConnector(limit=self.connection_limit),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def fetch_text(self, url: str) -> tuple[int, str]:
+        """
+        Fetches a page and decodes its body.
+
+        Args:
+            url (str): Page URL.
+
+        Returns:
+            tuple: (HTTP status code, decoded body)
+        """
+        if self.cache is None:
+            async with self.session.get(url) as response:
+                body = await response.read()
+                METRICS.add_bytes("http", len(body))
+                return response.status, await response.text(errors="replace")
+
+        entry = self.cache.lookup(url)
+        if entry is not None and entry.fresh:
+            return entry.status, entry.text()
+
+        validators = entry.validators() if entry is not None else None
+        try:
+            async with self.session.get(url, headers=validators) as response:
+                if response.status == 304 and entry is not None:
+                    self.cache.refresh(url)
+                    return entry.status, entry.text()
+                body = await response.read()
+                METRICS.add_bytes("http", len(body))
+                self.cache.store(url, response.status, response.headers, body)
+                return response.status, await response.text(errors="replace")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if entry is None:
+                raise
+            print(f"[WARN] Serving stale cached copy of {url}: {e}")
+            return entry.status, entry.text()
+
+    async def close(self) -> None:
+        """Closes the session and its pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,254 @@
+"""
+Scrapes server-rendered chapter pages over plain HTTP, without a browser.
+Falls back to the Playwright scrapers when the page needs JavaScript.
+"""
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import aiohttp
+
+from scraper.browser_utils import BrowserPool
+from scraper.extract_chapter_title import TITLE_SELECTORS, choose_title, learn_title
+from scraper.http_client import HttpClient
+from scraper.iframe_scraper import scrape_iframe_chapter
+from scraper.image_utils import image_tag
+from scraper.manifest import has_content
+from scraper.metrics import METRICS
+from scraper.paragraph_scraper import scrape_paragraph_chapter
+from scraper.retry import FAILURE_HTTP, ChapterScrapeError
+from scraper.site_profiles import ProfileStore
+
+# Status codes commonly served with a JavaScript challenge page
+JS_CHALLENGE_STATUSES = {403, 503}
+
+SKIPPED_TAGS = {"script", "style", "noscript", "template"}
+BLOCK_TAGS = {"div", "section", "article", "h1", "h2", "h3", "h4", "h5", "h6",
+              "ul", "ol", "table", "blockquote", "pre", "hr", "form", "figure"}
+WHITESPACE = re.compile(r"[ \t\r\f\v\n]+")
+
+
+class ChapterPageParser(HTMLParser):
+    """
+    Single-pass HTML parser collecting what the browser scrapers read from a
+    chapter page: the text of every <p>, the images inside paragraphs or
+    figures, chapter title candidates grouped by `TITLE_SELECTORS`, and
+    whether the page embeds an iframe.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs: List[str] = []
+        # ("text", paragraph) and ("image", src) in document order
+        self.blocks: List[Tuple[str, str]] = []
+        self._paragraph_images: List[str] = []
+        self._figure_depth = 0
+        self.title_candidates: Dict[str, List[str]] = {key: [] for key in TITLE_SELECTORS}
+        self.has_iframe = False
+        self._frames: List[tuple] = []
+        self._skip_depth = 0
+
+    def _selectors_for(self, tag: str, attrs: dict) -> List[str]:
+        classes = (attrs.get("class") or "").split()
+        selectors = []
+        if tag in ("h1", "h2", "h3"):
+            selectors.append(tag)
+        if "chapter-title" in classes:
+            selectors.append(".chapter-title")
+        if attrs.get("id") == "chapter-title":
+            selectors.append("#chapter-title")
+        if tag == "strong" and any(frame[0] == "p" for frame in self._frames):
+            selectors.append("p strong")
+        if tag == "p":
+            selectors.append("p")
+        if tag == "div" and "title" in classes:
+            selectors.append("div.title")
+        return selectors
+
+    def _close(self, tag: str) -> None:
+        for depth in range(len(self._frames) - 1, -1, -1):
+            if self._frames[depth][0] == tag:
+                break
+        else:
+            return
+
+        while len(self._frames) > depth:
+            frame_tag, selectors, parts = self._frames.pop()
+            lines = (WHITESPACE.sub(" ", line).strip() for line in "".join(parts).split("\n"))
+            text = "\n".join(line for line in lines if line)
+            for selector in selectors:
+                self.title_candidates[selector].append(text)
+            if frame_tag == "p":
+                if text:
+                    self.paragraphs.append(text)
+                    self.blocks.append(("text", text))
+                self.blocks.extend(("image", src) for src in self._paragraph_images)
+                self._paragraph_images.clear()
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+            return
+        if tag == "iframe":
+            self.has_iframe = True
+        if tag == "img":
+            self._image(dict(attrs))
+            return
+        if tag == "br":
+            self.handle_data("\n")
+            return
+        # A block element implicitly closes an open paragraph
+        if tag == "p" or tag in BLOCK_TAGS:
+            self._close("p")
+        if tag == "figure":
+            self._figure_depth += 1
+
+        selectors = self._selectors_for(tag, dict(attrs))
+        if selectors:
+            self._frames.append((tag, selectors, []))
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if tag == "figure":
+            self._figure_depth = max(0, self._figure_depth - 1)
+        self._close(tag)
+
+    def _image(self, attrs: dict) -> None:
+        src = attrs.get("data-src") or attrs.get("src")
+        if not src or self._skip_depth:
+            return
+        if any(frame[0] == "p" for frame in self._frames):
+            # Emitted after the paragraph's text, as the browser scraper does
+            self._paragraph_images.append(src)
+        elif self._figure_depth:
+            self.blocks.append(("image", src))
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        for _, _, parts in self._frames:
+            parts.append(data)
+
+    def close(self):
+        super().close()
+        while self._frames:
+            self._close(self._frames[-1][0])
+
+
+def pick_title(parser: ChapterPageParser, html: str, profiles: Optional[ProfileStore] = None,
+               url: str = "") -> Optional[str]:
+    """
+    Chooses the chapter title with the same rules as `extract_chapter_title`,
+    trying the site profile's title selector first.
+    """
+    selector = profiles.get(url).chapter_title if profiles else None
+    if selector in parser.title_candidates:
+        title = choose_title({"candidates": [parser.title_candidates[selector]], "lines": []})
+        profiles.record(title is not None)
+        if title:
+            return title
+
+    lines = [line.strip() for line in html.splitlines() if line.strip()]
+    return learn_title(profiles, url, {
+        "candidates": [parser.title_candidates[selector] for selector in TITLE_SELECTORS],
+        "lines": lines[:5],
+    })
+
+
+def render_block(kind: str, value: str, base_url: str) -> str:
+    """Chapter markup for one ("text" | "image", value) block."""
+    if kind == "image":
+        return image_tag(urljoin(base_url, value))
+    return f"<p>{value}</p>"
+
+
+def parse_chapter_html(html: str, base_url: str = "",
+                       profiles: Optional[ProfileStore] = None) -> dict:
+    """
+    Extracts chapter data from raw HTML. Image sources are resolved against
+    `base_url`, whose site profile in `profiles` is used for the title.
+
+    Returns:
+        dict: {
+            "title": str | None,
+            "content": str (HTML-formatted),
+            "paragraph_count": int,
+            "has_iframe": bool
+        }
+    """
+    parser = ChapterPageParser()
+    parser.feed(html)
+    parser.close()
+
+    return {
+        "title": pick_title(parser, html, profiles, base_url),
+        "content": "\n".join(render_block(kind, value, base_url)
+                             for kind, value in parser.blocks
+                             if kind == "text" or urljoin(base_url, value).startswith("http")),
+        "paragraph_count": len(parser.paragraphs),
+        "has_iframe": parser.has_iframe,
+    }
+
+
+async def scrape_http_chapter(url: str, pool: Optional[BrowserPool] = None) -> dict:
+    """
+    Fetches a chapter page over HTTP and extracts its <p> text and title.
+
+    If the page answers with a challenge status or its static paragraphs are
+    too short to count as a chapter (see `scraper.manifest.has_content`;
+    e.g. only a footer or an "enable JavaScript" notice), the chapter is
+    handed to a Playwright scraper: the iframe scraper when the page embeds
+    an iframe, the paragraph scraper otherwise. Iframes next to a full
+    chapter's paragraphs (ads, comment widgets) are ignored.
+
+    Args:
+        url (str): The chapter page URL.
+        pool (BrowserPool, optional): Pool providing the shared HTTP client
+            and, for fallbacks, browser pages.
+
+    Returns:
+        dict: {
+            "title": str | None,
+            "content": str (HTML-formatted)
+        }
+
+    Raises:
+        ChapterScrapeError: On connection errors and HTTP error statuses.
+    """
+    print(f"[INFO] Fetching: {url}")
+    try:
+        with METRICS.stage("http.fetch"):
+            if pool:
+                status, html = await pool.http.fetch_text(url)
+            else:
+                async with HttpClient() as client:
+                    status, html = await client.fetch_text(url)
+    except aiohttp.ClientError as e:
+        raise ChapterScrapeError(FAILURE_HTTP, f"{type(e).__name__}: {e}") from e
+
+    if status in JS_CHALLENGE_STATUSES:
+        print(f"[INFO] HTTP {status} for {url}, retrying in browser.")
+        return await scrape_paragraph_chapter(url, pool)
+    if status >= 400:
+        print(f"[ERROR] HTTP {status} while fetching {url}")
+        raise ChapterScrapeError(FAILURE_HTTP, f"HTTP {status}", status=status)
+
+    with METRICS.stage("http.parse"):
+        chapter = parse_chapter_html(html, url, pool.profiles if pool else None)
+
+    if chapter["has_iframe"] and not has_content(chapter["content"]):
+        print(f"[INFO] Iframe detected on {url}, retrying in browser.")
+        return await scrape_iframe_chapter(url, pool)
+    if not has_content(chapter["content"]):
+        print(f"[INFO] No chapter text in static HTML of {url}, retrying in browser.")
+        return await scrape_paragraph_chapter(url, pool)
+
+    print(f"[INFO] Found {chapter['paragraph_count']} paragraphs. "
+          f"Title: {chapter['title'] or '[None]'}")
+    return {
+        "title": chapter["title"],
+        "content": chapter["content"]
+    }
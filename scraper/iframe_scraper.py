@@ -3,47 +3,57 @@ Scrapes iframe-based web novel chapter pages.
 Extracts unencrypted content and attempts to identify the chapter title.
 """
 
-from playwright.async_api import async_playwright
-from playwright_stealth import stealth_async
-from scraper.browser_utils import create_stealth_context
+from typing import Optional
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from scraper.browser_utils import BrowserPool, lease_page
+from scraper.metrics import METRICS
+from scraper.retry import FAILURE_TIMEOUT, ChapterScrapeError
 from scraper.extract_chapter_title import extract_chapter_title
 
 
-async def scrape_iframe_chapter(url: str) -> dict:
+async def scrape_iframe_chapter(url: str, pool: Optional[BrowserPool] = None) -> dict:
     """
     Scrapes the chapter text and title from an iframe-based web novel page.
 
     Args:
         url (str): The chapter URL to scrape.
+        pool (BrowserPool, optional): Pool to lease a page from. When omitted,
+            a dedicated browser is launched for this chapter.
 
     Returns:
         dict: {
             "title": str or None,
             "content": str
         }
-    """
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await create_stealth_context(browser)
-        page = await context.new_page()
 
-        await stealth_async(page)
+    Raises:
+        ChapterScrapeError: If the page or its content did not load in time.
+    """
+    async with lease_page(pool) as page:
         print(f"[INFO] Navigating to {url}")
 
         try:
-            await page.goto(url, timeout=15000)
+            # The iframe and its content selector signal readiness, not the load event
+            with METRICS.stage("iframe.goto"):
+                response = await page.goto(url, timeout=15000, wait_until="domcontentloaded")
+            METRICS.add_response_bytes(response)
 
-            iframe_element = await page.wait_for_selector("iframe", timeout=10000)
-            iframe = await iframe_element.content_frame()
+            with METRICS.stage("iframe.content_ready"):
+                iframe_element = await page.wait_for_selector("iframe", state="attached",
+                                                              timeout=10000)
+                iframe = await iframe_element.content_frame()
+                if iframe:
+                    await iframe.wait_for_selector("#unencrypted-content", timeout=10000)
 
             if not iframe:
                 print("[ERROR] Could not access iframe content.")
                 return {"title": None, "content": ""}
 
-            await iframe.wait_for_selector("#unencrypted-content", timeout=10000)
-            content = await iframe.locator("#unencrypted-content").inner_html()
+            with METRICS.stage("iframe.extract"):
+                content = await iframe.locator("#unencrypted-content").inner_html()
 
-            title = await extract_chapter_title(page)
+            with METRICS.stage("iframe.title"):
+                title = await extract_chapter_title(page, pool.profiles if pool else None)
 
             if content:
                 print(f"[INFO] Extracted {len(content)} characters with title: {title or '[None]'}")
@@ -55,9 +65,6 @@ async def scrape_iframe_chapter(url: str) -> dict:
                 print("[WARN] Iframe loaded but content was empty.")
                 return {"title": title, "content": ""}
 
-        except TimeoutError as e:
+        except PlaywrightTimeoutError as e:
             print(f"[ERROR] Timeout while scraping: {e}")
-        finally:
-            await browser.close()
-
-    return {"title": None, "content": ""}
+            raise ChapterScrapeError(FAILURE_TIMEOUT, str(e)) from e
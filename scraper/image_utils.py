@@ -1,28 +1,244 @@
 """
-Module to handle image related tasks, such as downloading and saving images.
+Module to handle image related tasks: downloading the cover and the images
+embedded in chapters.
+
+Images are fetched over the pooled `HttpClient` session and streamed to
+disk in chunks while they are hashed, so no image is ever held in memory
+whole. Chapter images are stored once per content hash in the novel's
+`images/` folder, with an append-only index mapping source URLs to files
+so later runs (and other worker processes) reuse them.
 """
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import uuid
+from html import escape, unescape
 from pathlib import Path
-import requests
+from typing import Dict, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+
+from scraper.http_client import HttpClient
+from scraper.manifest import IMAGES_DIR
+from scraper.metrics import METRICS
+from scraper.response_cache import ResponseCache
+
+IMAGE_INDEX_NAME = "index.jsonl"
+DEFAULT_IMAGE_CONCURRENCY = 8
+CHUNK_SIZE = 64 * 1024
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".svg"}
+
+IMG_SRC = re.compile(r"(<img\b[^>]*?\bsrc\s*=\s*)([\"'])(.*?)\2", re.IGNORECASE | re.DOTALL)
+
+
+def image_tag(url: str) -> str:
+    """Chapter markup for an image kept from the source page."""
+    return f'<p><img src="{escape(url)}" alt=""/></p>'
+
+
+def image_extension(url: str, content_type: Optional[str] = None) -> str:
+    """File extension for an image, from its Content-Type or else its URL."""
+    if content_type:
+        ext = mimetypes.guess_extension(content_type.split(";")[0].strip())
+        if ext in IMAGE_EXTENSIONS:
+            return ".jpg" if ext == ".jpeg" else ext
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    return ext if ext in IMAGE_EXTENSIONS else ".jpg"
 
-def download_image(url: str, output_path: Path) -> bool:
+
+async def stream_to_file(session: aiohttp.ClientSession, url: str, path: Path,
+                         headers: Optional[Dict[str, str]] = None
+                         ) -> Tuple[aiohttp.ClientResponse, Optional[str]]:
+    """
+    Downloads `url` into `path` chunk by chunk. Nothing is written unless the
+    response is a 200.
+
+    Returns:
+        tuple: (the closed response, SHA-256 hex digest of the body or None
+            when nothing was written)
+    """
+    async with session.get(url, headers=headers) as response:
+        if response.status != 200:
+            return response, None
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "wb") as f:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+        METRICS.add_bytes("image", size)
+        return response, digest.hexdigest()
+
+
+async def download_image(url: str, output_path: Path, cache: Optional[ResponseCache] = None,
+                         http: Optional[HttpClient] = None) -> bool:
     """
     Downloads an image from a URL to a local file.
 
     Args:
         url (str): Image URL.
         output_path (Path): Path to save the file.
+        cache (ResponseCache, optional): Serves the image from disk when fresh
+            and revalidates it when stale.
+        http (HttpClient, optional): Pooled client to download with; a
+            temporary one is used when omitted.
 
     Returns:
         bool: True if successful, False otherwise.
     """
+    if http is None:
+        async with HttpClient() as client:
+            return await download_image(url, output_path, cache, client)
+
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
     try:
-        print(f"[INFO] Downloading image from {url}")
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        with open(output_path, "wb") as f:
-            f.write(response.content)
+        entry = cache.lookup(url) if cache else None
+        if entry is not None and entry.fresh:
+            print(f"[INFO] Using cached image for {url}")
+            tmp_path.write_bytes(entry.body)
+        else:
+            print(f"[INFO] Downloading image from {url}")
+            headers = entry.validators() if entry is not None else None
+            response, _ = await stream_to_file(http.session, url, tmp_path, headers)
+            if response.status == 304 and entry is not None:
+                cache.refresh(url)
+                tmp_path.write_bytes(entry.body)
+            else:
+                response.raise_for_status()
+                if cache:
+                    cache.store(url, response.status, response.headers, tmp_path.read_bytes())
+        os.replace(tmp_path, output_path)
         print(f"[INFO] Cover image saved to {output_path}")
         return True
-    except Exception as e:
+    except Exception as e:  # pylint: disable=broad-except
+        tmp_path.unlink(missing_ok=True)
         print(f"[WARN] Failed to download cover image: {e}")
         return False
+
+
+class ImageFetcher:
+    """
+    Downloads chapter images into one folder, at most `concurrency` at a
+    time, storing each distinct image once under its content hash.
+
+    Usage:
+        fetcher = ImageFetcher(pool.http)
+        fetcher.open(novel_dir / IMAGES_DIR)
+        content = await fetcher.localize(content, chapter_url)
+    """
+
+    def __init__(self, http: HttpClient, concurrency: int = DEFAULT_IMAGE_CONCURRENCY):
+        self.http = http
+        self.directory: Optional[Path] = None
+        self.downloaded = 0
+        self.duplicates = 0
+        self.failed = 0
+        self._files: Dict[str, str] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+
+    def open(self, directory: Path) -> None:
+        """Uses `directory` for images and loads the URLs already fetched into it."""
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        index_path = self.directory / IMAGE_INDEX_NAME
+        if not index_path.exists():
+            return
+        with open(index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of an interrupted run
+                if (self.directory / record["file"]).exists():
+                    self._files[record["url"]] = record["file"]
+
+    def _record(self, url: str, file_name: str) -> None:
+        self._files[url] = file_name
+        # Single short appends, so worker processes sharing the folder do not interleave
+        with open(self.directory / IMAGE_INDEX_NAME, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"url": url, "file": file_name}) + "\n")
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """
+        Downloads one image unless it is already stored.
+
+        Returns:
+            str | None: File name inside the images folder, None on failure.
+        """
+        if url in self._files:
+            return self._files[url]
+        if url in self._pending:
+            return await self._pending[url]
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[url] = future
+        file_name = None
+        try:
+            file_name = await self._download(url)
+        finally:
+            del self._pending[url]
+            future.set_result(file_name)
+        return file_name
+
+    async def _download(self, url: str) -> Optional[str]:
+        tmp_path = self.directory / f".{uuid.uuid4().hex}.tmp"
+        try:
+            async with self._slots:
+                with METRICS.stage("image.fetch"):
+                    response, digest = await stream_to_file(self.http.session, url, tmp_path)
+            if digest is None:
+                raise aiohttp.ClientResponseError(response.request_info, (),
+                                                  status=response.status)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            tmp_path.unlink(missing_ok=True)
+            self.failed += 1
+            print(f"[WARN] Failed to download image {url}: {e}")
+            return None
+
+        file_name = (f"{digest[:20]}"
+                     f"{image_extension(url, response.headers.get('Content-Type'))}")
+        target = self.directory / file_name
+        if target.exists():
+            # Same image under another URL
+            tmp_path.unlink()
+            self.duplicates += 1
+        else:
+            os.replace(tmp_path, target)
+            self.downloaded += 1
+        self._record(url, file_name)
+        return file_name
+
+    async def localize(self, content: str, base_url: str) -> str:
+        """
+        Downloads every image referenced by `content` and points its <img>
+        tags at the local copies as `images/<file>`. Images that could not be
+        downloaded keep their remote URL.
+        """
+        if self.directory is None or "<img" not in content.lower():
+            return content
+
+        sources = {match.group(3) for match in IMG_SRC.finditer(content)}
+        urls = {src: urljoin(base_url, unescape(src)) for src in sources}
+        remote = {src: url for src, url in urls.items() if url.startswith(("http://", "https://"))}
+        files = await asyncio.gather(*(self.fetch(url) for url in remote.values()))
+        local = {src: f"{IMAGES_DIR}/{name}" for src, name in zip(remote, files) if name}
+
+        def replace(match: re.Match) -> str:
+            src = match.group(3)
+            if src not in local:
+                return match.group(0)
+            return f"{match.group(1)}{match.group(2)}{escape(local[src])}{match.group(2)}"
+
+        return IMG_SRC.sub(replace, content)
+
+    def print_report(self) -> None:
+        """Prints how many images were downloaded, deduplicated or lost."""
+        if self.downloaded or self.duplicates or self.failed:
+            print(f"[INFO] Images: {self.downloaded} downloaded, {self.duplicates} duplicate(s), "
+                  f"{self.failed} failed, {len(self._files)} known")
@@ -0,0 +1,278 @@
+"""
+Keeps a per-novel chapter manifest keyed by source URL, recording each
+chapter's canonical ToC index, content hash and download status. Chapters
+whose content turned out to be a copy of another one's are recorded with
+"duplicate_of" and not stored twice.
+
+The manifest is an append-only JSON-lines file: every chapter update appends
+one line and the file is compacted when the ToC is synced, so loading it is
+a single file read no matter how many chapters the novel has.
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from scraper.chapter_index import canonical_url
+
+MANIFEST_NAME = "manifest.jsonl"
+METADATA_NAME = "metadata.json"
+CHAPTERS_SUBDIR = "chapters"
+IMAGES_DIR = "images"
+MIN_CONTENT_LENGTH = 50
+
+STATUS_PENDING = "pending"
+STATUS_COMPLETE = "complete"
+STATUS_FAILED = "failed"
+
+
+def content_hash(content: str) -> str:
+    """SHA-256 hex digest of a chapter's content."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def has_content(content: str) -> bool:
+    """Whether a chapter's content is long enough to count as downloaded."""
+    return len(content.strip()) > MIN_CONTENT_LENGTH
+
+
+def chapter_filename(index: int) -> str:
+    """File name of the chapter stored at `index`."""
+    return f"{index:03}.json"
+
+
+class ChapterManifest:
+    """
+    Maps each chapter URL to { "index", "hash", "status" }, plus
+    "duplicate_of" (the URL of the chapter with the same content) for copies.
+
+    Usage:
+        manifest = ChapterManifest.load(novel_dir)
+        for index, url in manifest.sync_toc(chapter_urls, store):
+            ...
+            manifest.record(url, index, content)
+    """
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, dict]] = None):
+        self.path = path
+        self.entries: Dict[str, dict] = entries or {}
+        self._log_lines = 0
+        # Old index -> new index of the chapters the last `sync_toc` moved in the store
+        self.moved: Dict[int, int] = {}
+        # Content hash -> URL of a completed chapter, built on first lookup
+        self._by_hash: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def load(cls, novel_dir: Path, stored_chapters: Optional[Iterable[Dict]] = None
+             ) -> "ChapterManifest":
+        """
+        Loads the manifest of a novel directory.
+
+        When no manifest exists yet, one is built from `stored_chapters`
+        (typically `ChapterStore.iter_chapters()`) or, failing that, from the
+        chapter JSON files on disk so earlier downloads are not fetched again.
+        """
+        path = novel_dir / MANIFEST_NAME
+        manifest = cls(path)
+
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash can leave a truncated last line behind
+                        print(f"[WARN] Skipping corrupt manifest line in {path.name}")
+                        continue
+                    manifest.entries[entry.pop("url")] = entry
+                    manifest._log_lines += 1
+            return manifest
+
+        if stored_chapters is None:
+            stored_chapters = cls._read_chapter_files(novel_dir / CHAPTERS_SUBDIR)
+        manifest._import_chapters(stored_chapters)
+        if manifest.entries:
+            manifest.save()
+        return manifest
+
+    @staticmethod
+    def _read_chapter_files(chapters_dir: Path) -> Iterable[Dict]:
+        for path in chapters_dir.glob("*.json"):
+            if not path.stem.isdigit():
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    yield {**json.load(f), "number": int(path.stem)}
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[WARN] Couldn't read {path.name}: {e}")
+
+    def _import_chapters(self, chapters: Iterable[Dict]) -> None:
+        for data in chapters:
+            url = data.get("source_url")
+            if not url:
+                continue
+            content = data.get("content") or ""
+            self.entries[url] = {
+                "index": data["number"],
+                "hash": content_hash(content),
+                "status": self._status_for(content),
+            }
+        if self.entries:
+            print(f"[INFO] Built chapter manifest from {len(self.entries)} stored chapter(s).")
+
+    @staticmethod
+    def _status_for(content: str) -> str:
+        return STATUS_COMPLETE if has_content(content) else STATUS_FAILED
+
+    def save(self) -> None:
+        """Rewrites the manifest as one compact line per chapter."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for url, entry in sorted(self.entries.items(), key=lambda item: item[1]["index"]):
+                f.write(json.dumps({"url": url, **entry}, ensure_ascii=False) + "\n")
+        tmp_path.replace(self.path)
+        self._log_lines = len(self.entries)
+
+    def _append(self, url: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"url": url, **self.entries[url]}, ensure_ascii=False) + "\n")
+        self._log_lines += 1
+
+    def sync_toc(self, chapter_urls: List[str], store: Optional[Any] = None
+                 ) -> List[Tuple[int, str]]:
+        """
+        Assigns every ToC URL its canonical 1-based index and returns the
+        chapters that still need fetching: new ones and ones that failed.
+
+        A downloaded chapter whose position in the ToC has moved (e.g. after
+        a prologue was inserted) is re-keyed in `store`, a `ChapterStore`,
+        keeping its hash and status; `moved` lists those moves. Without a
+        store, or if the chapter is not in it, it is fetched again. A ToC URL that is
+        another spelling of a stored chapter's URL (see
+        `scraper.chapter_index.canonical_url`) takes over that chapter's
+        entry, so a site switching to https or dropping "www." does not
+        trigger a full download.
+
+        Returns:
+            List[Tuple[int, str]]: (index, url) pairs in ToC order.
+        """
+        in_toc = set(chapter_urls)
+        respelled = {canonical_url(url): url for url in self.entries if url not in in_toc}
+        renamed = {}
+        moves = []
+        for index, url in enumerate(chapter_urls, start=1):
+            entry = self.entries.get(url)
+            old_url = respelled.pop(canonical_url(url), None) if entry is None else None
+            if old_url is not None:
+                entry = self.entries[url] = self.entries.pop(old_url)
+                renamed[old_url] = url
+            if entry is None:
+                self.entries[url] = {"index": index, "hash": None, "status": STATUS_PENDING}
+            elif entry["index"] != index:
+                if store is not None and entry["status"] == STATUS_COMPLETE:
+                    # Copies have no record of their own to move
+                    if "duplicate_of" not in entry:
+                        moves.append((old_url or url, entry["index"], index))
+                    entry["index"] = index
+                else:
+                    entry.update(index=index, status=STATUS_PENDING)
+
+        missing = set(store.move(moves)) if moves else set()
+        by_stored_url = {stored: new for stored, _, new in moves}
+        for stored in missing:
+            self.entries[chapter_urls[by_stored_url[stored] - 1]]["status"] = STATUS_PENDING
+        self.moved = {old: new for stored, old, new in moves if stored not in missing}
+        if self.moved:
+            print(f"[INFO] Moved {len(self.moved)} stored chapter(s) to their new ToC position.")
+        to_fetch = [(index, url) for index, url in enumerate(chapter_urls, start=1)
+                    if self.entries[url]["status"] != STATUS_COMPLETE]
+
+        if renamed:
+            for entry in self.entries.values():
+                if entry.get("duplicate_of") in renamed:
+                    entry["duplicate_of"] = renamed[entry["duplicate_of"]]
+            self._by_hash = None
+        self.save()
+        return to_fetch
+
+    def record(self, url: str, index: int, content: str, digest: Optional[str] = None) -> dict:
+        """
+        Records the outcome of a chapter download and appends it to the log.
+
+        Args:
+            digest (str, optional): Hash to record instead of the hash of
+                `content`, e.g. of the content as scraped before cleaning.
+
+        Returns:
+            dict: The updated manifest entry.
+        """
+        self.entries[url] = {
+            "index": index,
+            "hash": digest or content_hash(content),
+            "status": self._status_for(content),
+        }
+        if self._by_hash is not None and self.entries[url]["status"] == STATUS_COMPLETE:
+            self._by_hash.setdefault(self.entries[url]["hash"], url)
+        return self._log(url)
+
+    def record_copy(self, url: str, index: int, digest: str, original: str) -> dict:
+        """
+        Records a chapter whose content is the same as the chapter at
+        `original`, e.g. a mirror link listed in the ToC as a chapter of its own.
+
+        Returns:
+            dict: The updated manifest entry.
+        """
+        self.entries[url] = {"index": index, "hash": digest, "status": STATUS_COMPLETE,
+                             "duplicate_of": original}
+        return self._log(url)
+
+    def _log(self, url: str) -> dict:
+        self._append(url)
+        if self._log_lines > 2 * len(self.entries) + 100:
+            self.save()
+        return self.entries[url]
+
+    def find_copy(self, digest: str, url: str) -> Optional[str]:
+        """
+        URL of another downloaded chapter whose content hash is `digest`, or None.
+        """
+        if self._by_hash is None:
+            self._by_hash = {}
+            for other, entry in sorted(self.entries.items(), key=lambda item: item[1]["index"]):
+                if entry["status"] == STATUS_COMPLETE and "duplicate_of" not in entry:
+                    self._by_hash.setdefault(entry["hash"], other)
+        original = self._by_hash.get(digest)
+        if original is None or original == url:
+            return None
+        # The entry may have been fetched again since; only a live match counts
+        entry = self.entries.get(original)
+        if entry is None or entry["hash"] != digest or entry["status"] != STATUS_COMPLETE:
+            return None
+        return original
+
+    def record_failure(self, url: str, index: int, kind: str) -> dict:
+        """
+        Records a chapter that could not be downloaded, with its failure kind.
+
+        Returns:
+            dict: The updated manifest entry.
+        """
+        self.entries[url] = {"index": index, "hash": None, "status": STATUS_FAILED, "error": kind}
+        self._append(url)
+        return self.entries[url]
+
+    def completed_urls(self) -> set:
+        """URLs whose chapters were downloaded with content."""
+        return {url for url, entry in self.entries.items() if entry["status"] == STATUS_COMPLETE}
+
+    def counts(self) -> Dict[str, int]:
+        """Number of chapters per status."""
+        counts = {STATUS_PENDING: 0, STATUS_COMPLETE: 0, STATUS_FAILED: 0}
+        for entry in self.entries.values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
@@ -0,0 +1,242 @@
+"""
+Run metrics: per-stage latency histograms, counters and bytes fetched.
+
+Stages are timed wherever the work happens (browser launch, page loads,
+content waits, extraction, HTTP fetches, chapter writes, EPUB build) into
+one process-wide `METRICS` recorder, so no call signature has to carry it.
+At the end of a run the recorder is written out as a JSON report; while a
+run is going it can print a progress line every few seconds.
+
+Worker processes have their own recorder; their `snapshot()` is sent back
+and `merge()`d into the parent's.
+"""
+import bisect
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# Upper bounds of the latency buckets in milliseconds; one more bucket
+# collects everything slower
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+PERCENTILES = (50, 90, 99)
+DEFAULT_REPORT_NAME = "run_metrics.json"
+DEFAULT_PROGRESS_INTERVAL = 0.0  # seconds, 0 disables progress lines
+PROGRESS_STAGES = 3  # slowest stages shown on a progress line
+
+# Counter incremented once per chapter scraped, used for chapters per second
+CHAPTERS_SCRAPED = "chapters.scraped"
+
+
+class Histogram:
+    """
+    Latency histogram over fixed logarithmic buckets, with exact count,
+    total, min and max. Percentiles are estimated from the buckets.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        """Records one measurement in milliseconds."""
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimates the `q`th percentile by interpolating inside the bucket that
+        holds it, within the measured min and max.
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, hits in enumerate(self.buckets):
+            if hits and seen + hits >= rank:
+                lower = max(BUCKET_BOUNDS_MS[i - 1] if i else 0.0, self.min_ms)
+                upper = min(BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else self.max_ms,
+                            self.max_ms)
+                return lower + (upper - lower) * max(rank - seen, 0) / hits
+            seen += hits
+        return self.max_ms
+
+    def snapshot(self) -> Dict:
+        """JSON-serializable state, also accepted by `merge`."""
+        report = {
+            "count": self.count,
+            "total_s": round(self.total_ms / 1000, 3),
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "min_ms": round(self.min_ms or 0.0, 2),
+            "max_ms": round(self.max_ms, 2),
+        }
+        for q in PERCENTILES:
+            report[f"p{q}_ms"] = round(self.percentile(q), 2)
+        report["buckets"] = {
+            (f"<={bound}" if i < len(BUCKET_BOUNDS_MS) else f">{BUCKET_BOUNDS_MS[-1]}"): hits
+            for i, (bound, hits) in enumerate(zip(BUCKET_BOUNDS_MS + (None,), self.buckets))
+            if hits
+        }
+        return report
+
+    def merge(self, snapshot: Dict) -> None:
+        """Adds the measurements of another histogram's `snapshot()`."""
+        labels = [f"<={bound}" for bound in BUCKET_BOUNDS_MS] + [f">{BUCKET_BOUNDS_MS[-1]}"]
+        for i, label in enumerate(labels):
+            self.buckets[i] += snapshot["buckets"].get(label, 0)
+        if snapshot["count"]:
+            self.min_ms = (snapshot["min_ms"] if self.min_ms is None
+                           else min(self.min_ms, snapshot["min_ms"]))
+        self.count += snapshot["count"]
+        self.total_ms += snapshot["total_s"] * 1000
+        self.max_ms = max(self.max_ms, snapshot["max_ms"])
+
+
+class RunMetrics:
+    """
+    Collects stage timings, counters and bytes fetched for one run.
+
+    Usage:
+        with METRICS.stage("chapter.goto"):
+            await page.goto(url)
+        METRICS.count("chapters.scraped")
+        METRICS.add_bytes("http", len(body))
+    """
+
+    def __init__(self):
+        self.started_at = 0.0
+        self._start = 0.0
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Counter = Counter()
+        self.bytes: Counter = Counter()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drops everything recorded so far and restarts the run clock."""
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.counters = Counter()
+        self.bytes = Counter()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the run started."""
+        return time.perf_counter() - self._start
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Records that one execution of `stage` took `seconds`."""
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.observe(seconds * 1000)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Times the body of the `with` block as one execution of stage `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Increments counter `name`."""
+        self.counters[name] += amount
+
+    def add_bytes(self, source: str, amount: int) -> None:
+        """Adds `amount` bytes fetched from `source` (e.g. 'http', 'browser')."""
+        self.bytes[source] += amount
+
+    def add_response_bytes(self, response) -> None:
+        """
+        Counts a browser response by its Content-Length header; responses
+        without one are not counted.
+        """
+        length = response.headers.get("content-length") if response is not None else None
+        if length and length.isdigit():
+            self.bytes["browser"] += int(length)
+
+    def chapters_per_second(self) -> float:
+        """Chapters scraped per second of run time so far."""
+        return self.counters[CHAPTERS_SCRAPED] / max(self.elapsed, 1e-9)
+
+    def snapshot(self) -> Dict:
+        """Stages, counters and bytes as plain data, for `merge` or the report."""
+        return {
+            "stages": {name: histogram.snapshot()
+                       for name, histogram in sorted(self.stages.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "bytes": dict(sorted(self.bytes.items())),
+        }
+
+    def merge(self, snapshot: Dict) -> None:
+        """Adds the `snapshot()` of a recorder from another process."""
+        for name, stage in snapshot["stages"].items():
+            self.stages.setdefault(name, Histogram()).merge(stage)
+        self.counters.update(snapshot["counters"])
+        self.bytes.update(snapshot["bytes"])
+
+    def report(self, **sections) -> Dict:
+        """
+        The end-of-run report: run time, throughput and every stage, counter
+        and byte total, plus any extra `sections` (e.g. cache statistics).
+        """
+        return {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started_at)),
+            "elapsed_s": round(self.elapsed, 3),
+            "chapters_per_second": round(self.chapters_per_second(), 3),
+            "bytes_fetched": sum(self.bytes.values()),
+            **self.snapshot(),
+            **sections,
+        }
+
+    def write_report(self, path: Path, **sections) -> Path:
+        """
+        Writes `report()` as JSON to `path`.
+
+        Returns:
+            Path: The report file.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(**sections), f, ensure_ascii=False, indent=2)
+        print(f"[INFO] Run metrics saved at '{path}'")
+        return path
+
+    def slowest_stages(self, limit: int) -> List[str]:
+        """Names of the `limit` stages with the largest total time."""
+        return sorted(self.stages, key=lambda name: self.stages[name].total_ms,
+                      reverse=True)[:limit]
+
+    def progress_line(self) -> str:
+        """One-line summary of throughput and the slowest stages so far."""
+        stages = ", ".join(
+            f"{name} p50 {self.stages[name].percentile(50):.0f}ms"
+            for name in self.slowest_stages(PROGRESS_STAGES)
+        )
+        retried = sum(n for name, n in self.counters.items() if name.startswith("failures."))
+        return (f"{self.counters[CHAPTERS_SCRAPED]} chapters in {self.elapsed:.0f}s "
+                f"({self.chapters_per_second():.2f}/s), {retried} failed attempt(s), "
+                f"{sum(self.bytes.values()) / 1024 / 1024:.1f} MiB fetched"
+                + (f"; {stages}" if stages else ""))
+
+    async def report_progress(self, interval: float) -> None:
+        """Prints `progress_line()` every `interval` seconds until cancelled."""
+        # Only runs inside an event loop; keeps asyncio out of converter-only imports
+        import asyncio  # pylint: disable=import-outside-toplevel
+        while True:
+            await asyncio.sleep(interval)
+            print(f"[INFO] Progress: {self.progress_line()}")
+
+
+METRICS = RunMetrics()
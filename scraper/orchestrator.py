@@ -4,18 +4,38 @@ It handles the extraction of chapter URLs from a table of contents (ToC) page
 and the scraping of individual chapters using different methods.
 """
 import asyncio
+import hashlib
 import json
+import math
 import re
+import shutil
+from collections import deque
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Dict
-from scraper.toc_extractor import extract_toc_info
+from typing import (AsyncIterable, AsyncIterator, Collection, Dict, Iterable, List, Optional,
+                    Tuple, Union)
+from scraper.boilerplate import DEFAULT_THRESHOLD, BoilerplateIndex
+from scraper.browser_utils import DEFAULT_REQUEST_FILTER, BrowserPool, RequestFilter
+from scraper.chapter_index import canonical_url, follows
+from scraper.chapter_store import DEFAULT_STORE, ChapterStore, detect_store, open_store
+from scraper.image_utils import IMAGES_DIR, ImageFetcher
+from scraper.manifest import ChapterManifest, content_hash, has_content
+from scraper.metrics import CHAPTERS_SCRAPED, METRICS
+from scraper.retry import FAILURE_EMPTY, ChapterScrapeError, RetryQueue, classify_exception
+from scraper.response_cache import ResponseCache
+from scraper.scheduler import FairWorkerPool, HostScheduler, SchedulerConfig
+from scraper.site_profiles import ProfileStore
+from scraper.toc_extractor import fetch_toc_pages, iter_toc_pages, order_chapter_urls
+from scraper.http_scraper import scrape_http_chapter
 from scraper.iframe_scraper import scrape_iframe_chapter
 from scraper.paragraph_scraper import scrape_paragraph_chapter
 
-CONCURRENT_CHAPTER_LIMIT = 3
+BROWSER_COUNT = 1
+MAX_PAGE_USES = 50
 SCRAPER_MAP = {
     "iframe": scrape_iframe_chapter,
     "paragraph": scrape_paragraph_chapter,
+    "http": scrape_http_chapter,
 }
 
 def slugify(text: str) -> str:
@@ -29,75 +49,529 @@ def slugify(text: str) -> str:
 
 def get_existing_chapter_urls(chapters_dir: Path) -> set:
     """
-    Returns a set of chapter URLs that already exist and have content.
-    Assumes chapter files are named with numeric keys (001.json, 002.json, etc.)
+    Returns a set of chapter URLs that already exist and have content,
+    as recorded in the novel's chapter manifest.
     """
-    completed = set()
-    for path in chapters_dir.glob("*.json"):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if data.get("content") and len(data["content"].strip()) > 50:
-                    completed.add(data.get("source_url"))
-        except FileNotFoundError as e:
-            print(f"[WARN] Couldn't read {path.name}: {e}")
-    return completed
+    novel_dir = chapters_dir.parent
+    store = detect_store(novel_dir, read_only=True)
+    try:
+        stored = store.iter_chapters() if store is not None else None
+        return ChapterManifest.load(novel_dir, stored).completed_urls()
+    finally:
+        if store is not None:
+            store.close()
 
-async def scrape_chapter(url: str, method: str, semaphore: asyncio.Semaphore) -> Dict[str, str]:
+async def scrape_chapter(url: str, method: str, scheduler: HostScheduler,
+                         pool: BrowserPool, workers: Optional[FairWorkerPool] = None,
+                         owner: str = "", images: Optional[ImageFetcher] = None
+                         ) -> Dict[str, str]:
     """
     Delegates chapter scraping to the appropriate method.
 
     Args:
         url (str): Chapter URL.
-        method (str): Either 'iframe' or 'paragraph'.
-        semaphore (asyncio.Semaphore): Semaphore to limit concurrent requests.
+        method (str): One of 'iframe', 'paragraph' or 'http'.
+        scheduler (HostScheduler): Paces requests per host; empty chapters and
+            errors count as failures and slow the host down.
+        pool (BrowserPool): Shared browser pool the scrapers lease pages from.
+        workers (FairWorkerPool, optional): Global worker pool shared with
+            other novels; the worker is taken after the host slot so waiting
+            on a busy host never holds one.
+        owner (str): Novel the chapter belongs to, for fair worker hand-out.
+        images (ImageFetcher, optional): Downloads the chapter's images once
+            the host slot is released and points the content at the copies.
 
     Returns:
         dict: { "title": str or None, "content": str }
+
+    Raises:
+        ChapterScrapeError: If the scrape failed or produced no content.
     """
-    async with semaphore:
+    worker = workers.slot(owner) if workers else nullcontext()
+    queued = asyncio.get_running_loop().time()
+    async with scheduler.slot(url) as outcome, worker:
+        METRICS.observe("chapter.queue_wait", asyncio.get_running_loop().time() - queued)
         try:
-            return await SCRAPER_MAP[method](url)
+            with METRICS.stage(f"chapter.{method}"):
+                chapter = await SCRAPER_MAP[method](url, pool)
         except Exception as e:  # pylint: disable=broad-except
-            print(f"[WARN] Failed to scrape {url}: {e}")
-            return {"title": None, "content": ""}
+            raise classify_exception(e) from e
+        if not has_content(chapter["content"]):
+            raise ChapterScrapeError(FAILURE_EMPTY, "no chapter content extracted")
+        outcome["success"] = True
+    if images is not None and "<img" in chapter["content"]:
+        with METRICS.stage("chapter.images"):
+            chapter["content"] = await images.localize(chapter["content"], url)
+    return chapter
 
-async def scrape_all_chapters(toc_url: str, method: str, output_base_dir: Path) -> Dict:
+async def _iterate(items: Iterable) -> AsyncIterator:
+    for item in items:
+        yield item
+
+async def stream_chapters(chapters: Union[Iterable, AsyncIterable], method: str,
+                          pool: BrowserPool, scheduler: HostScheduler, retries: RetryQueue,
+                          workers: Optional[FairWorkerPool] = None, owner: str = "",
+                          images: Optional[ImageFetcher] = None
+                          ) -> AsyncIterator[Tuple[Optional[int], str, Dict[str, str]]]:
     """
-    Orchestrates the full scraping pipeline from a ToC page, scraping chapters concurrently.
+    Scrapes chapters concurrently and yields each one as soon as it completes.
+
+    `chapters` may be a list or an async iterable that is still producing
+    work, such as a ToC that is being paginated; scraping starts with the
+    first chapter it provides.
+
+    At most `scheduler.config.max_concurrency` chapters are in flight at any
+    time, so memory stays bounded by the concurrency limit rather than by the
+    number of chapters. The scheduler decides how many of them actually run.
+
+    Failed chapters go to `retries` and are tried again once their backoff
+    expires, but only when no untried chapter is waiting. Chapters that run
+    out of attempts are not yielded; they are listed in `retries.lost`.
+
+    Args:
+        chapters: (index, url) pairs to scrape. The index may be None when
+            it is not known yet.
+        method (str): Which scraper to use for chapters.
+        pool (BrowserPool): Shared browser pool the scrapers lease pages from.
+        scheduler (HostScheduler): Per-host concurrency and rate control.
+        retries (RetryQueue): Queue and statistics for failed chapters.
+        workers (FairWorkerPool, optional): Global worker pool when several
+            novels are scraped together.
+        owner (str): Name of this stream in `workers`.
+        images (ImageFetcher, optional): Fetches the images of each chapter.
+
+    Yields:
+        tuple: (index, url, { "title": str or None, "content": str }).
+            Completion order is not reading order.
+    """
+    limit = scheduler.config.max_concurrency
+    source = chapters if hasattr(chapters, "__aiter__") else _iterate(chapters)
+    fresh = deque()
+    arrived = asyncio.Event()
+
+    async def feed() -> None:
+        try:
+            async for item in source:
+                fresh.append(item)
+                arrived.set()
+        finally:
+            arrived.set()
+
+    feeder = asyncio.create_task(feed())
+    in_flight = {}
+
+    try:
+        while True:
+            while len(in_flight) < limit:
+                next_item = fresh.popleft() if fresh else retries.pop_ready()
+                if next_item is None:
+                    break
+                index, url = next_item
+                task = asyncio.create_task(scrape_chapter(url, method, scheduler, pool,
+                                                          workers, owner, images))
+                in_flight[task] = (index, url)
+
+            if feeder.done() and not fresh and not in_flight and not len(retries):
+                feeder.result()
+                break
+
+            waiters = set(in_flight)
+            arrival = None
+            if not fresh and not feeder.done():
+                arrived.clear()
+                arrival = asyncio.create_task(arrived.wait())
+                waiters.add(arrival)
+            if not waiters:
+                await asyncio.sleep(retries.next_delay() or 0)
+                continue
+
+            done, _ = await asyncio.wait(waiters, timeout=retries.next_delay(),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if arrival is not None and not arrival.done():
+                arrival.cancel()
+
+            for task in done:
+                if task not in in_flight:
+                    continue
+                index, url = in_flight.pop(task)
+                try:
+                    chapter = task.result()
+                except ChapterScrapeError as e:
+                    METRICS.count(f"failures.{e.kind}")
+                    retries.record_failure(index, url, e)
+                    continue
+                METRICS.count(CHAPTERS_SCRAPED)
+                retries.record_success(url)
+                yield index, url, chapter
+    finally:
+        feeder.cancel()
+        for task in in_flight:
+            task.cancel()
+
+def chapter_record(index: int, url: str, chapter: Dict[str, str]) -> Dict:
+    """The record stored for a scraped chapter."""
+    return {
+        "number": index,
+        "title": chapter["title"] or f"Chapter {index}",
+        "content": chapter["content"],
+        "source_url": url
+    }
+
+def save_chapter(store: ChapterStore, index: int, url: str, chapter: Dict[str, str],
+                 manifest: ChapterManifest, boilerplate: Optional[BoilerplateIndex] = None) -> str:
+    """
+    Writes a single chapter to the chapter store at `index` and records it
+    in the manifest. With `boilerplate`, the chapter's paragraphs are counted
+    in the index first and the ones repeated across chapters are left out.
+
+    A chapter whose scraped content is the same as an already downloaded
+    chapter's (a mirror of it under another URL) is only recorded as a copy
+    in the manifest; it is neither stored nor counted for boilerplate.
+
+    Returns:
+        str: Where the chapter was stored, or where its original is.
+    """
+    digest = content_hash(chapter["content"])
+    original = manifest.find_copy(digest, url)
+    if original is not None:
+        manifest.record_copy(url, index, digest, original)
+        METRICS.count("chapters.duplicate")
+        original_index = manifest.entries[original]["index"]
+        print(f"[INFO] Chapter {index} has the same content as Chapter {original_index}; "
+              "not storing it again.")
+        return store.location(original_index)
+
+    if boilerplate is not None:
+        with METRICS.stage("chapter.boilerplate"):
+            boilerplate.observe(index, chapter["content"])
+            chapter = {**chapter, "content": boilerplate.strip(chapter["content"])}
+    chapter_data = chapter_record(index, url, chapter)
+
+    with METRICS.stage("chapter.save"):
+        store.put(index, chapter_data)
+        manifest.record(url, index, chapter["content"], digest)
+
+    location = store.location(index)
+    print(f"[INFO] Saved Chapter {index}: '{chapter_data['title']}' → {location}")
+    return location
+
+class NovelScrape:
+    """
+    Scrapes one novel while its ToC is still being paginated.
+
+    Chapter URLs are handed to the scrapers as soon as their ToC page loads.
+    Since a chapter's canonical index is only known once the whole ToC has
+    been ordered, chapters finishing earlier are staged under a temporary name
+    and moved into the chapter store when the order is final.
+
+    Saved chapters go through the novel's boilerplate index, which drops
+    paragraphs found in more than `boilerplate_threshold` of its chapters.
+
+    Links are told apart by `canonical_url`, so a chapter listed under
+    several spellings of its URL is fetched once, under the spelling the
+    ordered ToC keeps.
+
+    ToC pages listed in `skip_toc_pages` are not read when the chapters found
+    on the other pages all come after the stored ones; those are appended to
+    the stored chapter order instead. Otherwise the skipped pages are read
+    after all and the ToC is ordered as usual.
+    """
+
+    def __init__(self, toc_url: str, output_base_dir: Path, pool: BrowserPool,
+                 store_backend: str = DEFAULT_STORE, fetch_images: bool = True,
+                 boilerplate_threshold: float = DEFAULT_THRESHOLD,
+                 skip_toc_pages: Collection[str] = ()):
+        self.toc_url = toc_url
+        self.output_base_dir = output_base_dir
+        self.pool = pool
+        self.store_backend = store_backend
+        # Chapter images go to <novel_dir>/images once the novel folder is known
+        self.images = ImageFetcher(pool.http) if fetch_images else None
+        self.boilerplate_threshold = boilerplate_threshold
+        self.skip_toc_pages = skip_toc_pages
+
+        self.title = "Unknown Novel"
+        self.cover_image_url = None
+        self.novel_dir: Optional[Path] = None
+        self.staging_dir: Optional[Path] = None
+        self.store: Optional[ChapterStore] = None
+        self.manifest: Optional[ChapterManifest] = None
+        self.boilerplate: Optional[BoilerplateIndex] = None
+
+        self.chapter_urls: List[str] = []
+        # URLs of a ToC paginated by URL pattern, in page order; [] otherwise
+        self.toc_pages: List[str] = []
+        self.toc_pages_skipped = 0
+        self._toc: List[Tuple[int, List[str]]] = []
+        self._appended: Optional[List[str]] = None
+        # Link text per chapter URL, for reading chapter numbers off the ToC
+        self.link_texts: Dict[str, str] = {}
+        # Canonical URL -> index, once the ToC is complete
+        self.index_of: Optional[Dict[str, int]] = None
+        # Canonical URL -> URL fetched
+        self.dispatched: Dict[str, str] = {}
+        self.staged: Dict[str, Path] = {}
+        self.saved = 0
+
+    def _open(self, title: str) -> None:
+        self.title = title
+        self.novel_dir = self.output_base_dir / slugify(title)
+        self.staging_dir = self.novel_dir / "staging"
+        # Staged chapters of an interrupted run were never recorded; fetch them again
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        self.staging_dir.mkdir(parents=True)
+        self.store = open_store(self.novel_dir, self.store_backend)
+        self.manifest = ChapterManifest.load(self.novel_dir, self.store.iter_chapters())
+        self.boilerplate = BoilerplateIndex.load(self.novel_dir, self.boilerplate_threshold)
+        if self.images is not None:
+            self.images.open(self.novel_dir / IMAGES_DIR)
+
+    async def read_toc(self) -> AsyncIterator[List[str]]:
+        """
+        Yields the chapter links of each ToC page as it loads, opening the
+        novel folder with the first one. Skipped pages are read at the end
+        if the new chapters cannot simply be appended.
+        """
+        self._toc = []
+        urls = {}
+        skipped = []
+        async for toc_page in iter_toc_pages(self.toc_url, self.pool, self.skip_toc_pages,
+                                             self.link_texts):
+            if self.manifest is None:
+                self._open(toc_page["title"])
+                self.cover_image_url = toc_page["cover_image_url"]
+            urls[toc_page["page"]] = toc_page["url"]
+            if toc_page["chapter_urls"] is None:
+                skipped.append((toc_page["page"], toc_page["url"]))
+                continue
+            self._toc.append((toc_page["page"], toc_page["chapter_urls"]))
+            yield toc_page["chapter_urls"]
+
+        self._appended = self._appended_order() if skipped else None
+        if skipped and self._appended is None:
+            print(f"[INFO] New chapters do not all follow the stored ones; reading the "
+                  f"{len(skipped)} skipped ToC page(s) too.")
+            async for number, links in fetch_toc_pages(self.pool, skipped, self.link_texts):
+                self._toc.append((number, links))
+                yield links
+            skipped = []
+        elif skipped:
+            print(f"[INFO] Appending {len(self._appended) - len(self.manifest.entries)} new "
+                  f"chapter(s); skipped {len(skipped)} unchanged ToC page(s).")
+        self.toc_pages_skipped = len(skipped)
+        self.toc_pages = ([urls[number] for number in sorted(urls)]
+                          if None not in urls.values() else [])
+
+    def _appended_order(self) -> Optional[List[str]]:
+        """
+        The chapter order when only some ToC pages were read: the stored
+        chapters in their order followed by the new links, or None when a
+        new link would be ordered before a stored chapter or the stored
+        indexes have gaps (chapters removed from the ToC since).
+        """
+        entries = self.manifest.entries
+        known = sorted(entries, key=lambda url: entries[url]["index"])
+        if [entries[url]["index"] for url in known] != list(range(1, len(known) + 1)):
+            return None
+        known_keys = {canonical_url(url) for url in known}
+        new = [url for url in order_chapter_urls(self._toc, self.link_texts)
+               if canonical_url(url) not in known_keys]
+        if not follows(known, new):
+            return None
+        return known + new
+
+    async def chapter_source(self) -> AsyncIterator[Tuple[Optional[int], str]]:
+        """
+        Yields (index, url) for every chapter to fetch, starting with the first
+        ToC page. Index is None for chapters dispatched before the ToC is complete.
+        """
+        completed = None
+        async for links in self.read_toc():
+            if completed is None:
+                completed = {canonical_url(url) for url in self.manifest.completed_urls()}
+            for url in links:
+                key = canonical_url(url)
+                if key not in completed and key not in self.dispatched:
+                    self.dispatched[key] = url
+                    yield None, url
+
+        for index, url in self._finish_toc():
+            key = canonical_url(url)
+            if key not in self.dispatched:
+                self.dispatched[key] = url
+                yield index, url
+
+    async def collect_toc(self) -> List[Tuple[int, str]]:
+        """
+        Reads the whole ToC before any chapter is fetched.
+
+        Returns:
+            List[Tuple[int, str]]: (index, url) of every chapter to fetch.
+        """
+        async for _ in self.read_toc():
+            pass
+
+        to_fetch = self._finish_toc()
+        self.dispatched.update((canonical_url(url), url) for _, url in to_fetch)
+        return to_fetch
+
+    def _finish_toc(self) -> List[Tuple[int, str]]:
+        # Chapters keep their ToC position as index; moved ones are re-keyed in the store,
+        # only missing or failed ones are fetched
+        self.chapter_urls = self._appended or order_chapter_urls(self._toc, self.link_texts)
+        to_fetch = self.manifest.sync_toc(self.chapter_urls, self.store)
+        if self.manifest.moved:
+            self.boilerplate.renumber(self.manifest.moved)
+        self.index_of = {canonical_url(url): index
+                         for index, url in enumerate(self.chapter_urls, start=1)}
+        print(f"[INFO] ToC complete: {len(self.chapter_urls)} chapters, "
+              f"{len(self.chapter_urls) - len(to_fetch)} already downloaded.")
+        self._unstage()
+        return to_fetch
+
+    def chapter_at(self, url: str) -> Tuple[int, str]:
+        """The index of a chapter link and the URL it is recorded under."""
+        index = self.index_of[canonical_url(url)]
+        return index, self.chapter_urls[index - 1]
+
+    def save(self, url: str, chapter: Dict[str, str]) -> str:
+        """
+        Saves a scraped chapter under its canonical index, or stages it if the
+        ToC is not complete yet.
+        """
+        self.saved += 1
+        if self.index_of is not None:
+            index, url = self.chapter_at(url)
+            return save_chapter(self.store, index, url, chapter, self.manifest, self.boilerplate)
+
+        path = self.staging_dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({**chapter, "source_url": url}, f, ensure_ascii=False)
+        self.staged[url] = path
+        print(f"[INFO] Staged '{chapter['title'] or url}' until the ToC is complete.")
+        return str(path)
+
+    def _unstage(self) -> None:
+        for url, path in self.staged.items():
+            with open(path, "r", encoding="utf-8") as f:
+                chapter = json.load(f)
+            index, url = self.chapter_at(url)
+            save_chapter(self.store, index, url, chapter, self.manifest, self.boilerplate)
+            path.unlink()
+        self.staged.clear()
+
+    def record_losses(self, retries: RetryQueue) -> None:
+        """Marks chapters that ran out of attempts as failed in the manifest."""
+        METRICS.count("chapters.lost", len(retries.lost))
+        for loss in retries.lost:
+            if canonical_url(loss["url"]) in self.index_of:
+                loss["index"], loss["url"] = self.chapter_at(loss["url"])
+            self.manifest.record_failure(loss["url"], loss["index"], loss["kind"])
+
+    def close(self) -> None:
+        """Closes the chapter store."""
+        if self.store is not None:
+            self.store.close()
+        if self.images is not None:
+            self.images.print_report()
+
+    def result(self, retries: RetryQueue) -> Dict:
+        """The summary returned by `scrape_all_chapters`."""
+        return {
+            "title": self.title,
+            "novel_dir": self.novel_dir,
+            "chapter_urls": self.chapter_urls,
+            "cover_image_url": self.cover_image_url,
+            "scraped_urls": [self.dispatched[key] for key in
+                             sorted(self.dispatched,
+                                    key=lambda key: (self.index_of or {}).get(key, 0))],
+            "failed_chapters": retries.summary()["lost"],
+        }
+
+async def scrape_novel(novel: NovelScrape, method: str, scheduler: HostScheduler,
+                       retries: RetryQueue, workers: Optional[FairWorkerPool] = None) -> Dict:
+    """
+    Streams every missing chapter of `novel` into its chapter store and
+    records the chapters that could not be downloaded.
+
+    Returns:
+        dict: See `scrape_all_chapters`.
+    """
+    try:
+        async for _, url, chapter in stream_chapters(novel.chapter_source(), method, novel.pool,
+                                                     scheduler, retries, workers,
+                                                     owner=novel.toc_url, images=novel.images):
+            novel.save(url, chapter)
+        novel.record_losses(retries)
+    finally:
+        novel.close()
+    return novel.result(retries)
+
+async def scrape_all_chapters(toc_url: str, method: str, output_base_dir: Path,
+                              scheduler_config: SchedulerConfig | None = None,
+                              cache: ResponseCache | None = None,
+                              store_backend: str = DEFAULT_STORE,
+                              processes: int = 1,
+                              request_filter: RequestFilter | None = DEFAULT_REQUEST_FILTER,
+                              fetch_images: bool = True,
+                              profiles: ProfileStore | None = None,
+                              boilerplate_threshold: float = DEFAULT_THRESHOLD) -> Dict:
+    """
+    Orchestrates the full scraping pipeline from a ToC page. Chapters start
+    downloading as soon as their ToC page is read and each one is written to
+    disk as soon as it completes.
 
     Args:
         toc_url (str): Table of contents page.
         method (str): Which scraper to use for chapters.
+        output_base_dir (Path): Directory holding one folder per novel.
+        scheduler_config (SchedulerConfig, optional): Overrides for per-host
+            concurrency and rate limits.
+        cache (ResponseCache, optional): On-disk cache for ToC and chapter pages.
+        store_backend (str): Chapter store for novels without stored chapters yet.
+        processes (int): Worker processes to spread chapters over. With more
+            than one, the whole ToC is read first and the chapters are
+            scraped by `scraper.sharding`.
+        request_filter (RequestFilter, optional): Sub-resources browser pages
+            do not load; None loads everything.
+        fetch_images (bool): Download the images inside chapters.
+        profiles (ProfileStore, optional): Site extraction profiles to use
+            and learn.
+        boilerplate_threshold (float): Leave out paragraphs found in more
+            than this fraction of the novel's chapters; 0 keeps everything.
 
     Returns:
         dict: {
             "title": str,
-            "chapters": List[ { "title": str, "content": str } ]
+            "novel_dir": Path,
+            "chapter_urls": List[str],
+            "cover_image_url": str or None,
+            "scraped_urls": List[str],
+            "failed_chapters": List[dict]
         }
     """
     print(f"[INFO] Starting full scrape using ToC: {toc_url}")
-    toc_info = await extract_toc_info(toc_url)
-    chapter_urls = toc_info["chapter_urls"]
-    novel_title = toc_info["title"]
-    slug = slugify(novel_title)
-    chapters_dir = output_base_dir / slug / "chapters"
-
-    # Load completed URLs to skip
-    completed_urls = get_existing_chapter_urls(chapters_dir)
-    print(f"[INFO] Skipping {len(completed_urls)} already-downloaded chapters.")
+    scheduler = HostScheduler(scheduler_config)
+    retries = RetryQueue()
+    pages_per_browser = math.ceil(scheduler.config.max_concurrency / BROWSER_COUNT)
 
-    filtered_urls = [url for url in chapter_urls if url not in completed_urls]
-
-    print(f"[INFO] Chapters to scrape: {len(filtered_urls)}")
-    semaphore = asyncio.Semaphore(CONCURRENT_CHAPTER_LIMIT)
-    tasks = [scrape_chapter(url, method, semaphore) for url in filtered_urls]
-    chapters = await asyncio.gather(*tasks)
-
-    return {
-        "title": novel_title,
-        "chapter_urls": chapter_urls,
-        "cover_image_url": toc_info.get("cover_image_url"),
-        "scraped_chapters": chapters,
-        "scraped_urls": filtered_urls,
-    }
+    async with BrowserPool(browsers=BROWSER_COUNT, pages_per_browser=pages_per_browser,
+                           max_page_uses=MAX_PAGE_USES, cache=cache,
+                           request_filter=request_filter, profiles=profiles) as pool:
+        novel = NovelScrape(toc_url, output_base_dir, pool, store_backend, fetch_images,
+                            boilerplate_threshold)
+        if processes > 1:
+            # sharding builds on this module, so it is imported on demand
+            # pylint: disable-next=import-outside-toplevel
+            from scraper.sharding import scrape_novel_sharded
+            result = await scrape_novel_sharded(novel, method, scheduler.config, retries,
+                                                processes, cache)
+        else:
+            result = await scrape_novel(novel, method, scheduler, retries)
+    scheduler.print_report()
+    retries.print_summary()
+    if cache is not None:
+        cache.print_report()
+    if profiles is not None:
+        profiles.print_report()
+    return result
@@ -3,60 +3,166 @@ Scrapes chapter content from pages using <p> tags for text structure.
 Returns a dictionary with the title and content.
 """
 
-from playwright.async_api import async_playwright
-from playwright_stealth import stealth_async
-from scraper.browser_utils import create_stealth_context
-from scraper.extract_chapter_title import extract_chapter_title
+from typing import Optional, Tuple
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+from scraper.browser_utils import BrowserPool, lease_page
+from scraper.image_utils import image_tag
+from scraper.metrics import METRICS
+from scraper.retry import FAILURE_TIMEOUT, ChapterScrapeError
+from scraper.extract_chapter_title import (TITLE_CANDIDATES_JS, TITLE_SELECTORS, TITLE_TEXTS_JS,
+                                           choose_title, learn_title)
+from scraper.site_profiles import ProfileStore, SiteProfile
 
-async def scrape_paragraph_chapter(url: str) -> dict:
+# The chapter is ready to read once its first paragraph is in the DOM;
+# waiting for the network to go idle only waits on ads and trackers
+CONTENT_READY_SELECTOR = "p"
+
+# Share of a page's paragraphs one element must directly hold to become
+# the site's content selector
+CONTENT_SHARE = 0.8
+
+# Finds the element directly holding most paragraphs and a selector matching
+# only it. Ids and classes with digits usually change from chapter to
+# chapter, so they are not used.
+CONTENT_SELECTOR_JS = """
+(share) => {
+    const counts = new Map();
+    let total = 0;
+    for (const p of document.querySelectorAll("p")) {
+        if (!p.innerText.trim() || !p.parentElement) continue;
+        counts.set(p.parentElement, (counts.get(p.parentElement) || 0) + 1);
+        total += 1;
+    }
+    let best = null;
+    let most = 0;
+    for (const [el, n] of counts) if (n > most) { best = el; most = n; }
+    if (!best || best === document.body || most < total * share) return null;
+
+    const stable = (name) => !/\d/.test(name);
+    let selector = null;
+    if (best.id && stable(best.id)) {
+        selector = "#" + CSS.escape(best.id);
+    } else {
+        const classes = Array.from(best.classList).filter(stable);
+        if (classes.length) {
+            selector = best.tagName.toLowerCase()
+                + classes.map((name) => "." + CSS.escape(name)).join("");
+        }
+    }
+    return selector && document.querySelectorAll(selector).length === 1 ? selector : null;
+}
+"""
+
+# Gathers the title, the text of every <p> and the images inside paragraphs
+# or figures, in document order, in one evaluation. Lazy-loaded images keep
+# their real URL in data-src. With a site profile only its title selector
+# and content element are read; without one every title candidate is read
+# and the content element is looked for.
+CHAPTER_EXTRACTION_JS = f"""
+([selectors, titleSelector, contentSelector, share]) => {{
+    const root = contentSelector ? document.querySelector(contentSelector) : document;
+    return {{
+        title: titleSelector
+            ? {{ candidates: [({TITLE_TEXTS_JS})(titleSelector)], lines: [] }}
+            : ({TITLE_CANDIDATES_JS})(selectors),
+        blocks: !root ? [] : Array.from(root.querySelectorAll("p, img"), (el) => {{
+            if (el.tagName !== "IMG") return {{ text: el.innerText }};
+            const src = el.getAttribute("data-src") || el.getAttribute("src");
+            if (!src || !el.closest("p, figure")) return null;
+            const url = new URL(src, document.baseURI).href;
+            return url.startsWith("http") ? {{ image: url }} : null;
+        }}).filter(Boolean),
+        content: contentSelector ? null : ({CONTENT_SELECTOR_JS})(share),
+    }};
+}}
+"""
+
+
+async def extract_chapter(page: Page, url: str,
+                          profiles: Optional[ProfileStore] = None) -> Tuple[Optional[str], list]:
+    """
+    Reads the title and content blocks of a loaded chapter page, with the
+    site's profile when one is known. If the profile no longer matches, the
+    generic extraction runs and the profile is relearned.
+
+    Returns:
+        tuple: (title or None, [{"text": str} | {"image": str}, ...])
+    """
+    profile = profiles.get(url) if profiles else SiteProfile()
+    arguments = [TITLE_SELECTORS, profile.chapter_title, profile.content, CONTENT_SHARE]
+    extracted = await page.evaluate(CHAPTER_EXTRACTION_JS, arguments)
+
+    if profile.chapter_title or profile.content:
+        matched = ((not profile.chapter_title or choose_title(extracted["title"]))
+                   and (not profile.content
+                        or any(block.get("text", "").strip() for block in extracted["blocks"])))
+        profiles.record(bool(matched))
+        if not matched:
+            profile = SiteProfile()
+            extracted = await page.evaluate(CHAPTER_EXTRACTION_JS,
+                                            [TITLE_SELECTORS, None, None, CONTENT_SHARE])
+
+    if profile.chapter_title:
+        title = choose_title(extracted["title"])
+    else:
+        title = learn_title(profiles, url, extracted["title"])
+    if profiles is not None and not profile.content:
+        profiles.learn(url, content=extracted["content"])
+    return title, extracted["blocks"]
+
+
+async def scrape_paragraph_chapter(url: str, pool: Optional[BrowserPool] = None) -> dict:
     """
     Scrapes all <p> tags from a given webpage and returns structured chapter data.
 
     Args:
         url (str): The chapter page URL.
+        pool (BrowserPool, optional): Pool to lease a page from. When omitted,
+            a dedicated browser is launched for this chapter.
 
     Returns:
         dict: {
             "title": str | None,
             "content": str (HTML-formatted)
         }
-    """
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await create_stealth_context(browser)
-        page = await context.new_page()
 
-        await stealth_async(page)
+    Raises:
+        ChapterScrapeError: If the page or its content did not load in time.
+    """
+    async with lease_page(pool) as page:
         print(f"[INFO] Visiting: {url}")
 
         try:
-            await page.goto(url, timeout=15000)
-            await page.wait_for_load_state("networkidle", timeout=10000)
+            with METRICS.stage("paragraph.goto"):
+                response = await page.goto(url, timeout=15000, wait_until="domcontentloaded")
+            METRICS.add_response_bytes(response)
+            with METRICS.stage("paragraph.content_ready"):
+                await page.wait_for_selector(CONTENT_READY_SELECTOR, state="attached",
+                                             timeout=10000)
 
-            # Extract title
-            title = await extract_chapter_title(page)
+            # Extract title and paragraphs together
+            with METRICS.stage("paragraph.extract"):
+                title, blocks = await extract_chapter(page, url, pool.profiles if pool else None)
 
-            # Extract paragraphs
-            paragraphs = page.locator("p")
-            count = await paragraphs.count()
             results = []
-
-            for i in range(count):
-                text = await paragraphs.nth(i).inner_text()
-                cleaned = text.strip()
+            images = 0
+            for block in blocks:
+                if "image" in block:
+                    results.append(image_tag(block["image"]))
+                    images += 1
+                    continue
+                cleaned = block["text"].strip()
                 if cleaned:
                     results.append(f"<p>{cleaned}</p>")
 
-            print(f"[INFO] Found {len(results)} paragraphs. Title: {title or '[None]'}")
+            print(f"[INFO] Found {len(results) - images} paragraphs, {images} image(s). "
+                  f"Title: {title or '[None]'}")
 
             return {
                 "title": title,
                 "content": "\n".join(results)
             }
 
-        except TimeoutError as e:
+        except PlaywrightTimeoutError as e:
             print(f"[ERROR] Timeout while scraping: {e}")
-        finally:
-            await browser.close()
-
-    return {"title": None, "content": ""}
+            raise ChapterScrapeError(FAILURE_TIMEOUT, str(e)) from e
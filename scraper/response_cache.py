@@ -0,0 +1,267 @@
+"""
+On-disk cache of fetched pages and images, shared by the HTTP client, the
+browser pool's request routing and the cover download.
+
+Each response is stored in a single file named by the SHA-256 of its URL:
+one JSON header line (status, content type, validators, timestamps) followed
+by the zlib-compressed body. Fresh entries are served without touching the
+network; stale ones are revalidated with If-None-Match / If-Modified-Since so
+an unchanged page costs a 304 instead of a full download. ToC pages, which
+gain chapters between runs, are revalidated even while fresh (see
+`BrowserPool.page`). The cache is kept under `max_bytes` by evicting the
+least recently used entries.
+"""
+import hashlib
+import json
+import os
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+DEFAULT_CACHE_DIR = Path("output") / ".cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 60 * 60
+COMPRESSION_LEVEL = 6
+
+ENTRY_SUFFIX = ".entry"
+
+
+def cache_key(url: str) -> str:
+    """Content address of a URL: the hex SHA-256 of the URL string."""
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedResponse:
+    """
+    A response read back from the cache.
+
+    Attributes:
+        url (str): Requested URL.
+        status (int): HTTP status code of the stored response.
+        content_type (str | None): Content-Type header of the stored response.
+        body (bytes): Decompressed response body.
+        etag (str | None): ETag validator, if the server sent one.
+        last_modified (str | None): Last-Modified validator, if the server sent one.
+        stored_at (float): Unix time the entry was stored or last revalidated.
+        fresh (bool): Whether the entry is still within its TTL.
+    """
+    url: str
+    status: int
+    content_type: Optional[str]
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+    fresh: bool
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def text(self) -> str:
+        """The body decoded using the charset from the content type, if any."""
+        charset = "utf-8"
+        for part in (self.content_type or "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name.lower() == "charset" and value:
+                charset = value.strip("\"'")
+        try:
+            return self.body.decode(charset, errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of successful GET responses on disk.
+
+    Only 200 responses are stored. Every entry expires `ttl` seconds after it
+    was stored or last revalidated; in `offline` mode entries never expire and
+    callers should not go to the network for a URL that is cached.
+
+    Usage:
+        cache = ResponseCache(Path("output/.cache"))
+        entry = cache.lookup(url)
+        if entry is None or not entry.fresh:
+            ...  # fetch, sending entry.validators() when entry is not None
+    """
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl: float = DEFAULT_TTL_SECONDS,
+                 offline: bool = False):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.offline = offline
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Rebuilds the LRU order from entry modification times."""
+        entries = []
+        for path in self.directory.glob(f"*/*{ENTRY_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+            self._total += size
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{ENTRY_SUFFIX}"
+
+    def _read(self, key: str) -> Optional[tuple]:
+        try:
+            with open(self._path(key), "rb") as f:
+                header = json.loads(f.readline())
+                compressed = f.read()
+        except (OSError, ValueError):
+            self._forget(key)
+            return None
+        return header, compressed
+
+    def _write(self, key: str, header: Dict, compressed: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write(compressed)
+        os.replace(tmp_path, path)
+
+        self._total -= self._sizes.pop(key, 0)
+        self._sizes[key] = path.stat().st_size
+        self._total += self._sizes[key]
+        self._evict()
+
+    def _forget(self, key: str) -> None:
+        self._total -= self._sizes.pop(key, 0)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes and len(self._sizes) > 1:
+            key = next(iter(self._sizes))
+            self._forget(key)
+            self.evicted += 1
+
+    def _touch(self, key: str) -> None:
+        self._sizes.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        """
+        Reads the cached response for `url`.
+
+        Returns:
+            CachedResponse | None: The entry, fresh or stale, or None on a miss.
+        """
+        key = cache_key(url)
+        record = self._read(key) if key in self._sizes else None
+        if record is None:
+            self.misses += 1
+            return None
+
+        header, compressed = record
+        try:
+            body = zlib.decompress(compressed)
+        except zlib.error:
+            self._forget(key)
+            self.misses += 1
+            return None
+
+        self._touch(key)
+        fresh = self.offline or time.time() - header["stored_at"] < self.ttl
+        if fresh:
+            self.hits += 1
+        return CachedResponse(url=url, status=header["status"],
+                              content_type=header.get("content_type"), body=body,
+                              etag=header.get("etag"),
+                              last_modified=header.get("last_modified"),
+                              stored_at=header["stored_at"], fresh=fresh)
+
+    def store(self, url: str, status: int, headers: Mapping[str, str], body: bytes) -> None:
+        """
+        Stores a response. Anything but a 200 is ignored.
+
+        Args:
+            url (str): Requested URL.
+            status (int): HTTP status code.
+            headers (Mapping): Response headers; lookups are tried in both
+                header-name casings since aiohttp, requests and Playwright differ.
+            body (bytes): Decoded (not content-encoded) response body.
+        """
+        if status != 200:
+            return
+
+        def header(name: str) -> Optional[str]:
+            return headers.get(name) or headers.get(name.lower())
+
+        self._write(cache_key(url), {
+            "url": url,
+            "status": status,
+            "content_type": header("Content-Type"),
+            "etag": header("ETag"),
+            "last_modified": header("Last-Modified"),
+            "stored_at": time.time(),
+        }, zlib.compress(body, COMPRESSION_LEVEL))
+        self.stored += 1
+
+    def refresh(self, url: str) -> None:
+        """
+        Restarts the TTL of an entry after the server answered 304 Not Modified.
+        The compressed body is copied as is.
+        """
+        key = cache_key(url)
+        record = self._read(key) if key in self._sizes else None
+        if record is None:
+            return
+        header, compressed = record
+        header["stored_at"] = time.time()
+        self._write(key, header, compressed)
+        self.revalidated += 1
+
+    def report(self) -> Dict:
+        """Hit, revalidation, miss and eviction counters plus the current size."""
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "stored": self.stored,
+            "evicted": self.evicted,
+            "entries": len(self._sizes),
+            "bytes": self._total,
+        }
+
+    def print_report(self) -> None:
+        """Prints a one-line summary of cache usage for this run."""
+        report = self.report()
+        print(f"[INFO] Response cache: {report['hits']} hit(s), "
+              f"{report['revalidated']} revalidated, {report['misses']} miss(es), "
+              f"{report['entries']} entries / {report['bytes'] / 1024 / 1024:.1f} MiB")
@@ -0,0 +1,174 @@
+"""
+Failure classification and the low-priority retry queue for chapter scrapes.
+"""
+import heapq
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+FAILURE_TIMEOUT = "timeout"
+FAILURE_HTTP = "http_error"
+FAILURE_EMPTY = "empty_content"
+FAILURE_PARSE = "parse_failure"
+
+# Responses that will not change by asking again
+PERMANENT_HTTP_STATUSES = {400, 401, 404, 410, 451}
+
+
+class ChapterScrapeError(Exception):
+    """
+    A chapter scrape failed for a known reason.
+
+    Attributes:
+        kind (str): One of the FAILURE_* constants.
+        status (int | None): HTTP status code for FAILURE_HTTP, if known.
+    """
+
+    def __init__(self, kind: str, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.kind = kind
+        self.status = status
+
+    @property
+    def retryable(self) -> bool:
+        """Whether another attempt could succeed."""
+        return not (self.kind == FAILURE_HTTP and self.status in PERMANENT_HTTP_STATUSES)
+
+
+def classify_exception(exc: Exception) -> ChapterScrapeError:
+    """
+    Wraps an arbitrary scraper exception in a classified `ChapterScrapeError`.
+    """
+    if isinstance(exc, ChapterScrapeError):
+        return exc
+    # Playwright's TimeoutError does not subclass the builtin one
+    if isinstance(exc, TimeoutError) or type(exc).__name__ == "TimeoutError":
+        return ChapterScrapeError(FAILURE_TIMEOUT, str(exc) or "timed out")
+    if "net::ERR_" in str(exc):
+        return ChapterScrapeError(FAILURE_HTTP, str(exc))
+    return ChapterScrapeError(FAILURE_PARSE, f"{type(exc).__name__}: {exc}")
+
+
+@dataclass
+class RetryPolicy:
+    """
+    How often and how soon failed chapters are tried again. The n-th retry
+    waits between half and all of `base_delay * 2 ** (n - 1)`, capped at `max_delay`.
+    """
+    max_attempts: int = 4
+    base_delay: float = 2.0    # seconds
+    max_delay: float = 60.0    # seconds
+
+    def delay(self, attempt: int) -> float:
+        """Jittered delay before the attempt following `attempt` failures."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+def chapter_label(index: Optional[int], url: str) -> str:
+    """How a chapter is named in log lines; the index is unknown while the ToC loads."""
+    return f"chapter {index}" if index is not None else url
+
+
+class RetryQueue:
+    """
+    Holds failed chapters until their backoff expires and keeps the failure
+    statistics for the end-of-run report.
+
+    The orchestrator only takes work from this queue when no fresh chapter is
+    waiting, so retries never hold up chapters that have not been tried yet.
+    """
+
+    def __init__(self, policy: Optional[RetryPolicy] = None):
+        self.policy = policy or RetryPolicy()
+        self.attempts: Dict[str, int] = {}
+        self.failure_counts: Counter = Counter()
+        self.recovered = 0
+        self.lost: List[Dict] = []
+        self._heap: List[Tuple[float, int, Optional[int], str]] = []
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def record_failure(self, index: Optional[int], url: str, error: ChapterScrapeError) -> bool:
+        """
+        Counts a failed attempt and schedules a retry if attempts remain.
+
+        Returns:
+            bool: True if the chapter was queued for another attempt.
+        """
+        attempts = self.attempts.get(url, 0) + 1
+        self.attempts[url] = attempts
+        self.failure_counts[error.kind] += 1
+
+        if error.retryable and attempts < self.policy.max_attempts:
+            delay = self.policy.delay(attempts)
+            heapq.heappush(self._heap, (time.monotonic() + delay, self._sequence, index, url))
+            self._sequence += 1
+            print(f"[WARN] {error.kind} on {chapter_label(index, url)} ({error}); "
+                  f"retry {attempts}/{self.policy.max_attempts - 1} in {delay:.1f}s")
+            return True
+
+        self.lost.append({
+            "index": index,
+            "url": url,
+            "kind": error.kind,
+            "status": error.status,
+            "message": str(error),
+            "attempts": attempts,
+        })
+        print(f"[ERROR] Giving up on {chapter_label(index, url)} after {attempts} attempt(s): "
+              f"{error.kind}")
+        return False
+
+    def record_success(self, url: str) -> None:
+        """Notes a successful attempt, counting it as recovered if it had failed before."""
+        if self.attempts.get(url):
+            self.recovered += 1
+
+    def pop_ready(self) -> Optional[Tuple[Optional[int], str]]:
+        """The next (index, url) whose backoff has expired, if any."""
+        if self._heap and self._heap[0][0] <= time.monotonic():
+            _, _, index, url = heapq.heappop(self._heap)
+            return index, url
+        return None
+
+    def next_delay(self) -> Optional[float]:
+        """Seconds until the next retry is due, or None if the queue is empty."""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
+
+    def summary(self) -> Dict:
+        """Failure counts by kind, recovered chapters and permanent losses."""
+        return {
+            "failures_by_kind": dict(self.failure_counts),
+            "recovered": self.recovered,
+            "lost": sorted(self.lost, key=lambda loss: loss["index"] or 0),
+        }
+
+    def merge(self, summary: Dict) -> None:
+        """Adds the `summary()` of a queue run elsewhere, e.g. in a worker process."""
+        self.failure_counts.update(summary["failures_by_kind"])
+        self.recovered += summary["recovered"]
+        self.lost.extend(summary["lost"])
+
+    def print_summary(self) -> None:
+        """Prints the end-of-run failure report."""
+        if not self.failure_counts:
+            print("[INFO] All chapters scraped without failures.")
+            return
+
+        kinds = ", ".join(f"{kind}: {count}" for kind, count in self.failure_counts.items())
+        print(f"[INFO] Failed attempts by kind: {kinds}. Recovered by retry: {self.recovered}.")
+        if not self.lost:
+            print("[INFO] No chapters were permanently lost.")
+            return
+
+        print(f"[WARN] {len(self.lost)} chapter(s) permanently lost:")
+        for loss in sorted(self.lost, key=lambda loss: loss["index"] or 0):
+            print(f"[WARN]   #{loss['index']} {loss['url']} "
+                  f"({loss['kind']} after {loss['attempts']} attempt(s): {loss['message']})")
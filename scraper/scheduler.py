@@ -0,0 +1,265 @@
+"""
+Per-host scheduling for chapter requests: AIMD concurrency control,
+token-bucket rate limiting and exponential backoff after failures, plus a
+global worker pool shared fairly between novels scraped together.
+"""
+import asyncio
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Dict
+from urllib.parse import urlparse
+
+
+@dataclass
+class SchedulerConfig:
+    """
+    Tunables for `HostScheduler`. Every host starts at `initial_concurrency`,
+    gains one slot after each window of successful requests and is cut by
+    `decrease_factor` on a failure, within [min_concurrency, max_concurrency].
+    """
+    initial_concurrency: int = 3
+    min_concurrency: int = 1
+    max_concurrency: int = 8
+    rate: float = 10.0           # requests per second per host, 0 disables the limit
+    burst: int = 10              # token bucket capacity
+    decrease_factor: float = 0.5
+    backoff_base: float = 1.0    # seconds
+    backoff_max: float = 60.0    # seconds
+
+
+class HostLimiter:
+    """
+    Concurrency window and token bucket for a single host.
+    """
+
+    def __init__(self, host: str, config: SchedulerConfig):
+        self.host = host
+        self.config = config
+        self.limit = float(max(config.min_concurrency,
+                               min(config.initial_concurrency, config.max_concurrency)))
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.started_at = time.monotonic()
+
+        self._tokens = float(config.burst)
+        self._refilled_at = time.monotonic()
+        self._successes_in_window = 0
+        self._failure_streak = 0
+        self._backoff_until = 0.0
+        self._decreased_at = 0.0
+        self._changed = asyncio.Condition()
+
+    async def acquire(self) -> float:
+        """
+        Waits for a free concurrency slot, any active backoff, and a rate token.
+
+        Returns:
+            float: Monotonic time the request started, to pass to `release`.
+        """
+        async with self._changed:
+            while True:
+                wait = self._backoff_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    break
+                try:
+                    await asyncio.wait_for(self._changed.wait(),
+                                           timeout=wait if wait > 0 else None)
+                except asyncio.TimeoutError:
+                    pass
+            self.in_flight += 1
+
+        await self._take_token()
+        return time.monotonic()
+
+    async def _take_token(self) -> None:
+        if self.config.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            elapsed = now - self._refilled_at
+            self._tokens = min(self.config.burst, self._tokens + elapsed * self.config.rate)
+            self._refilled_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.config.rate)
+
+    async def release(self, success: bool, started_at: float) -> None:
+        """
+        Frees the slot and adjusts the window from the request's outcome.
+
+        The window shrinks and the backoff grows at most once per round of
+        requests: failures of requests started before the last decrease are
+        counted but do not shrink the window again.
+        """
+        async with self._changed:
+            self.in_flight -= 1
+            self.requests += 1
+            if success:
+                self._failure_streak = 0
+                self._successes_in_window += 1
+                # Additive increase: one extra slot per window of successes
+                if self._successes_in_window >= int(self.limit):
+                    self._successes_in_window = 0
+                    self.limit = min(self.config.max_concurrency, self.limit + 1)
+            else:
+                self.failures += 1
+                self._successes_in_window = 0
+                if started_at >= self._decreased_at:
+                    self._decreased_at = time.monotonic()
+                    self._failure_streak += 1
+                    self.limit = max(self.config.min_concurrency,
+                                     self.limit * self.config.decrease_factor)
+                    backoff = min(self.config.backoff_max,
+                                  self.config.backoff_base * 2 ** (self._failure_streak - 1))
+                    self._backoff_until = time.monotonic() + backoff
+                    print(f"[WARN] {self.host}: failure, concurrency -> {int(self.limit)}, "
+                          f"backing off {backoff:.1f}s")
+            self._changed.notify_all()
+
+    def report(self) -> Dict:
+        """Snapshot of this host's counters."""
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "host": self.host,
+            "requests": self.requests,
+            "failures": self.failures,
+            "concurrency": int(self.limit),
+            "requests_per_second": round(self.requests / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+class HostScheduler:
+    """
+    Hands out request slots per host so each site is paced independently.
+
+    Usage:
+        scheduler = HostScheduler(SchedulerConfig(max_concurrency=6))
+        async with scheduler.slot(url) as outcome:
+            chapter = await scrape(url)
+            outcome["success"] = bool(chapter["content"])
+    """
+
+    def __init__(self, config: SchedulerConfig | None = None):
+        self.config = config or SchedulerConfig()
+        self._hosts: Dict[str, HostLimiter] = {}
+
+    def limiter(self, url: str) -> HostLimiter:
+        """The limiter for the host serving `url`."""
+        host = urlparse(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = HostLimiter(host, self.config)
+        return self._hosts[host]
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[Dict[str, bool]]:
+        """
+        Holds a request slot for `url`'s host. The caller marks the outcome by
+        setting `success` on the yielded dict; an exception counts as a failure.
+        """
+        limiter = self.limiter(url)
+        started_at = await limiter.acquire()
+        outcome = {"success": False}
+        try:
+            yield outcome
+        finally:
+            await limiter.release(outcome["success"], started_at)
+
+    def report(self) -> list:
+        """Per-host counters, one dict per host."""
+        return [limiter.report() for limiter in self._hosts.values()]
+
+    def print_report(self) -> None:
+        """Prints the per-host counters."""
+        for entry in self.report():
+            print(f"[INFO] {entry['host']}: {entry['requests']} requests, "
+                  f"{entry['failures']} failures, final concurrency {entry['concurrency']}, "
+                  f"{entry['requests_per_second']} req/s")
+
+
+class FairWorkerPool:
+    """
+    Caps the number of chapter scrapes running at once across every novel in
+    a batch. When all workers are busy, freed workers are handed to waiting
+    owners (novels) in round-robin order, so a novel with thousands of
+    pending chapters cannot starve one with a handful.
+
+    Usage:
+        workers = FairWorkerPool(32)
+        async with workers.slot(toc_url):
+            chapter = await scrape(url)
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self.running: Counter = Counter()
+        self._free = self.workers
+        self._waiting: Dict[str, Deque[asyncio.Future]] = {}
+        self._turns: Deque[str] = deque()
+
+    async def acquire(self, owner: str) -> None:
+        """Waits for a worker, taking turns with the other waiting owners."""
+        if self._free > 0 and not self._turns:
+            self._free -= 1
+            self.running[owner] += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue = self._waiting.setdefault(owner, deque())
+        if not queue:
+            self._turns.append(owner)
+        queue.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The worker was handed over just as we were cancelled
+                self.release(owner)
+            else:
+                self._withdraw(owner, waiter)
+            raise
+
+    def _withdraw(self, owner: str, waiter: asyncio.Future) -> None:
+        queue = self._waiting.get(owner)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        if not queue:
+            del self._waiting[owner]
+            self._turns.remove(owner)
+
+    def release(self, owner: str) -> None:
+        """Returns a worker, handing it to the next owner in turn if any is waiting."""
+        self.running[owner] -= 1
+        if self.running[owner] <= 0:
+            del self.running[owner]
+
+        while self._turns:
+            next_owner = self._turns.popleft()
+            queue = self._waiting[next_owner]
+            waiter = queue.popleft()
+            if queue:
+                self._turns.append(next_owner)
+            else:
+                del self._waiting[next_owner]
+            if not waiter.done():
+                self.running[next_owner] += 1
+                waiter.set_result(None)
+                return
+        self._free += 1
+
+    @asynccontextmanager
+    async def slot(self, owner: str) -> AsyncIterator[None]:
+        """Holds one worker for `owner` for the duration of the block."""
+        await self.acquire(owner)
+        try:
+            yield
+        finally:
+            self.release(owner)
+
+    def waiting(self, owner: str) -> int:
+        """Number of scrapes `owner` has queued for a worker."""
+        return len(self._waiting.get(owner, ()))
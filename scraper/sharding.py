@@ -0,0 +1,204 @@
+"""
+Process-sharded chapter scraping.
+
+A single event loop driving Playwright saturates one core on protocol and
+parsing work long before the network is the bottleneck. In sharded mode the
+chapters to fetch are split across worker processes, each with its own event
+loop, browser pool and per-host scheduler. Workers write chapters under
+their canonical index into a private log store; the parent merges every
+shard into the novel's chapter store and manifest as the shard finishes, so
+only one process ever writes to them.
+"""
+import asyncio
+import dataclasses
+import math
+import multiprocessing
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from scraper.browser_utils import BrowserPool, RequestFilter
+from scraper.chapter_store import LogChapterStore
+from scraper.image_utils import ImageFetcher
+from scraper.metrics import METRICS
+from scraper.orchestrator import (BROWSER_COUNT, MAX_PAGE_USES, NovelScrape, chapter_record,
+                                  save_chapter, stream_chapters)
+from scraper.response_cache import ResponseCache
+from scraper.retry import RetryQueue
+from scraper.site_profiles import ProfileStore
+from scraper.scheduler import HostScheduler, SchedulerConfig
+
+SHARD_DIR_PREFIX = "shard-"
+
+
+def shard_config(config: SchedulerConfig, shards: int) -> SchedulerConfig:
+    """
+    Divides the per-host limits between `shards` processes so that together
+    they stay within what a single process would send to each host.
+    """
+    return dataclasses.replace(
+        config,
+        initial_concurrency=max(1, math.ceil(config.initial_concurrency / shards)),
+        min_concurrency=max(1, config.min_concurrency // shards),
+        max_concurrency=max(1, math.ceil(config.max_concurrency / shards)),
+        rate=config.rate / shards,
+        burst=max(1, math.ceil(config.burst / shards)),
+    )
+
+
+def split_chapters(chapters: List[Tuple[int, str]], shards: int) -> List[List[Tuple[int, str]]]:
+    """
+    Deals chapters out round-robin, so every shard covers the whole book and
+    all shards finish at about the same time.
+    """
+    return [chapters[i::shards] for i in range(shards) if chapters[i::shards]]
+
+
+async def _scrape_shard(chapters: List[Tuple[int, str]], method: str, config: SchedulerConfig,
+                        shard_dir: Path, cache: Optional[ResponseCache],
+                        request_filter: Optional[RequestFilter],
+                        images_dir: Optional[Path], profiles: Optional[ProfileStore]) -> Dict:
+    scheduler = HostScheduler(config)
+    retries = RetryQueue()
+    async with BrowserPool(browsers=BROWSER_COUNT,
+                           pages_per_browser=math.ceil(config.max_concurrency / BROWSER_COUNT),
+                           max_page_uses=MAX_PAGE_USES, cache=cache,
+                           request_filter=request_filter, profiles=profiles) as pool:
+        images = None
+        if images_dir is not None:
+            images = ImageFetcher(pool.http)
+            images.open(images_dir)
+        with LogChapterStore(shard_dir) as store:
+            async for index, url, chapter in stream_chapters(chapters, method, pool,
+                                                             scheduler, retries,
+                                                             images=images):
+                with METRICS.stage("shard.write"):
+                    store.put(index, chapter_record(index, url, chapter))
+    scheduler.print_report()
+    return {"retries": retries.summary(), "metrics": METRICS.snapshot()}
+
+
+def run_shard(chapters: List[Tuple[int, str]], method: str, config: SchedulerConfig,
+              shard_dir: str, cache_options: Optional[Dict] = None,
+              request_filter: Optional[RequestFilter] = None,
+              images_dir: Optional[str] = None, profiles_path: Optional[str] = None) -> Dict:
+    """
+    Worker process entry point: scrapes one shard into `shard_dir`.
+
+    Returns:
+        dict: { "retries": the shard's `RetryQueue.summary()`,
+                "metrics": its `RunMetrics.snapshot()` }
+    """
+    METRICS.reset()
+    cache = ResponseCache(**cache_options) if cache_options else None
+    profiles = ProfileStore(Path(profiles_path)) if profiles_path else None
+    return asyncio.run(_scrape_shard(chapters, method, config, Path(shard_dir), cache,
+                                     request_filter, Path(images_dir) if images_dir else None,
+                                     profiles))
+
+
+async def scrape_in_processes(chapters: List[Tuple[int, str]], method: str,
+                              config: SchedulerConfig, processes: int, work_dir: Path,
+                              cache: Optional[ResponseCache] = None,
+                              request_filter: Optional[RequestFilter] = None,
+                              images_dir: Optional[Path] = None,
+                              profiles_path: Optional[Path] = None
+                              ) -> AsyncIterator[Tuple[Path, Dict]]:
+    """
+    Scrapes `chapters` in up to `processes` worker processes.
+
+    Args:
+        chapters: (index, url) pairs with their canonical indexes.
+        method (str): Which scraper to use for chapters.
+        config (SchedulerConfig): Per-host limits for all shards together.
+        processes (int): Number of worker processes.
+        work_dir (Path): Directory for the shard stores.
+        cache (ResponseCache, optional): Cache whose directory the workers share.
+        request_filter (RequestFilter, optional): Sub-resources the workers'
+            browser pages do not load.
+        images_dir (Path, optional): Folder the workers download chapter
+            images into; images are not fetched when omitted.
+        profiles_path (Path, optional): Site profiles file the workers use
+            and learn into.
+
+    Yields:
+        tuple: (shard store directory, `run_shard` result) as each shard finishes.
+    """
+    shards = split_chapters(chapters, max(1, processes))
+    if not shards:
+        return
+    per_shard = shard_config(config, len(shards))
+    cache_options = None
+    if cache is not None:
+        cache_options = {"directory": cache.directory, "max_bytes": cache.max_bytes,
+                         "ttl": cache.ttl, "offline": cache.offline}
+
+    loop = asyncio.get_running_loop()
+    # Playwright and asyncio do not survive fork; start workers from scratch
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as executor:
+        async def run(number: int, shard: List[Tuple[int, str]]) -> Tuple[Path, Dict]:
+            shard_dir = work_dir / f"{SHARD_DIR_PREFIX}{number}"
+            result = await loop.run_in_executor(executor, run_shard, shard, method,
+                                                per_shard, str(shard_dir), cache_options,
+                                                request_filter,
+                                                str(images_dir) if images_dir else None,
+                                                str(profiles_path) if profiles_path else None)
+            return shard_dir, result
+
+        print(f"[INFO] Scraping {len(chapters)} chapters in {len(shards)} processes")
+        for finished in asyncio.as_completed([run(n, shard) for n, shard in enumerate(shards)]):
+            yield await finished
+
+
+def merge_shard(novel: NovelScrape, shard_dir: Path) -> int:
+    """
+    Moves every chapter of a shard store into the novel's chapter store and
+    manifest, then deletes the shard.
+
+    Returns:
+        int: Number of chapters merged.
+    """
+    merged = 0
+    with LogChapterStore(shard_dir, read_only=True) as shard:
+        for chapter in shard.iter_chapters():
+            save_chapter(novel.store, chapter["number"], chapter["source_url"], chapter,
+                         novel.manifest, novel.boilerplate)
+            merged += 1
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    novel.saved += merged
+    return merged
+
+
+async def scrape_novel_sharded(novel: NovelScrape, method: str, config: SchedulerConfig,
+                               retries: RetryQueue, processes: int,
+                               cache: Optional[ResponseCache] = None) -> Dict:
+    """
+    Reads the whole ToC, then scrapes the missing chapters of `novel` in
+    `processes` worker processes and merges them with their canonical indexes.
+
+    Returns:
+        dict: See `scrape_all_chapters`.
+    """
+    try:
+        to_fetch = await novel.collect_toc()
+        images_dir = novel.images.directory if novel.images is not None else None
+        profiles = novel.pool.profiles
+        async for shard_dir, shard in scrape_in_processes(to_fetch, method, config, processes,
+                                                            novel.staging_dir, cache,
+                                                            novel.pool.request_filter,
+                                                            images_dir,
+                                                            profiles.path if profiles else None):
+            retries.merge(shard["retries"])
+            METRICS.merge(shard["metrics"])
+            merged = merge_shard(novel, shard_dir)
+            print(f"[INFO] Merged {merged} chapter(s) from {shard_dir.name}")
+        novel.record_losses(retries)
+    finally:
+        # Chapters of shards that crashed are still worth keeping
+        if novel.staging_dir is not None:
+            for shard_dir in novel.staging_dir.glob(f"{SHARD_DIR_PREFIX}*"):
+                merge_shard(novel, shard_dir)
+        novel.close()
+    return novel.result(retries)
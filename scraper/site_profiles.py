@@ -0,0 +1,127 @@
+"""
+Per-site extraction profiles.
+
+The generic extraction runs a cascade of guesses on every page: eight
+title selector groups on chapters, title and cover probes on the ToC, and
+up to seven "next page" button probes per ToC page. The first page that
+succeeds on a site shows which guesses work there. They are stored as the site's profile, and
+later pages run one targeted query with it. Profiles are kept in a JSON
+file, so later runs start with them.
+
+When a profiled query stops matching (for example after a site redesign),
+that page goes through the generic path again and the profile is relearned
+from it.
+"""
+import json
+import os
+from collections import Counter
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from scraper.metrics import METRICS
+
+DEFAULT_PROFILES_PATH = Path("output") / "site_profiles.json"
+
+
+def site_key(url: str) -> str:
+    """Profiles are shared by every page of a host, with or without www."""
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+@dataclass
+class SiteProfile:
+    """
+    What worked on one site. None means not learned yet.
+
+    Attributes:
+        chapter_title (str | None): Selector holding the chapter title.
+        content (str | None): Selector of the element holding the chapter's
+            paragraphs.
+        toc_title (str | None): Selector holding the novel title on the ToC.
+        toc_cover (str | None): Selector of the cover image on the ToC.
+        next_button (str | None): Selector of the ToC's "next page" link, on
+            sites whose ToC pages are walked one by one.
+    """
+    chapter_title: Optional[str] = None
+    content: Optional[str] = None
+    toc_title: Optional[str] = None
+    toc_cover: Optional[str] = None
+    next_button: Optional[str] = None
+
+
+class ProfileStore:
+    """
+    Site profiles by host, loaded from and saved to a JSON file.
+
+    Usage:
+        profiles = ProfileStore()
+        selector = profiles.get(url).chapter_title
+        ...
+        profiles.record(matched)  # after a targeted query
+        profiles.learn(url, chapter_title="h1")  # after the generic path
+    """
+
+    def __init__(self, path: Path = DEFAULT_PROFILES_PATH):
+        self.path = Path(path)
+        self.counts: Counter = Counter()
+        self._profiles: Dict[str, SiteProfile] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                known = {field.name for field in fields(SiteProfile)}
+                self._profiles = {
+                    key: SiteProfile(**{name: value for name, value in profile.items()
+                                        if name in known})
+                    for key, profile in data.items()
+                }
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"[WARN] Ignoring unreadable site profiles {self.path}: {e}")
+
+    def get(self, url: str) -> SiteProfile:
+        """The profile of `url`'s site; an empty one if nothing is known yet."""
+        return self._profiles.get(site_key(url)) or SiteProfile()
+
+    def record(self, matched: bool) -> None:
+        """Counts whether a targeted query still matched its page."""
+        name = "hit" if matched else "miss"
+        self.counts[name] += 1
+        METRICS.count(f"profiles.{name}")
+
+    def learn(self, url: str, **learned: Optional[str]) -> None:
+        """
+        Stores what the generic path found on `url`. None values are skipped,
+        so a page lacking e.g. a title does not erase a working selector.
+        """
+        key = site_key(url)
+        profile = self._profiles.get(key) or SiteProfile()
+        changed = {name: value for name, value in learned.items()
+                   if value is not None and getattr(profile, name) != value}
+        if not changed:
+            return
+        for name, value in changed.items():
+            setattr(profile, name, value)
+        self._profiles[key] = profile
+        self.counts["learned"] += 1
+        METRICS.count("profiles.learned")
+        print(f"[INFO] Site profile for {key}: "
+              + ", ".join(f"{name}={value!r}" for name, value in changed.items()))
+        self.save()
+
+    def save(self) -> None:
+        """Writes every profile; other processes only ever see a complete file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({key: asdict(profile) for key, profile in sorted(self._profiles.items())},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def print_report(self) -> None:
+        """Prints how often the targeted queries matched."""
+        if self.counts:
+            print(f"[INFO] Site profiles: {self.counts['hit']} targeted hit(s), "
+                  f"{self.counts['miss']} miss(es), {self.counts['learned']} update(s)")
@@ -3,166 +3,471 @@ Extracts chapter URLs from a novel's table of contents (ToC) page.
 Handles pagination, preview sections, and ensures correct chapter order.
 """
 
+import asyncio
 import re
-from typing import Optional
+from collections import defaultdict
+from typing import AsyncIterator, Collection, Dict, List, Optional, Tuple
 from urllib.parse import urljoin
 
-from playwright.async_api import async_playwright, Error, Locator
+from playwright.async_api import Error, Locator, Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from scraper.browser_utils import BrowserPool
+from scraper.chapter_index import order_chapters
+from scraper.metrics import METRICS
+from scraper.site_profiles import ProfileStore, SiteProfile
 
 CHAPTER_LINK_CONTAINER_SELECTOR = ".chapter-list, .toc, .chapters, .list-chapters"
 CHAPTER_LINK_SELECTOR = "a[href*='chapter'], a[href*='chap'], a[href*='ep']"
 PAGINATION_CONTAINER_SELECTOR = "nav.pagination, ul.pagination, div.pagination, .pagination"
+PAGINATION_LINK_SELECTOR = ", ".join(
+    f"{selector.strip()} a" for selector in PAGINATION_CONTAINER_SELECTOR.split(",")
+)
+
+NOVEL_TITLE_SELECTORS = [".title", "h1", "h2", "h3", ".novel-title", ".entry-title"]
+COVER_IMAGE_SELECTORS = [
+    ".novel-cover img", ".cover img", ".book-cover img", ".novel-img img",
+    "img[src*='cover']", "img"
+]
+# In priority order: rel="next", <li class="next">, <li class*='skipToNext'>,
+# then arrow-looking links
+NEXT_BUTTON_SELECTORS = [
+    "a[rel='next']", "li.next > a", "li[class*='skipToNext'] > a",
+    *(f"{PAGINATION_CONTAINER_SELECTOR} a:has-text('{symbol}')"
+      for symbol in [">", "›", "→", ">>"]),
+]
+
+TOC_PAGE_CONCURRENCY = 4
+MAX_TOC_PAGES = 2000
+
+# Returns [raw href, absolute URL, text] for every chapter link, in document order
+COLLECT_LINKS_JS = """
+([containerSelector, linkSelector]) => {
+    const containers = Array.from(document.querySelectorAll(containerSelector));
+    const roots = containers.length ? containers : [document];
+    return roots.flatMap((root) => Array.from(
+        root.querySelectorAll(linkSelector),
+        (a) => [a.getAttribute("href") || "", a.href, (a.textContent || "").trim()]
+    ));
+}
+"""
+
+COLLECT_HREFS_JS = """
+(selector) => Array.from(document.querySelectorAll(selector), (a) => a.href)
+"""
+
+# Reads the novel title and cover with a site profile's selectors in one go
+TOC_PROFILE_JS = """
+([titleSelector, coverSelector]) => {
+    const title = titleSelector ? document.querySelector(titleSelector) : null;
+    const cover = !coverSelector ? null
+        : Array.from(document.querySelectorAll(coverSelector), (img) => img.getAttribute("src"))
+            .find((src) => src && !src.toLowerCase().includes("logo"));
+    return { title: title ? title.textContent : null, cover: cover || null };
+}
+"""
+
+# Identifies the ToC page currently displayed, also for AJAX pagination
+PAGE_SIGNATURE_JS = """
+(linkSelector) => {
+    const first = document.querySelector(linkSelector);
+    return location.href + "|" + (first ? first.href : "");
+}
+"""
 
 def is_valid_chapter_link(href: str) -> bool:
     """Heuristic to exclude preview/latest/etc. links."""
     href = href.lower()
     return all(term not in href for term in ["preview", "latest", "updates", "#"])
 
-def extract_numeric_hint(url: str) -> int:
-    """Try to extract a chapter number from a URL for sorting."""
-    match = re.search(r'chapter[-_ /]?(\d+)', url.lower())
-    if not match:
-        match = re.search(r'(\d+)', url)
-    return int(match.group(1)) if match else 0
+def discover_pagination_pages(pagination_urls: List[str]) -> List[str]:
+    """
+    Infers the URL of every ToC page from the links of the pagination bar.
+
+    Looks for links that differ only in one number (`?page=7`, `/page/7/`, ...)
+    and fills in every page between the lowest and highest number shown, so
+    "1 2 3 ... Last(40)" yields all 40 pages.
+
+    Returns:
+        List[str]: Page URLs in order, or [] if no pattern was found.
+    """
+    numbers_by_template = defaultdict(set)
+    for url in pagination_urls:
+        for match in re.finditer(r"\d+", url):
+            template = (url[:match.start()], url[match.end():])
+            numbers_by_template[template].add(int(match.group()))
+
+    candidates = [(len(numbers), template)
+                  for template, numbers in numbers_by_template.items() if len(numbers) >= 2]
+    if not candidates:
+        return []
+
+    _, (prefix, suffix) = max(candidates)
+    numbers = numbers_by_template[(prefix, suffix)]
+    first, last = min(numbers), max(numbers)
+    if last - first >= MAX_TOC_PAGES:
+        print(f"[WARN] Pagination pattern spans {last - first + 1} pages; ignoring it.")
+        return []
+
+    return [f"{prefix}{n}{suffix}" for n in range(first, last + 1)]
+
+async def collect_chapter_links(page: Page, texts: Optional[Dict[str, str]] = None
+                                ) -> List[str]:
+    """
+    Returns the absolute URLs of all valid chapter links on the page, using a
+    single in-page evaluation. `texts`, when given, receives each link's text.
+    """
+    links = await page.evaluate(COLLECT_LINKS_JS,
+                                [CHAPTER_LINK_CONTAINER_SELECTOR, CHAPTER_LINK_SELECTOR])
+    urls = []
+    for href, url, text in links:
+        if href and is_valid_chapter_link(href):
+            urls.append(url)
+            if texts is not None and text:
+                texts.setdefault(url, text)
+    return urls
+
+def clean_novel_title(text: Optional[str]) -> Optional[str]:
+    """The novel title from a header text, without the site name; None if too short."""
+    if not text or len(text.strip()) <= 5:
+        return None
+    return text.strip().split(" | ")[0].split(" - ")[0]
+
+async def probe_novel_title(page: Page) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Tries `NOVEL_TITLE_SELECTORS` in order.
+
+    Returns:
+        tuple: (novel title, selector it was found with), or (None, None)
+    """
+    for selector in NOVEL_TITLE_SELECTORS:
+        el = page.locator(selector)
+        if await el.count() > 0:
+            text = await el.first.text_content()
+            title = clean_novel_title(text)
+            if title:
+                return title, selector
+    return None, None
+
+async def probe_cover_image(page: Page, toc_url: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Tries `COVER_IMAGE_SELECTORS` in order, skipping logos.
+
+    Returns:
+        tuple: (absolute cover URL, selector it was found with), or (None, None)
+    """
+    for selector in COVER_IMAGE_SELECTORS:
+        image_els = page.locator(selector)
+        count = await image_els.count()
+
+        for i in range(count):
+            src = await image_els.nth(i).get_attribute("src")
+            if src and "logo" not in src.lower():
+                return urljoin(toc_url, src), selector
+    return None, None
+
+async def read_novel_details(page: Page, toc_url: str, profiles: Optional[ProfileStore] = None
+                             ) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Finds the novel title and cover image on the ToC page: with one targeted
+    query when the site's profile knows where they are, else (or when that
+    query no longer matches) by probing the generic selectors and learning
+    the ones that worked.
 
-async def find_next_pagination_button(page) -> Optional[Locator]:
+    Returns:
+        tuple: (novel title or None, absolute cover URL or None)
+    """
+    profile = profiles.get(toc_url) if profiles else SiteProfile()
+    title = cover = None
+    if profile.toc_title or profile.toc_cover:
+        found = await page.evaluate(TOC_PROFILE_JS, [profile.toc_title, profile.toc_cover])
+        title = clean_novel_title(found["title"])
+        cover = urljoin(toc_url, found["cover"]) if found["cover"] else None
+        profiles.record(bool((title or not profile.toc_title)
+                             and (cover or not profile.toc_cover)))
+
+    learned = {}
+    if title is None:
+        title, learned["toc_title"] = await probe_novel_title(page)
+    if cover is None:
+        cover, learned["toc_cover"] = await probe_cover_image(page, toc_url)
+    if profiles is not None:
+        profiles.learn(toc_url, **learned)
+    return title, cover
+
+async def locate_next_button(page: Page, selector: str) -> Optional[Locator]:
+    """The first link matching `selector`, unless an arrow link points at a chapter."""
+    button = page.locator(selector)
+    if await button.count() == 0:
+        return None
+    if ":has-text(" in selector:
+        href = await button.first.get_attribute("href") or ""
+        if "chapter" in href.lower():
+            return None
+    return button.first
+
+async def find_next_pagination_button(page, profiles: Optional[ProfileStore] = None
+                                      ) -> Optional[Locator]:
     """
     Attempts to locate a reliable "next page" button within pagination controls.
     Handles various formats like rel="next", <li class="next">, or arrow links.
+    The site profile's button selector is tried first; a different one that
+    works is learned.
     """
-    # Priority 1: rel="next"
-    button = page.locator("a[rel='next']")
-    if await button.count() > 0:
-        return button.first
-
-    # Priority 2: <li class="next"> > a
-    button = page.locator("li.next > a")
-    if await button.count() > 0:
-        return button.first
-
-    # Priority 3: <li class*='skipToNext'> > a
-    button = page.locator("li[class*='skipToNext'] > a")
-    if await button.count() > 0:
-        return button.first
-
-    # Priority 4: fallback on arrow-looking buttons
-    for symbol in [">", "›", "→", ">>"]:
-        button = page.locator(f"{PAGINATION_CONTAINER_SELECTOR} a:has-text('{symbol}')")
-        if await button.count() > 0:
-            href = await button.first.get_attribute("href") or ""
-            if "chapter" not in href.lower():
-                return button.first
+    known = profiles.get(page.url).next_button if profiles else None
+    if known:
+        button = await locate_next_button(page, known)
+        profiles.record(button is not None)
+        if button is not None:
+            return button
+
+    for selector in NEXT_BUTTON_SELECTORS:
+        if selector == known:
+            continue
+        button = await locate_next_button(page, selector)
+        if button is not None:
+            if profiles is not None:
+                profiles.learn(page.url, next_button=selector)
+            return button
 
     return None
 
-async def extract_toc_info(toc_url: str) -> dict:
+async def fetch_toc_page(pool: BrowserPool, url: str,
+                         texts: Optional[Dict[str, str]] = None) -> List[str]:
     """
-    Scrapes a novel's table of contents page for:
-      - Title of the novel
-      - All chapter URLs (ordered)
+    Loads one ToC page in a pooled browser page and returns its chapter links,
+    adding their texts to `texts` when given. A cached copy of the page is
+    always revalidated, since new chapters do not wait for it to expire.
+    """
+    async with pool.page(revalidate=True) as page:
+        with METRICS.stage("toc.page"):
+            response = await page.goto(url, timeout=15000, wait_until="domcontentloaded")
+            METRICS.add_response_bytes(response)
+            try:
+                await page.wait_for_selector(CHAPTER_LINK_SELECTOR, state="attached",
+                                             timeout=10000)
+            except PlaywrightTimeoutError:
+                print(f"[WARN] No chapter links appeared on {url}")
+            return await collect_chapter_links(page, texts)
+
+async def fetch_toc_pages(pool: BrowserPool, numbered_urls: List[Tuple[int, str]],
+                          texts: Optional[Dict[str, str]] = None
+                          ) -> AsyncIterator[Tuple[int, List[str]]]:
+    """
+    Fetches ToC pages concurrently and yields each one as soon as it loads.
 
     Args:
-        toc_url (str): URL to the table of contents.
+        pool (BrowserPool): Pool to lease pages from.
+        numbered_urls (List[Tuple[int, str]]): (page number, url) pairs.
+        texts (Dict[str, str], optional): Receives the text of every link.
 
-    Returns:
+    Yields:
+        tuple: (page number, chapter links of that page)
+    """
+    semaphore = asyncio.Semaphore(TOC_PAGE_CONCURRENCY)
+
+    async def fetch(number: int, url: str) -> Tuple[int, List[str]]:
+        async with semaphore:
+            try:
+                links = await fetch_toc_page(pool, url, texts)
+            except Error as e:
+                print(f"[WARN] Failed to load ToC page {url}: {e}")
+                return number, []
+            print(f"[INFO] Found {len(links)} valid chapter links on {url}.")
+            return number, links
+
+    tasks = [asyncio.create_task(fetch(number, url)) for number, url in numbered_urls]
+    try:
+        for next_page in asyncio.as_completed(tasks):
+            yield await next_page
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def walk_pagination(page: Page, profiles: Optional[ProfileStore] = None,
+                          texts: Optional[Dict[str, str]] = None) -> AsyncIterator[List[str]]:
+    """
+    Yields the chapter links of each ToC page while clicking through "next"
+    buttons one page at a time. Used when no pagination URL pattern can be found.
+    """
+    visited = set()
+
+    while True:
+        signature = await page.evaluate(PAGE_SIGNATURE_JS, CHAPTER_LINK_SELECTOR)
+        if signature in visited:
+            print("[INFO] Already visited this ToC page. Stopping pagination.")
+            break
+        visited.add(signature)
+
+        urls = await collect_chapter_links(page, texts)
+        print(f"[INFO] Found {len(urls)} valid chapter links on this page.")
+        yield urls
+
+        next_button = await find_next_pagination_button(page, profiles)
+        if not next_button:
+            print("[INFO] No next page button found. Pagination complete.")
+            break
+
+        print("[INFO] Navigating to next ToC page...")
+        await next_button.click()
+        try:
+            # Wait until the URL or the chapter list changes, then for the DOM
+            await page.wait_for_function(
+                f"([selector, before]) => ({PAGE_SIGNATURE_JS})(selector) !== before",
+                arg=[CHAPTER_LINK_SELECTOR, signature], timeout=10000
+            )
+            await page.wait_for_load_state("domcontentloaded")
+        except PlaywrightTimeoutError:
+            print("[INFO] Next page did not load. Pagination complete.")
+            break
+
+def order_chapter_urls(pages: List[Tuple[int, List[str]]],
+                       texts: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Merges per-page chapter links into the final chapter order: pages in page
+    order, spellings of the same URL merged, kept in ToC order unless the
+    chapter numbers strictly decrease down the ToC, in which case it is
+    reversed (see `scraper.chapter_index.order_chapters`).
+
+    Args:
+        pages (List[Tuple[int, List[str]]]): (page number, links) in any order.
+        texts (Dict[str, str], optional): Link text per URL.
+    """
+    ordered = [url for _, links in sorted(pages, key=lambda item: item[0]) for url in links]
+    return order_chapters(ordered, texts)
+
+async def iter_toc_pages(toc_url: str, pool: BrowserPool, skip_pages: Collection[str] = (),
+                         texts: Optional[Dict[str, str]] = None) -> AsyncIterator[dict]:
+    """
+    Scrapes a novel's table of contents and yields its chapter links page by
+    page, so chapter downloads can start before the whole ToC is known.
+
+    When the pagination links reveal a URL pattern, the remaining ToC pages
+    are fetched concurrently and yielded as they load; otherwise "next"
+    buttons are followed one page at a time. At least one page is always
+    yielded, possibly without links.
+
+    Args:
+        toc_url (str): URL to the table of contents.
+        pool (BrowserPool): Pool to lease pages from.
+        skip_pages (Collection[str]): ToC page URLs not to fetch when the
+            pagination has a URL pattern; they are yielded with
+            "chapter_urls" None. The first page is always read.
+        texts (Dict[str, str], optional): Receives the text of every
+            chapter link, for `order_chapter_urls`.
+
+    Yields:
         dict: {
             "title": str,
-            "chapter_urls": List[str]
+            "cover_image_url": str or None,
+            "page": int (position of the page, for ordering),
+            "url": str or None (page URL; None when following "next" buttons),
+            "chapter_urls": List[str] or None (links on this page, unsorted)
         }
     """
-    chapter_urls = []
     novel_title = "Unknown Novel"
+    cover_image_url = None
+    first_page_url = None
+    first_page_links = []
+    page_urls = []
+    yielded = 0
+
+    def toc_page(number: int, links: Optional[List[str]], url: Optional[str] = None) -> dict:
+        return {
+            "title": novel_title,
+            "cover_image_url": cover_image_url,
+            "page": number,
+            "url": url,
+            "chapter_urls": links,
+        }
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
+    # ToC pages change between runs; a cached copy is revalidated however fresh
+    async with pool.page(revalidate=True) as page:
         print(f"[INFO] Navigating to ToC: {toc_url}")
 
         try:
-            await page.goto(toc_url, timeout=15000)
-
-            # === Attempt to extract novel title ===
-            # Priority 1: Header elements
-            for selector in [".title", "h1", "h2", "h3", ".novel-title", ".entry-title"]:
-                el = page.locator(selector)
-                if await el.count() > 0:
-                    text = await el.first.text_content()
-                    print(text)
-                    if text and len(text.strip()) > 5:
-                        novel_title = text.strip().split(" | ")[0].split(" - ")[0]
-                        break
+            with METRICS.stage("toc.first_page"):
+                METRICS.add_response_bytes(await page.goto(toc_url, timeout=15000))
 
+            # === Novel title and cover image ===
+            title, cover_image_url = await read_novel_details(page, toc_url, pool.profiles)
+            novel_title = title or novel_title
             print(f"[INFO] Novel title detected: '{novel_title}'")
-
-            # === Attempt to get Novel Cover Image ===
-                        # === Attempt to extract cover image ===
-            image_selectors = [
-                ".novel-cover img", ".cover img", ".book-cover img", ".novel-img img",
-                "img[src*='cover']", "img"
-            ]
-            cover_image_url = None
-
-            for selector in image_selectors:
-                image_els = page.locator(selector)
-                count = await image_els.count()
-
-                for i in range(count):
-                    src = await image_els.nth(i).get_attribute("src")
-                    if src and "logo" not in src.lower():
-                        cover_image_url = urljoin(toc_url, src)
-                        print(f"[INFO] Cover image found: {cover_image_url}")
-                        break
-
-                if cover_image_url:
-                    break
+            if cover_image_url:
+                print(f"[INFO] Cover image found: {cover_image_url}")
 
             # === Scrape chapter links across all pagination pages ===
-            visited_urls = []
-
-            while True:
-                if (page.url in visited_urls):
-                    print("[INFO] Already visited this ToC page. Stopping pagination.")
-                    break
-                visited_urls.append(page.url)
-
-                container = page.locator(CHAPTER_LINK_CONTAINER_SELECTOR)
-                if await container.count() == 0:
-                    container = page
-
-                links = await container.locator(CHAPTER_LINK_SELECTOR).all()
-                urls = []
-
-                for link in links:
-                    href = await link.get_attribute("href")
-                    if href and is_valid_chapter_link(href):
-                        full_url = urljoin(toc_url, href)
-                        urls.append(full_url)
-
-                print(f"[INFO] Found {len(urls)} valid chapter links on this page.")
-                chapter_urls.extend(urls)
-
-                next_button = await find_next_pagination_button(page)
-                if not next_button:
-                    print("[INFO] No next page button found. Pagination complete.")
-                    break
-
-                print("[INFO] Navigating to next ToC page...")
-                await next_button.click()
-                await page.wait_for_timeout(1500)
-
-        except (TimeoutError, Error) as e:
+            first_page_url = page.url
+            first_page_links = await collect_chapter_links(page, texts)
+            pagination_urls = await page.evaluate(COLLECT_HREFS_JS, PAGINATION_LINK_SELECTOR)
+            page_urls = discover_pagination_pages(pagination_urls)
+
+            if page_urls:
+                print(f"[INFO] Pagination pattern found: {len(page_urls)} ToC pages.")
+            else:
+                async for links in walk_pagination(page, pool.profiles, texts):
+                    yield toc_page(yielded, links)
+                    yielded += 1
+
+        except Error as e:
             print(f"[ERROR] Failed during ToC extraction: {e}")
 
-        finally:
-            await browser.close()
+    # Fetch the remaining pages once the first page is back in the pool
+    if page_urls:
+        first_number = page_urls.index(first_page_url) if first_page_url in page_urls else -1
+        yield toc_page(first_number, first_page_links, first_page_url)
+        yielded += 1
+
+        others = [(number, url) for number, url in enumerate(page_urls) if url != first_page_url]
+        for number, url in others:
+            if url in skip_pages:
+                yield toc_page(number, None, url)
+                yielded += 1
+        urls = dict(others)
+        async for number, links in fetch_toc_pages(
+                pool, [(number, url) for number, url in others if url not in skip_pages],
+                texts):
+            yield toc_page(number, links, urls[number])
+            yielded += 1
+
+    if not yielded:
+        yield toc_page(0, [])
+
+async def extract_toc_info(toc_url: str, pool: Optional[BrowserPool] = None) -> dict:
+    """
+    Scrapes a novel's table of contents page for:
+      - Title of the novel
+      - All chapter URLs (ordered)
 
-    unique_urls = list(dict.fromkeys(chapter_urls))
-    sorted_urls = sorted(unique_urls, key=extract_numeric_hint)
+    Args:
+        toc_url (str): URL to the table of contents.
+        pool (BrowserPool, optional): Pool to lease pages from. A temporary
+            pool is started when omitted.
 
+    Returns:
+        dict: {
+            "title": str,
+            "chapter_urls": List[str],
+            "cover_image_url": str or None
+        }
+    """
+    if pool is None:
+        async with BrowserPool(pages_per_browser=TOC_PAGE_CONCURRENCY) as own_pool:
+            return await extract_toc_info(toc_url, own_pool)
+
+    toc_info = {"title": "Unknown Novel", "cover_image_url": None}
+    pages = []
+    texts = {}
+    async for toc_page in iter_toc_pages(toc_url, pool, texts=texts):
+        toc_info["title"] = toc_page["title"]
+        toc_info["cover_image_url"] = toc_page["cover_image_url"]
+        pages.append((toc_page["page"], toc_page["chapter_urls"]))
+
+    sorted_urls = order_chapter_urls(pages, texts)
     print(f"[INFO] Total unique, sorted chapter URLs: {len(sorted_urls)}")
 
     return {
-        "title": novel_title,
+        "title": toc_info["title"],
         "chapter_urls": sorted_urls,
-        "cover_image_url": cover_image_url
+        "cover_image_url": toc_info["cover_image_url"]
     }
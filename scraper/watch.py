@@ -0,0 +1,226 @@
+"""
+Cheap change detection for the ToC of a novel that is already downloaded,
+so ongoing serials can be polled without reading their whole ToC.
+
+After each scrape the watch state records the URLs of the novel's ToC
+pages. A poll then fetches only the first ToC page and the last known one,
+over plain HTTP and conditionally with the validators the server sent last
+time, and compares the chapter links on them with the previous poll's. Pages
+whose links cannot be read without JavaScript are probed with a pooled
+browser page instead, which revalidates its cached copy the same way. Only
+when the links differ is the novel scraped again, skipping the ToC pages
+between the first and the last known one unless a full sync of the ToC is
+due.
+
+The state is kept in the novel folder as watch.json.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import time
+from html import unescape
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+import aiohttp
+from playwright.async_api import Error
+
+from scraper.browser_utils import BrowserPool
+from scraper.http_scraper import JS_CHALLENGE_STATUSES
+from scraper.metrics import METRICS
+from scraper.toc_extractor import fetch_toc_page, is_valid_chapter_link
+
+WATCH_STATE_NAME = "watch.json"
+DEFAULT_POLL_INTERVAL = 30 * 60.0  # seconds between polls
+# Seconds after which a change makes the scraper read every ToC page again
+DEFAULT_FULL_SYNC_INTERVAL = 24 * 60 * 60.0
+
+LINK_HREF = re.compile(r"""<a\b[^>]*?\bhref\s*=\s*["']([^"']*)["']""", re.IGNORECASE)
+# Same links as `CHAPTER_LINK_SELECTOR`, whose "chapter" match is covered by "chap"
+CHAPTER_HREF_TERMS = ("chap", "ep")
+
+
+def page_links(html: str, page_url: str) -> List[str]:
+    """Absolute URLs of the chapter links in a ToC page's HTML, in document order."""
+    hrefs = (unescape(href) for href in LINK_HREF.findall(html))
+    return [urljoin(page_url, href) for href in hrefs
+            if any(term in href for term in CHAPTER_HREF_TERMS) and is_valid_chapter_link(href)]
+
+
+def links_digest(links: List[str]) -> str:
+    """Digest of a page's distinct chapter links, ignoring their order."""
+    return hashlib.sha1("\n".join(sorted(set(links))).encode("utf-8")).hexdigest()
+
+
+class WatchState:
+    """
+    What the previous polls saw of a novel's ToC.
+
+    Attributes:
+        toc_pages (List[str]): ToC page URLs in page order as of the last
+            scrape; [] when the ToC is not paginated by URL.
+        pages (Dict[str, dict]): Per probed page URL, the "etag" and
+            "last_modified" validators, the "links" digest and whether it
+            needs a "browser".
+        full_sync_at (float): Unix time every ToC page was last read.
+        checked_at (float): Unix time of the last poll.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.toc_pages: List[str] = []
+        self.pages: Dict[str, dict] = {}
+        self.full_sync_at = 0.0
+        self.checked_at = 0.0
+
+    @classmethod
+    def load(cls, novel_dir: Path) -> "WatchState":
+        """Loads the watch state of a novel folder; an empty one if it has none."""
+        state = cls(novel_dir / WATCH_STATE_NAME)
+        try:
+            with open(state.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return state
+        state.toc_pages = data.get("toc_pages", [])
+        state.pages = data.get("pages", {})
+        state.full_sync_at = data.get("full_sync_at", 0.0)
+        state.checked_at = data.get("checked_at", 0.0)
+        return state
+
+    def save(self) -> None:
+        """Writes the state next to the novel's chapters."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"toc_pages": self.toc_pages, "pages": self.pages,
+                       "full_sync_at": self.full_sync_at, "checked_at": self.checked_at},
+                      f, indent=2)
+        tmp_path.replace(self.path)
+
+    def probe_urls(self, toc_url: str) -> List[str]:
+        """
+        The ToC pages a poll fetches: the first one, where newest-first sites
+        list new chapters, and the last known one, where the others do.
+        """
+        urls = [toc_url]
+        if self.toc_pages and self.toc_pages[-1] != toc_url:
+            urls.append(self.toc_pages[-1])
+        return urls
+
+    def skip_pages(self, full_sync_interval: float = DEFAULT_FULL_SYNC_INTERVAL) -> List[str]:
+        """ToC pages the next scrape need not read: all known ones but the last."""
+        if time.time() - self.full_sync_at >= full_sync_interval:
+            return []
+        return self.toc_pages[:-1]
+
+    def record_scrape(self, toc_url: str, toc_pages: List[str], full: bool) -> None:
+        """Remembers the ToC pages a scrape found and whether it read all of them."""
+        self.toc_pages = toc_pages
+        if full:
+            self.full_sync_at = time.time()
+        # Pages no longer probed keep no validators
+        self.pages = {url: self.pages[url] for url in self.probe_urls(toc_url)
+                      if url in self.pages}
+
+    def unprobed(self, toc_url: str) -> bool:
+        """Whether a page a poll fetches has not been seen yet, e.g. a new last page."""
+        return any("links" not in self.pages.get(url, {}) for url in self.probe_urls(toc_url))
+
+
+async def http_links(pool: BrowserPool, url: str, seen: Dict) -> Optional[List[str]]:
+    """
+    Reads the chapter links of a ToC page without a browser, sending the
+    validators in `seen` and storing the new ones. A fresh copy goes into the
+    pool's response cache so a scrape that follows reads the same page.
+
+    Returns:
+        List[str] | None: The links (possibly none, also for a status that
+            usually means a JavaScript challenge), or None for a 304.
+
+    Raises:
+        aiohttp.ClientResponseError: For any other status than 200.
+    """
+    http = pool.http
+    headers = {}
+    if seen.get("etag"):
+        headers["If-None-Match"] = seen["etag"]
+    if seen.get("last_modified"):
+        headers["If-Modified-Since"] = seen["last_modified"]
+
+    # Straight to the network: a fresh cache entry would hide the change
+    async with http.session.get(url, headers=headers) as response:
+        if response.status == 304 and "links" in seen:
+            METRICS.count("watch.not_modified")
+            if http.cache is not None:
+                http.cache.refresh(url)
+            return None
+        body = await response.read()
+        METRICS.add_bytes("http", len(body))
+        if response.status in JS_CHALLENGE_STATUSES:
+            return []
+        if response.status != 200:
+            raise aiohttp.ClientResponseError(response.request_info, (),
+                                              status=response.status)
+        if http.cache is not None:
+            http.cache.store(url, response.status, response.headers, body)
+        seen["etag"] = response.headers.get("ETag")
+        seen["last_modified"] = response.headers.get("Last-Modified")
+        return page_links(await response.text(errors="replace"), url)
+
+
+async def probe_page(pool: BrowserPool, url: str, seen: Dict) -> Optional[bool]:
+    """
+    Checks one ToC page for new or removed chapter links and updates `seen`.
+
+    Returns:
+        bool | None: Whether the links changed; None if the page could not
+            be read. A page never probed before counts as changed.
+    """
+    links = None
+    if not seen.get("browser"):
+        try:
+            with METRICS.stage("watch.http_probe"):
+                links = await http_links(pool, url, seen)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[WARN] Couldn't check {url} over HTTP: {e}")
+            return None
+        if links is None:
+            return False
+        if not links:
+            print(f"[INFO] {url} lists no chapters without JavaScript; probing it with a "
+                  "browser from now on.")
+            seen["browser"] = True
+
+    if seen.get("browser"):
+        try:
+            with METRICS.stage("watch.browser_probe"):
+                links = await fetch_toc_page(pool, url)
+        except Error as e:
+            print(f"[WARN] Couldn't check {url}: {e}")
+            return None
+
+    digest = links_digest(links)
+    changed = digest != seen.get("links")
+    seen["links"] = digest
+    return changed
+
+
+async def toc_changed(pool: BrowserPool, state: WatchState, toc_url: str) -> Optional[bool]:
+    """
+    Probes the first and last known ToC pages of a novel.
+
+    Returns:
+        bool | None: Whether any of them changed since the previous poll;
+            None when none changed but some could not be checked.
+    """
+    urls = state.probe_urls(toc_url)
+    results = await asyncio.gather(*(probe_page(pool, url, state.pages.setdefault(url, {}))
+                                     for url in urls))
+    state.checked_at = time.time()
+    METRICS.count("watch.probes", len(urls))
+    if any(results):
+        return True
+    return None if None in results else False